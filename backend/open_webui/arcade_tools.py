@@ -1,12 +1,20 @@
 """Arcade Tools Registry"""
 
+import asyncio
 import json
 import logging
+import threading
 import time
-from typing import Optional
+from typing import Any, Callable, Optional
 from uuid import uuid4
 from fastapi import Request
 
+from open_webui.env import (
+    ARCADE_AUTH_CACHE_TTL,
+    ARCADE_AUTH_PENDING_CACHE_TTL,
+    ARCADE_TOOLS_CACHE_TTL,
+)
+
 
 log = logging.getLogger(__name__)
 
@@ -100,6 +108,188 @@ ARCADE_TOOLS_TO_DISPLAY = {
     ],
 } 
 
+
+ARCADE_CLIENTS = {}
+
+
+def get_arcade_client(api_key: Optional[str] = None):
+    """Arcade client for `api_key`, shared so its connections are reused."""
+    from arcadepy import Arcade
+
+    client = ARCADE_CLIENTS.get(api_key)
+    if client is None:
+        client = Arcade(api_key=api_key or None)
+        ARCADE_CLIENTS[api_key] = client
+    return client
+
+
+class ArcadeToolCatalog:
+    """
+    Tools listed from the Arcade service, indexed by qualified name and by
+    toolkit. `periodic_refresh` lists them again every `ttl` seconds.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+        self.tools = []
+        self.loaded_at = None
+        self._by_name = {}
+        self._by_toolkit = {}
+        self._auth_requirements = {}
+
+    def set_tools(self, tools: list):
+        by_name = {tool.qualified_name: tool for tool in tools}
+        by_toolkit = {}
+        for tool in tools:
+            by_toolkit.setdefault(tool.toolkit.name, []).append(tool)
+
+        # Swapped at once, so readers see either the old or the new catalog
+        self.tools, self._by_name, self._by_toolkit, self._auth_requirements = (
+            list(tools),
+            by_name,
+            by_toolkit,
+            {},
+        )
+        self.loaded_at = time.time()
+
+    def load(self, client):
+        """List every tool, across pages, from the Arcade service."""
+        self.set_tools([tool for tool in client.tools.list(limit=100)])
+        log.info(f"Loaded {len(self.tools)} Arcade tools")
+
+    async def periodic_refresh(self, get_client: Callable[[], Any]):
+        if self.ttl <= 0:
+            return
+
+        while True:
+            await asyncio.sleep(self.ttl)
+            try:
+                await asyncio.to_thread(self.load, get_client())
+            except Exception as e:
+                log.warning(f"Error refreshing Arcade tools: {e}")
+
+    def get_tool(self, name: str):
+        return self._by_name.get(name)
+
+    def get_toolkit_tools(self, toolkit: str) -> list:
+        """Tools of an Arcade toolkit, e.g. "Google"."""
+        return self._by_toolkit.get(toolkit, [])
+
+    def get_enabled_tools(self, tool_kit: dict) -> list:
+        """Tools enabled in a toolkit of ARCADE_TOOLS_CONFIG."""
+        if not tool_kit.get("enabled"):
+            return []
+        return [
+            self._by_name[tool.get("name")]
+            for tool in tool_kit.get("tools", [])
+            if tool.get("enabled") and tool.get("name") in self._by_name
+        ]
+
+    def get_auth_requirement(self, tool_kit: dict) -> Optional[dict]:
+        """
+        Authorization covering the tools of a toolkit of ARCADE_TOOLS_CONFIG,
+        with the OAuth2 scopes of all of them. None if they need none.
+        """
+        names = tuple(tool.get("name") for tool in tool_kit.get("tools", []))
+        if names in self._auth_requirements:
+            return self._auth_requirements[names]
+
+        all_scopes = set()
+        auth_id = None
+        auth_provider_id = None
+        auth_provider_type = None
+
+        for name in names:
+            arcade_tool = self._by_name.get(name)
+            if arcade_tool is None:
+                continue
+
+            requirements = arcade_tool.requirements
+            if requirements and requirements.authorization:
+                auth = requirements.authorization
+                if auth.oauth2 and auth.oauth2.scopes:
+                    all_scopes.update(auth.oauth2.scopes)
+                # Use the first non-None values we find
+                auth_id = auth_id or auth.id
+                auth_provider_id = auth_provider_id or auth.provider_id
+                auth_provider_type = auth_provider_type or auth.provider_type
+
+        auth_requirement = None
+        if auth_provider_id and auth_provider_type:
+            auth_requirement = {
+                "id": auth_id,
+                "provider_id": auth_provider_id,
+                "provider_type": auth_provider_type,
+                "oauth2": {"scopes": sorted(all_scopes)},
+            }
+
+        self._auth_requirements[names] = auth_requirement
+        return auth_requirement
+
+
+class ArcadeAuthCache:
+    """
+    Authorization statuses of users from the Arcade service, by user and
+    authorization key. Completed authorizations are kept for `ttl` seconds,
+    others only for `pending_ttl` seconds, as the user may complete them at
+    any time. `invalidate` drops them, e.g. when the user returns from
+    authorizing.
+    """
+
+    def __init__(self, ttl: int, pending_ttl: int):
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+
+        self._statuses = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, auth_requirement: dict) -> str:
+        return json.dumps(auth_requirement, sort_keys=True)
+
+    def get(self, user_id: str, key: str):
+        with self._lock:
+            entry = self._statuses.get(user_id, {}).get(key)
+            if entry is None:
+                return None
+
+            response, expires_at = entry
+            if time.time() >= expires_at:
+                self._statuses[user_id].pop(key, None)
+                return None
+            return response
+
+    def set(self, user_id: str, key: str, response):
+        ttl = self.ttl if response.status == "completed" else self.pending_ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._statuses.setdefault(user_id, {})[key] = (response, time.time() + ttl)
+
+    def invalidate(self, user_id: str, key: Optional[str] = None):
+        with self._lock:
+            if key is None:
+                self._statuses.pop(user_id, None)
+            else:
+                self._statuses.get(user_id, {}).pop(key, None)
+
+
+ARCADE_TOOL_CATALOG = ArcadeToolCatalog(ARCADE_TOOLS_CACHE_TTL)
+ARCADE_AUTH_CACHE = ArcadeAuthCache(ARCADE_AUTH_CACHE_TTL, ARCADE_AUTH_PENDING_CACHE_TTL)
+
+
+def authorize_arcade_user(client, user_id: str, auth_requirement: dict):
+    """Authorization status of a user for `auth_requirement`, cached."""
+    key = ARCADE_AUTH_CACHE.get_key(auth_requirement)
+    auth_result = ARCADE_AUTH_CACHE.get(user_id, key)
+    if auth_result is None:
+        auth_result = client.auth.authorize(
+            auth_requirement=auth_requirement, user_id=user_id
+        )
+        ARCADE_AUTH_CACHE.set(user_id, key, auth_result)
+    return auth_result
+
+
 # new
 async def chat_completion_arcade_tools_handler(
     request, body: dict, extra_params: dict, user, models, arcade_tools
@@ -110,12 +300,12 @@ async def chat_completion_arcade_tools_handler(
     from open_webui.utils.task import get_task_model_id
     from open_webui.utils.misc import get_last_user_message
     from open_webui.utils.chat import generate_chat_completion
+    from open_webui.utils.tools import run_tool_calls
     from open_webui.utils.task import tools_function_calling_generation_template
     from open_webui.config import DEFAULT_TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE
     
     try:
-        from arcadepy import Arcade
-        client = Arcade(api_key=request.app.state.config.ARCADE_API_KEY)
+        client = get_arcade_client(request.app.state.config.ARCADE_API_KEY)
     except ImportError:
         log.error("arcadepy package is not installed. Please install it to use Arcade tools.")
         return body, {}
@@ -289,10 +479,17 @@ async def chat_completion_arcade_tools_handler(
                 except Exception as e:
                     log.warning(f"Failed to auto-set end time for {tool_name}: {e}")
             
-            auth_response = client.tools.authorize(
-                tool_name=tool_name,
-                user_id=user_id,
-            )
+            # The Arcade client is blocking, run it in a thread so tool calls
+            # of one response can run concurrently
+            auth_key = f"tool:{tool_name}"
+            auth_response = ARCADE_AUTH_CACHE.get(user_id, auth_key)
+            if auth_response is None:
+                auth_response = await asyncio.to_thread(
+                    client.tools.authorize,
+                    tool_name=tool_name,
+                    user_id=user_id,
+                )
+                ARCADE_AUTH_CACHE.set(user_id, auth_key, auth_response)
             if auth_response.status != "completed":
                 await event_emitter(
                     {
@@ -326,7 +523,8 @@ async def chat_completion_arcade_tools_handler(
 
                 start_time = time.time()
 
-                response = client.tools.execute(
+                response = await asyncio.to_thread(
+                    client.tools.execute,
                     tool_name=tool_name,
                     input=input_data,
                     user_id=user_id,
@@ -349,6 +547,8 @@ async def chat_completion_arcade_tools_handler(
                 }
             except Exception as e:
                 log.exception(e)
+                # e.g. a revoked authorization, checked again on the next call
+                ARCADE_AUTH_CACHE.invalidate(user_id, auth_key)
 
                 await event_emitter(
                     {
@@ -460,9 +660,7 @@ async def chat_completion_arcade_tools_handler(
 
             result = json.loads(content)
 
-            async def tool_call_handler(tool_call):
-                nonlocal skip_files
-
+            async def execute_tool_call(tool_call):
                 log.debug(f"{tool_call=}")
 
                 tool_function_name = tool_call.get("name", None)
@@ -474,49 +672,45 @@ async def chat_completion_arcade_tools_handler(
                             "data": {"action": "arcade_tool", "description": "No response from tool", "done": True},
                         }
                     )
-                    return body, {}
+                    return None
 
                 tool_function_params = tool_call.get("parameters", {})
 
-                try:
-                    tool = tools[tool_function_name]
+                tool = tools[tool_function_name]
+
+                spec = tool.get("spec", {})
+                allowed_params = (
+                    spec.get("parameters", {}).get("properties", {}).keys()
+                )
+                tool_function_params = {
+                    k: v
+                    for k, v in tool_function_params.items()
+                    if k in allowed_params
+                }
 
-                    spec = tool.get("spec", {})
-                    allowed_params = (
-                        spec.get("parameters", {}).get("properties", {}).keys()
+                if tool.get("direct", False):
+                    return await event_caller(
+                        {
+                            "type": "execute:tool",
+                            "data": {
+                                "id": str(uuid4()),
+                                "name": tool_function_name,
+                                "params": tool_function_params,
+                                "server": tool.get("server", {}),
+                                "session_id": metadata.get("session_id", None),
+                            },
+                        }
                     )
-                    tool_function_params = {
-                        k: v
-                        for k, v in tool_function_params.items()
-                        if k in allowed_params
-                    }
+                else:
+                    tool_function = tool["callable"]
+                    return await tool_function(**tool_function_params)
 
-                    if tool.get("direct", False):
-                        tool_result = await event_caller(
-                            {
-                                "type": "execute:tool",
-                                "data": {
-                                    "id": str(uuid4()),
-                                    "name": tool_function_name,
-                                    "params": tool_function_params,
-                                    "server": tool.get("server", {}),
-                                    "session_id": metadata.get("session_id", None),
-                                },
-                            }
-                        )
-                    else:
-                        tool_function = tool["callable"]
-                        tool_result = await tool_function(**tool_function_params)
-
-                        # if tool_result.get("status") == "pending":
-                        #     return {
-                        #         "result": None,
-                        #         "status": "pending",
-                        #         "auth_url": tool_result.get("auth_url"),
-                        #     }
-                        
-                except Exception as e:
-                    tool_result = str(e)
+            def tool_result_handler(tool_call, tool_result):
+                nonlocal skip_files
+
+                tool_function_name = tool_call.get("name", None)
+                if tool_function_name not in tools:
+                    return
 
                 tool_result_files = []
                 if isinstance(tool_result, list):
@@ -582,11 +776,12 @@ async def chat_completion_arcade_tools_handler(
                         skip_files = True
 
             # check if "tool_calls" in result
-            if result.get("tool_calls"):
-                for tool_call in result.get("tool_calls"):
-                    await tool_call_handler(tool_call)
-            else:
-                await tool_call_handler(result)
+            tool_calls = result.get("tool_calls") or [result]
+
+            # Executed concurrently, their results are added in the order of the calls
+            tool_results = await run_tool_calls(tool_calls, execute_tool_call)
+            for tool_call, tool_result in zip(tool_calls, tool_results):
+                tool_result_handler(tool_call, tool_result)
 
         except Exception as e:
             log.debug(f"Error: {e}")
@@ -616,66 +811,25 @@ def get_arcade_tools(request: Request, user) -> list["ToolUserResponse"]:
     # Import here to avoid circular imports
     from open_webui.models.tools import ToolUserResponse
     
-    from arcadepy import Arcade
-    client = Arcade()
+    client = get_arcade_client(request.app.state.config.ARCADE_API_KEY)
 
     arcade_tools = []
-    arcade_tool_mapper = {}
-    
-    # Check if arcade tools are properly initialized
-    if not hasattr(request.app.state, 'ARCADE_TOOLS'):
-        print("[DEBUG] ARCADE_TOOLS not found in app state")
-        return arcade_tools
         
     if not hasattr(request.app.state.config, 'ARCADE_TOOLS_CONFIG'):
         print("[DEBUG] ARCADE_TOOLS_CONFIG not found in config")
         return arcade_tools
     
-    print(f"[DEBUG] Found {len(request.app.state.ARCADE_TOOLS)} arcade tools, {len(request.app.state.config.ARCADE_TOOLS_CONFIG)} tool configs")
-    
-    for idx, tool in enumerate(request.app.state.ARCADE_TOOLS):
-        arcade_tool_mapper[tool.qualified_name] = tool
+    print(f"[DEBUG] Found {len(ARCADE_TOOL_CATALOG.tools)} arcade tools, {len(request.app.state.config.ARCADE_TOOLS_CONFIG)} tool configs")
 
     for idx, tool_kit in enumerate(request.app.state.config.ARCADE_TOOLS_CONFIG):
         if tool_kit.get('enabled'):
             print(f"[DEBUG] Processing enabled tool_kit: {tool_kit.get('toolkit')}")
             
-            all_scopes = set()
-            auth_id = None
-            auth_provider_id = None 
-            auth_provider_type = None
             auth_result = None
-            
-            for tool in tool_kit.get('tools', []):
-                tool_name = tool.get('name')
-                
-                if tool_name in arcade_tool_mapper:
-                    arcade_tool = arcade_tool_mapper[tool_name]
-                    requirements = arcade_tool.requirements
-                    
-                    if requirements and requirements.authorization:
-                        auth = requirements.authorization
-                        if auth.oauth2 and auth.oauth2.scopes:
-                            all_scopes.update(auth.oauth2.scopes)
-                        # Use the first non-None values we find
-                        auth_id = auth_id or auth.id
-                        auth_provider_id = auth_provider_id or auth.provider_id
-                        auth_provider_type = auth_provider_type or auth.provider_type
-            
-            if auth_provider_id and auth_provider_type:
-                auth_requirement = {
-                    "provider_id": auth_provider_id,
-                    "provider_type": auth_provider_type,
-                    "oauth2": {
-                        "scopes": list(all_scopes)
-                    }
-                }
-                if auth_id:
-                    auth_requirement["id"] = auth_id
-                else:
-                    auth_requirement["id"] = None
+            auth_requirement = ARCADE_TOOL_CATALOG.get_auth_requirement(tool_kit)
+            if auth_requirement:
                 log.info(f"{auth_requirement=}")
-                auth_result = client.auth.authorize(auth_requirement=auth_requirement, user_id=user.id)
+                auth_result = authorize_arcade_user(client, user.id, auth_requirement)
             
             # Add tool regardless of auth result
             arcade_tools.append(
@@ -697,4 +851,4 @@ def get_arcade_tools(request: Request, user) -> list["ToolUserResponse"]:
             )
             print(f"[DEBUG] Added tool: {tool_kit.get('toolkit')}")
     
-    return arcade_tools
\ No newline at end of file
+    return arcade_tools
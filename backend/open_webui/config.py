@@ -743,6 +743,26 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# Size cap of the local disk cache in front of remote storage providers, 0 for unbounded
+STORAGE_LOCAL_CACHE_MAX_SIZE_MB = os.environ.get("STORAGE_LOCAL_CACHE_MAX_SIZE_MB", "2048")
+
+try:
+    STORAGE_LOCAL_CACHE_MAX_SIZE_MB = int(STORAGE_LOCAL_CACHE_MAX_SIZE_MB)
+except ValueError:
+    STORAGE_LOCAL_CACHE_MAX_SIZE_MB = 2048
+
+# Redirect file downloads to short-lived presigned URLs where the provider supports it
+ENABLE_STORAGE_PRESIGNED_URL_REDIRECT = (
+    os.environ.get("ENABLE_STORAGE_PRESIGNED_URL_REDIRECT", "false").lower() == "true"
+)
+
+STORAGE_PRESIGNED_URL_EXPIRES_IN = os.environ.get("STORAGE_PRESIGNED_URL_EXPIRES_IN", "300")
+
+try:
+    STORAGE_PRESIGNED_URL_EXPIRES_IN = int(STORAGE_PRESIGNED_URL_EXPIRES_IN)
+except ValueError:
+    STORAGE_PRESIGNED_URL_EXPIRES_IN = 300
+
 ####################################
 # File Upload DIR
 ####################################
@@ -1532,6 +1552,12 @@ ENABLE_RETRIEVAL_QUERY_GENERATION = PersistentConfig(
     os.environ.get("ENABLE_RETRIEVAL_QUERY_GENERATION", "True").lower() == "true",
 )
 
+ENABLE_PLAN_GENERATION = PersistentConfig(
+    "ENABLE_PLAN_GENERATION",
+    "task.plan.enable",
+    os.environ.get("ENABLE_PLAN_GENERATION", "True").lower() == "true",
+)
+
 
 QUERY_GENERATION_PROMPT_TEMPLATE = PersistentConfig(
     "QUERY_GENERATION_PROMPT_TEMPLATE",
@@ -1631,6 +1657,27 @@ TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE = PersistentConfig(
 )
 
 
+DEFAULT_PLAN_GENERATION_PROMPT_TEMPLATE = """### Task:
+Analyze the chat history to plan how to gather the information needed to respond to the latest user message, in the given language. Fill in every field listed below in a single JSON object.
+
+### Fields:
+{{FIELDS}}
+
+### Guidelines:
+- Respond **EXCLUSIVELY** with a JSON object. Any form of extra commentary, explanation, or additional text is strictly prohibited.
+- Include every field listed above, using an empty list when nothing is needed.
+- Today's date is: {{CURRENT_DATE}}.
+
+### Output:
+Strictly return in JSON format:
+{{OUTPUT}}
+
+### Chat History:
+<chat_history>
+{{MESSAGES:END:6}}
+</chat_history>
+"""
+
 DEFAULT_TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE = """Available Tools: {{TOOLS}}
 
 Your task is to choose and return the correct tool(s) from the list of available tools based on the query. Follow these guidelines:
@@ -2410,6 +2457,41 @@ WEB_SEARCH_TRUST_ENV = PersistentConfig(
     os.getenv("WEB_SEARCH_TRUST_ENV", "False").lower() == "true",
 )
 
+# Connections the web loader keeps open at once, in total and to a single host
+WEB_LOADER_MAX_CONNECTIONS = os.environ.get("WEB_LOADER_MAX_CONNECTIONS", "32")
+
+try:
+    WEB_LOADER_MAX_CONNECTIONS = max(1, int(WEB_LOADER_MAX_CONNECTIONS))
+except Exception:
+    WEB_LOADER_MAX_CONNECTIONS = 32
+
+WEB_LOADER_MAX_CONNECTIONS_PER_HOST = os.environ.get(
+    "WEB_LOADER_MAX_CONNECTIONS_PER_HOST", "4"
+)
+
+try:
+    WEB_LOADER_MAX_CONNECTIONS_PER_HOST = max(
+        1, int(WEB_LOADER_MAX_CONNECTIONS_PER_HOST)
+    )
+except Exception:
+    WEB_LOADER_MAX_CONNECTIONS_PER_HOST = 4
+
+# Loaded web pages, and their embeddings, are reused for this many seconds
+# (0 disables the page cache)
+WEB_LOADER_CACHE_TTL = os.environ.get("WEB_LOADER_CACHE_TTL", "600")
+
+try:
+    WEB_LOADER_CACHE_TTL = int(WEB_LOADER_CACHE_TTL)
+except Exception:
+    WEB_LOADER_CACHE_TTL = 600
+
+WEB_LOADER_CACHE_MAX_PAGES = os.environ.get("WEB_LOADER_CACHE_MAX_PAGES", "256")
+
+try:
+    WEB_LOADER_CACHE_MAX_PAGES = int(WEB_LOADER_CACHE_MAX_PAGES)
+except Exception:
+    WEB_LOADER_CACHE_MAX_PAGES = 256
+
 
 SEARXNG_QUERY_URL = PersistentConfig(
     "SEARXNG_QUERY_URL",
@@ -2919,6 +3001,24 @@ WHISPER_VAD_FILTER = PersistentConfig(
 
 WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "").lower() or None
 
+# Audio segments transcribed concurrently, also used as the number of
+# parallel workers of the local Whisper model
+AUDIO_STT_WORKERS = os.environ.get("AUDIO_STT_WORKERS", "4")
+
+try:
+    AUDIO_STT_WORKERS = max(1, int(AUDIO_STT_WORKERS))
+except Exception:
+    AUDIO_STT_WORKERS = 4
+
+# Long recordings are split into segments of about this many seconds so the
+# local Whisper model can transcribe them in parallel (0 disables splitting)
+AUDIO_STT_SEGMENT_DURATION = os.environ.get("AUDIO_STT_SEGMENT_DURATION", "120")
+
+try:
+    AUDIO_STT_SEGMENT_DURATION = int(AUDIO_STT_SEGMENT_DURATION)
+except Exception:
+    AUDIO_STT_SEGMENT_DURATION = 120
+
 # Add Deepgram configuration
 DEEPGRAM_API_KEY = PersistentConfig(
     "DEEPGRAM_API_KEY",
@@ -3043,6 +3143,15 @@ AUDIO_TTS_AZURE_SPEECH_OUTPUT_FORMAT = PersistentConfig(
     ),
 )
 
+# Total size of synthesized speech kept in the cache, least recently used
+# files are evicted beyond it (0 disables the limit)
+AUDIO_TTS_CACHE_MAX_SIZE_MB = os.environ.get("AUDIO_TTS_CACHE_MAX_SIZE_MB", "1024")
+
+try:
+    AUDIO_TTS_CACHE_MAX_SIZE_MB = int(AUDIO_TTS_CACHE_MAX_SIZE_MB)
+except Exception:
+    AUDIO_TTS_CACHE_MAX_SIZE_MB = 1024
+
 
 ####################################
 # LDAP
@@ -72,6 +72,8 @@ class ERROR_MESSAGES(str, Enum):
         lambda err="": f"Invalid format. Please use the correct format{err}"
     )
     RATE_LIMIT_EXCEEDED = "API rate limit exceeded"
+    ARCHIVE_TOO_LARGE = lambda limit="": f"The archive exceeds the limit of {limit}."
+    FILE_PROCESSING_QUEUE_FULL = "Too many files are being processed. Please wait for them to finish and try again."
 
     MODEL_NOT_FOUND = lambda name="": f"Model '{name}' was not found"
     OPENAI_NOT_FOUND = lambda name="": "OpenAI API was not found"
@@ -117,4 +119,5 @@ class TASKS(str, Enum):
     IMAGE_PROMPT_GENERATION = "image_prompt_generation"
     AUTOCOMPLETE_GENERATION = "autocomplete_generation"
     FUNCTION_CALLING = "function_calling"
+    PLAN_GENERATION = "plan_generation"
     MOA_RESPONSE_GENERATION = "moa_response_generation"
@@ -311,6 +311,11 @@ else:
     except Exception:
         DATABASE_POOL_RECYCLE = 3600
 
+# Use an async driver (aiosqlite/asyncpg/aiomysql) for the hot-path table methods
+ENABLE_ASYNC_DATABASE = (
+    os.environ.get("ENABLE_ASYNC_DATABASE", "True").lower() == "true"
+)
+
 RESET_CONFIG_ON_START = (
     os.environ.get("RESET_CONFIG_ON_START", "False").lower() == "true"
 )
@@ -408,6 +413,25 @@ WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+# Interval in milliseconds over which consecutive streaming deltas of a message
+# are merged into a single "chat-events" frame. Set to 0 to emit every delta.
+WEBSOCKET_EVENT_BATCH_INTERVAL = os.environ.get("WEBSOCKET_EVENT_BATCH_INTERVAL", "40")
+
+try:
+    WEBSOCKET_EVENT_BATCH_INTERVAL = int(WEBSOCKET_EVENT_BATCH_INTERVAL)
+except Exception:
+    WEBSOCKET_EVENT_BATCH_INTERVAL = 40
+
+# Upper bound the batch interval may grow to while emits to a client are slow
+WEBSOCKET_EVENT_BATCH_MAX_INTERVAL = os.environ.get(
+    "WEBSOCKET_EVENT_BATCH_MAX_INTERVAL", "500"
+)
+
+try:
+    WEBSOCKET_EVENT_BATCH_MAX_INTERVAL = int(WEBSOCKET_EVENT_BATCH_MAX_INTERVAL)
+except Exception:
+    WEBSOCKET_EVENT_BATCH_MAX_INTERVAL = 500
+
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
 if AIOHTTP_CLIENT_TIMEOUT == "":
@@ -456,6 +480,250 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL", "True").lower() == "true"
 )
 
+# Seconds a fetched tool server spec is used before it's revalidated, in the
+# background, with its ETag. 0 revalidates it on every use.
+TOOL_SERVER_SPEC_CACHE_TTL = os.environ.get("TOOL_SERVER_SPEC_CACHE_TTL", "300")
+
+try:
+    TOOL_SERVER_SPEC_CACHE_TTL = int(TOOL_SERVER_SPEC_CACHE_TTL)
+except Exception:
+    TOOL_SERVER_SPEC_CACHE_TTL = 300
+
+# Connections open at once to tool servers, shared by all of them (0 for no limit)
+TOOL_SERVER_CONNECTION_LIMIT = os.environ.get("TOOL_SERVER_CONNECTION_LIMIT", "0")
+
+try:
+    TOOL_SERVER_CONNECTION_LIMIT = int(TOOL_SERVER_CONNECTION_LIMIT)
+except Exception:
+    TOOL_SERVER_CONNECTION_LIMIT = 0
+
+# Seconds a single tool call may take before its result is a timeout error.
+# Empty or 0 disables the timeout.
+TOOL_CALL_TIMEOUT = os.environ.get("TOOL_CALL_TIMEOUT", "120")
+
+if TOOL_CALL_TIMEOUT == "":
+    TOOL_CALL_TIMEOUT = None
+else:
+    try:
+        TOOL_CALL_TIMEOUT = int(TOOL_CALL_TIMEOUT) or None
+    except Exception:
+        TOOL_CALL_TIMEOUT = 120
+
+# Tool calls of one model response that are executed at once
+TOOL_CALLS_MAX_CONCURRENCY = os.environ.get("TOOL_CALLS_MAX_CONCURRENCY", "8")
+
+try:
+    TOOL_CALLS_MAX_CONCURRENCY = max(int(TOOL_CALLS_MAX_CONCURRENCY), 1)
+except Exception:
+    TOOL_CALLS_MAX_CONCURRENCY = 8
+
+# Seconds the Arcade tool catalog is used before it's listed again
+ARCADE_TOOLS_CACHE_TTL = os.environ.get("ARCADE_TOOLS_CACHE_TTL", "3600")
+
+try:
+    ARCADE_TOOLS_CACHE_TTL = int(ARCADE_TOOLS_CACHE_TTL)
+except Exception:
+    ARCADE_TOOLS_CACHE_TTL = 3600
+
+# Seconds a user's Arcade authorization status is kept once completed, and
+# while it's not, as the user may complete it at any time
+ARCADE_AUTH_CACHE_TTL = os.environ.get("ARCADE_AUTH_CACHE_TTL", "600")
+
+try:
+    ARCADE_AUTH_CACHE_TTL = int(ARCADE_AUTH_CACHE_TTL)
+except Exception:
+    ARCADE_AUTH_CACHE_TTL = 600
+
+ARCADE_AUTH_PENDING_CACHE_TTL = os.environ.get("ARCADE_AUTH_PENDING_CACHE_TTL", "10")
+
+try:
+    ARCADE_AUTH_PENDING_CACHE_TTL = int(ARCADE_AUTH_PENDING_CACHE_TTL)
+except Exception:
+    ARCADE_AUTH_PENDING_CACHE_TTL = 10
+
+# How requests for a model served by several Upstage connections are spread
+# over them: "least_in_flight" or "round_robin"
+UPSTAGE_LOAD_BALANCING_STRATEGY = os.environ.get(
+    "UPSTAGE_LOAD_BALANCING_STRATEGY", "least_in_flight"
+).lower()
+
+# Seconds a rate limited or failing Upstage connection is skipped, unless a
+# Retry-After says otherwise. Doubled, up to the max, while it keeps failing
+UPSTAGE_CONNECTION_COOLDOWN = os.environ.get("UPSTAGE_CONNECTION_COOLDOWN", "30")
+
+try:
+    UPSTAGE_CONNECTION_COOLDOWN = int(UPSTAGE_CONNECTION_COOLDOWN)
+except Exception:
+    UPSTAGE_CONNECTION_COOLDOWN = 30
+
+UPSTAGE_CONNECTION_MAX_COOLDOWN = os.environ.get(
+    "UPSTAGE_CONNECTION_MAX_COOLDOWN", "600"
+)
+
+try:
+    UPSTAGE_CONNECTION_MAX_COOLDOWN = int(UPSTAGE_CONNECTION_MAX_COOLDOWN)
+except Exception:
+    UPSTAGE_CONNECTION_MAX_COOLDOWN = 600
+
+# Consecutive server errors after which an Upstage connection is put on cool-down
+UPSTAGE_CONNECTION_FAILURE_THRESHOLD = os.environ.get(
+    "UPSTAGE_CONNECTION_FAILURE_THRESHOLD", "3"
+)
+
+try:
+    UPSTAGE_CONNECTION_FAILURE_THRESHOLD = max(
+        int(UPSTAGE_CONNECTION_FAILURE_THRESHOLD), 1
+    )
+except Exception:
+    UPSTAGE_CONNECTION_FAILURE_THRESHOLD = 3
+
+# Seconds between health checks of the Upstage connections on cool-down after
+# server errors, which end the cool-down once they pass (0 disables them)
+UPSTAGE_HEALTH_CHECK_INTERVAL = os.environ.get("UPSTAGE_HEALTH_CHECK_INTERVAL", "30")
+
+try:
+    UPSTAGE_HEALTH_CHECK_INTERVAL = int(UPSTAGE_HEALTH_CHECK_INTERVAL)
+except Exception:
+    UPSTAGE_HEALTH_CHECK_INTERVAL = 30
+
+# HTTP connections each worker opens at once to Upstage (0 for no limit)
+UPSTAGE_CONNECTION_LIMIT = os.environ.get("UPSTAGE_CONNECTION_LIMIT", "0")
+
+try:
+    UPSTAGE_CONNECTION_LIMIT = int(UPSTAGE_CONNECTION_LIMIT)
+except Exception:
+    UPSTAGE_CONNECTION_LIMIT = 0
+
+# Seconds a chat completion may wait in queue for the requests/tokens per minute
+# budgets of its connection and user group, before it's rejected with a 429
+RATE_LIMIT_MAX_WAIT = os.environ.get("RATE_LIMIT_MAX_WAIT", "30")
+
+try:
+    RATE_LIMIT_MAX_WAIT = float(RATE_LIMIT_MAX_WAIT)
+except Exception:
+    RATE_LIMIT_MAX_WAIT = 30.0
+
+# Tokens of a model's context window, the prompt plus the completion, when its
+# meta has no "context_window". Older turns of a chat are trimmed to fit it
+# (0 disables trimming)
+CHAT_CONTEXT_WINDOW = os.environ.get("CHAT_CONTEXT_WINDOW", "0")
+
+try:
+    CHAT_CONTEXT_WINDOW = int(CHAT_CONTEXT_WINDOW)
+except Exception:
+    CHAT_CONTEXT_WINDOW = 0
+
+# Share of the context window trimmed at once, so the kept messages, and the
+# prompt prefix cached by the provider, stay the same for the next turns
+CHAT_CONTEXT_TRIM_STEP = os.environ.get("CHAT_CONTEXT_TRIM_STEP", "0.25")
+
+try:
+    CHAT_CONTEXT_TRIM_STEP = min(max(float(CHAT_CONTEXT_TRIM_STEP), 0.0), 1.0)
+except Exception:
+    CHAT_CONTEXT_TRIM_STEP = 0.25
+
+# Message token counts kept in memory, so each message is only tokenized once
+CHAT_CONTEXT_TOKEN_CACHE_SIZE = os.environ.get("CHAT_CONTEXT_TOKEN_CACHE_SIZE", "10000")
+
+try:
+    CHAT_CONTEXT_TOKEN_CACHE_SIZE = int(CHAT_CONTEXT_TOKEN_CACHE_SIZE)
+except Exception:
+    CHAT_CONTEXT_TOKEN_CACHE_SIZE = 10000
+
+
+####################################
+# FILE PROCESSING
+####################################
+
+# Process uploads in the background instead of before the upload returns.
+# Clients then have to wait for the file status to be "completed"
+ENABLE_BACKGROUND_FILE_PROCESSING = (
+    os.environ.get("ENABLE_BACKGROUND_FILE_PROCESSING", "False").lower() == "true"
+)
+
+# Number of uploaded files processed concurrently in the background
+FILE_PROCESSING_WORKERS = os.environ.get("FILE_PROCESSING_WORKERS", "4")
+
+try:
+    FILE_PROCESSING_WORKERS = int(FILE_PROCESSING_WORKERS)
+except Exception:
+    FILE_PROCESSING_WORKERS = 4
+
+# Uploads admitted for processing at once (queued or running), in total and per user
+FILE_PROCESSING_MAX_QUEUE_SIZE = os.environ.get("FILE_PROCESSING_MAX_QUEUE_SIZE", "200")
+
+try:
+    FILE_PROCESSING_MAX_QUEUE_SIZE = int(FILE_PROCESSING_MAX_QUEUE_SIZE)
+except Exception:
+    FILE_PROCESSING_MAX_QUEUE_SIZE = 200
+
+FILE_PROCESSING_MAX_QUEUE_SIZE_PER_USER = os.environ.get(
+    "FILE_PROCESSING_MAX_QUEUE_SIZE_PER_USER", "20"
+)
+
+try:
+    FILE_PROCESSING_MAX_QUEUE_SIZE_PER_USER = int(
+        FILE_PROCESSING_MAX_QUEUE_SIZE_PER_USER
+    )
+except Exception:
+    FILE_PROCESSING_MAX_QUEUE_SIZE_PER_USER = 20
+
+
+# Files parsed, chunked and embedded concurrently by knowledge ingestion jobs
+KNOWLEDGE_INGEST_WORKERS = os.environ.get("KNOWLEDGE_INGEST_WORKERS", "8")
+
+try:
+    KNOWLEDGE_INGEST_WORKERS = int(KNOWLEDGE_INGEST_WORKERS)
+except Exception:
+    KNOWLEDGE_INGEST_WORKERS = 8
+
+# Chunks embedded per call, shared between the files of an ingestion job
+KNOWLEDGE_INGEST_EMBEDDING_BATCH_SIZE = os.environ.get(
+    "KNOWLEDGE_INGEST_EMBEDDING_BATCH_SIZE", "256"
+)
+
+try:
+    KNOWLEDGE_INGEST_EMBEDDING_BATCH_SIZE = int(KNOWLEDGE_INGEST_EMBEDDING_BATCH_SIZE)
+except Exception:
+    KNOWLEDGE_INGEST_EMBEDDING_BATCH_SIZE = 256
+
+# Chunks written to the vector database per insert
+KNOWLEDGE_INGEST_INSERT_BATCH_SIZE = os.environ.get(
+    "KNOWLEDGE_INGEST_INSERT_BATCH_SIZE", "1000"
+)
+
+try:
+    KNOWLEDGE_INGEST_INSERT_BATCH_SIZE = int(KNOWLEDGE_INGEST_INSERT_BATCH_SIZE)
+except Exception:
+    KNOWLEDGE_INGEST_INSERT_BATCH_SIZE = 1000
+
+# Files and total uncompressed size of a zip archive ingested into knowledge
+KNOWLEDGE_ARCHIVE_MAX_FILES = os.environ.get("KNOWLEDGE_ARCHIVE_MAX_FILES", "1000")
+
+try:
+    KNOWLEDGE_ARCHIVE_MAX_FILES = int(KNOWLEDGE_ARCHIVE_MAX_FILES)
+except Exception:
+    KNOWLEDGE_ARCHIVE_MAX_FILES = 1000
+
+KNOWLEDGE_ARCHIVE_MAX_SIZE_MB = os.environ.get("KNOWLEDGE_ARCHIVE_MAX_SIZE_MB", "1024")
+
+try:
+    KNOWLEDGE_ARCHIVE_MAX_SIZE_MB = int(KNOWLEDGE_ARCHIVE_MAX_SIZE_MB)
+except Exception:
+    KNOWLEDGE_ARCHIVE_MAX_SIZE_MB = 1024
+
+# Files started per second by knowledge reindex jobs (0 disables the limit)
+KNOWLEDGE_REINDEX_MAX_FILES_PER_SECOND = os.environ.get(
+    "KNOWLEDGE_REINDEX_MAX_FILES_PER_SECOND", "10"
+)
+
+try:
+    KNOWLEDGE_REINDEX_MAX_FILES_PER_SECOND = float(
+        KNOWLEDGE_REINDEX_MAX_FILES_PER_SECOND
+    )
+except Exception:
+    KNOWLEDGE_REINDEX_MAX_FILES_PER_SECOND = 10.0
+
 
 ####################################
 # SENTENCE TRANSFORMERS
@@ -501,6 +769,26 @@ else:
     except Exception:
         SENTENCE_TRANSFORMERS_CROSS_ENCODER_MODEL_KWARGS = None
 
+####################################
+# LOCAL MODELS
+####################################
+
+# Local models loaded in the background at startup, out of
+# "embedding", "reranking", "whisper" and "tts"
+LOCAL_MODELS_PRELOAD = [
+    name.strip()
+    for name in os.environ.get("LOCAL_MODELS_PRELOAD", "embedding,reranking").split(",")
+    if name.strip()
+]
+
+# Seconds a local model may stay unused before it is unloaded (0 keeps models loaded)
+LOCAL_MODELS_IDLE_TIMEOUT = os.environ.get("LOCAL_MODELS_IDLE_TIMEOUT", "0")
+
+try:
+    LOCAL_MODELS_IDLE_TIMEOUT = int(LOCAL_MODELS_IDLE_TIMEOUT)
+except Exception:
+    LOCAL_MODELS_IDLE_TIMEOUT = 0
+
 ####################################
 # OFFLINE_MODE
 ####################################
@@ -556,6 +844,15 @@ OTEL_TRACES_SAMPLER = os.environ.get(
 PIP_OPTIONS = os.getenv("PIP_OPTIONS", "").split()
 PIP_PACKAGE_INDEX_OPTIONS = os.getenv("PIP_PACKAGE_INDEX_OPTIONS", "").split()
 
+# Seconds a loaded function module is used before its database row is checked
+# for an update again
+PLUGIN_VERSION_CHECK_INTERVAL = os.environ.get("PLUGIN_VERSION_CHECK_INTERVAL", "5")
+
+try:
+    PLUGIN_VERSION_CHECK_INTERVAL = float(PLUGIN_VERSION_CHECK_INTERVAL)
+except ValueError:
+    PLUGIN_VERSION_CHECK_INTERVAL = 5.0
+
 
 ####################################
 # PROGRESSIVE WEB APP OPTIONS
@@ -1,7 +1,10 @@
+import asyncio
+import functools
 import json
 import logging
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode
 
 from open_webui.internal.wrappers import register_connection
 from open_webui.env import (
@@ -13,9 +16,11 @@ from open_webui.env import (
     DATABASE_POOL_RECYCLE,
     DATABASE_POOL_SIZE,
     DATABASE_POOL_TIMEOUT,
+    ENABLE_ASYNC_DATABASE,
 )
 from peewee_migrate import Router
 from sqlalchemy import Dialect, create_engine, MetaData, types
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.pool import QueuePool, NullPool
@@ -114,3 +119,116 @@ def get_session():
 
 
 get_db = contextmanager(get_session)
+
+
+####################
+# Async engine
+####################
+
+# Async drivers used for the synchronous DATABASE_URL dialects
+ASYNC_DATABASE_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+# libpq query parameters asyncpg takes under another name, and the ones it takes
+# as is; asyncpg.connect refuses any other keyword
+ASYNCPG_QUERY_PARAMS = {"sslmode": "ssl"}
+ASYNCPG_CONNECT_ARGS = {"ssl", "target_session_attrs", "prepared_statement_cache_size"}
+
+
+def get_asyncpg_query(query: str) -> str:
+    params = []
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        key = ASYNCPG_QUERY_PARAMS.get(key, key)
+        if key in ASYNCPG_CONNECT_ARGS:
+            params.append((key, value))
+        else:
+            log.warning(f"Ignoring database URL parameter {key} for the async engine")
+    return urlencode(params)
+
+
+def get_async_database_url(database_url: str) -> Optional[str]:
+    scheme, separator, rest = database_url.partition("://")
+    if not separator:
+        return None
+
+    driver = ASYNC_DATABASE_DRIVERS.get(scheme.split("+")[0])
+    if driver is None:
+        return None
+
+    rest, separator, query = rest.partition("?")
+    if separator and driver == "postgresql+asyncpg":
+        query = get_asyncpg_query(query)
+    return f"{driver}://{rest}?{query}" if query else f"{driver}://{rest}"
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if ENABLE_ASYNC_DATABASE:
+    ASYNC_SQLALCHEMY_DATABASE_URL = get_async_database_url(SQLALCHEMY_DATABASE_URL)
+
+    try:
+        if ASYNC_SQLALCHEMY_DATABASE_URL is None:
+            raise ValueError("No async driver for the configured database")
+
+        if "sqlite" in ASYNC_SQLALCHEMY_DATABASE_URL:
+            async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+        elif DATABASE_POOL_SIZE > 0:
+            async_engine = create_async_engine(
+                ASYNC_SQLALCHEMY_DATABASE_URL,
+                pool_size=DATABASE_POOL_SIZE,
+                max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+                pool_timeout=DATABASE_POOL_TIMEOUT,
+                pool_recycle=DATABASE_POOL_RECYCLE,
+                pool_pre_ping=True,
+            )
+        else:
+            async_engine = create_async_engine(
+                ASYNC_SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, poolclass=NullPool
+            )
+
+        AsyncSessionLocal = async_sessionmaker(
+            bind=async_engine, autoflush=False, expire_on_commit=False
+        )
+    except (ImportError, ValueError) as e:
+        log.warning(
+            f"Async database access unavailable, falling back to the sync engine: {e}"
+        )
+
+
+@asynccontextmanager
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def async_db_fallback(sync_method_name: str):
+    """
+    Decorates an async table method. When no async engine is configured, or the
+    async driver fails to connect or query, the synchronous `sync_method_name`
+    of the same table is run in a worker thread instead, so the event loop is
+    never blocked on database I/O.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if AsyncSessionLocal is not None:
+                try:
+                    return await func(self, *args, **kwargs)
+                except Exception as e:
+                    log.warning(
+                        f"Async database call {func.__qualname__} failed, falling back to the sync engine: {e}"
+                    )
+
+            return await asyncio.to_thread(
+                getattr(self, sync_method_name), *args, **kwargs
+            )
+
+        return wrapper
+
+    return decorator
@@ -51,8 +51,14 @@ from starlette.responses import Response, StreamingResponse
 from open_webui.utils import logger
 from open_webui.utils.audit import AuditLevel, AuditLoggingMiddleware
 from open_webui.utils.logger import start_logger
+from open_webui.utils.model_manager import MODEL_MANAGER
+from open_webui.retrieval.web.fetch import WEB_FETCH_ENGINE
+from open_webui.arcade_tools import ARCADE_TOOL_CATALOG, get_arcade_client
+from open_webui.utils.tools import TOOL_SERVER_SESSIONS, periodic_tool_servers_refresh
+from open_webui.utils.upstage_connections import UPSTAGE_CONNECTION_POOL
 from open_webui.socket.main import (
     app as socket_app,
+    periodic_room_user_pool_refresh,
     periodic_usage_pool_cleanup,
 )
 from open_webui.routers import (
@@ -85,8 +91,8 @@ from open_webui.routers import (
 
 from open_webui.routers.retrieval import (
     get_embedding_function,
-    get_ef,
-    get_rf,
+    load_embedding_model,
+    load_reranking_model,
 )
 
 from open_webui.internal.db import Session, engine
@@ -376,6 +382,7 @@ from open_webui.config import (
     ENABLE_TITLE_GENERATION,
     ENABLE_SEARCH_QUERY_GENERATION,
     ENABLE_RETRIEVAL_QUERY_GENERATION,
+    ENABLE_PLAN_GENERATION,
     ENABLE_AUTOCOMPLETE_GENERATION,
     TITLE_GENERATION_PROMPT_TEMPLATE,
     TAGS_GENERATION_PROMPT_TEMPLATE,
@@ -413,6 +420,7 @@ from open_webui.env import (
     ENABLE_OTEL,
     EXTERNAL_PWA_MANIFEST_URL,
     AIOHTTP_CLIENT_SESSION_SSL,
+    LOCAL_MODELS_PRELOAD,
 )
 
 
@@ -509,9 +517,31 @@ async def lifespan(app: FastAPI):
         limiter.total_tokens = THREAD_POOL_SIZE
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(periodic_room_user_pool_refresh())
+    asyncio.create_task(MODEL_MANAGER.periodic_idle_eviction())
+    asyncio.create_task(periodic_tool_servers_refresh(app))
+    asyncio.create_task(
+        ARCADE_TOOL_CATALOG.periodic_refresh(
+            lambda: get_arcade_client(app.state.config.ARCADE_API_KEY)
+        )
+    )
+    asyncio.create_task(
+        UPSTAGE_CONNECTION_POOL.periodic_health_check(
+            lambda: list(
+                zip(
+                    app.state.config.UPSTAGE_API_BASE_URLS,
+                    app.state.config.UPSTAGE_API_KEYS,
+                )
+            )
+        )
+    )
 
     yield
 
+    await WEB_FETCH_ENGINE.close()
+    await TOOL_SERVER_SESSIONS.close()
+    await UPSTAGE_CONNECTION_POOL.close()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -578,32 +608,23 @@ app.state.OPENAI_MODELS = {}
 
 app.state.config.ARCADE_API_KEY = ARCADE_API_KEY
 app.state.config.ARCADE_TOOLS_CONFIG = ARCADE_TOOLS_CONFIG
-app.state.ARCADE_TOOLS = []
 app.state.ARCADE_TOOLS_TO_DISPLAY = ARCADE_TOOLS_TO_DISPLAY
 
 
 try:
-    from arcadepy import Arcade
-    client = Arcade(api_key=app.state.config.ARCADE_API_KEY)
-    app.state.ARCADE_TOOLS = [tool for tool in client.tools.list()]
+    ARCADE_TOOL_CATALOG.load(get_arcade_client(app.state.config.ARCADE_API_KEY))
 except Exception as e:
     log.error(f"Error getting Arcade tools: {e}")
     pass
 
-# print(app.state.ARCADE_TOOLS)
 if app.state.config.ARCADE_TOOLS_CONFIG == []:
 
-
-    arcade_tool_mapper = {}
-    for tool in app.state.ARCADE_TOOLS:
-        arcade_tool_mapper[tool.qualified_name] = tool
-        
     for toolset in app.state.ARCADE_TOOLS_TO_DISPLAY.keys():
         arcade_tools = []
         for tool in app.state.ARCADE_TOOLS_TO_DISPLAY[toolset]:
                 arcade_tools.append({
                     "name": tool,
-                    "description": arcade_tool_mapper[tool].description,
+                    "description": ARCADE_TOOL_CATALOG.get_tool(tool).description,
                 "enabled": True,
             })
         app.state.config.ARCADE_TOOLS_CONFIG.append({
@@ -725,10 +746,10 @@ app.state.EXTERNAL_PWA_MANIFEST_URL = EXTERNAL_PWA_MANIFEST_URL
 app.state.USER_COUNT = None
 
 app.state.TOOLS = {}
-app.state.TOOL_CONTENTS = {}
+app.state.TOOL_VERSIONS = {}
 
 app.state.FUNCTIONS = {}
-app.state.FUNCTION_CONTENTS = {}
+app.state.FUNCTION_VERSIONS = {}
 
 ########################################
 #
@@ -870,23 +891,18 @@ app.state.rf = None
 app.state.YOUTUBE_LOADER_TRANSLATION = None
 
 
-try:
-    app.state.ef = get_ef(
-        app.state.config.RAG_EMBEDDING_ENGINE,
-        app.state.config.RAG_EMBEDDING_MODEL,
-        RAG_EMBEDDING_MODEL_AUTO_UPDATE,
-    )
-
-    app.state.rf = get_rf(
-        app.state.config.RAG_RERANKING_ENGINE,
-        app.state.config.RAG_RERANKING_MODEL,
-        app.state.config.RAG_EXTERNAL_RERANKER_URL,
-        app.state.config.RAG_EXTERNAL_RERANKER_API_KEY,
-        RAG_RERANKING_MODEL_AUTO_UPDATE,
-    )
-except Exception as e:
-    log.error(f"Error updating models: {e}")
-    pass
+# Loaded in the background, requests needing a model wait until it is ready.
+# Models left out of LOCAL_MODELS_PRELOAD are only loaded on their first use
+load_embedding_model(
+    app,
+    RAG_EMBEDDING_MODEL_AUTO_UPDATE,
+    preload="embedding" in LOCAL_MODELS_PRELOAD,
+)
+load_reranking_model(
+    app,
+    RAG_RERANKING_MODEL_AUTO_UPDATE,
+    preload="reranking" in LOCAL_MODELS_PRELOAD,
+)
 
 
 app.state.EMBEDDING_FUNCTION = get_embedding_function(
@@ -1014,7 +1030,12 @@ app.state.config.TTS_AZURE_SPEECH_OUTPUT_FORMAT = AUDIO_TTS_AZURE_SPEECH_OUTPUT_
 
 app.state.faster_whisper_model = None
 app.state.speech_synthesiser = None
-app.state.speech_speaker_embeddings_dataset = None
+
+if "whisper" in LOCAL_MODELS_PRELOAD:
+    audio.load_faster_whisper_model(app, WHISPER_MODEL_AUTO_UPDATE)
+
+if "tts" in LOCAL_MODELS_PRELOAD:
+    audio.load_speech_pipeline(app)
 
 
 ########################################
@@ -1030,6 +1051,7 @@ app.state.config.TASK_MODEL_EXTERNAL = TASK_MODEL_EXTERNAL
 
 app.state.config.ENABLE_SEARCH_QUERY_GENERATION = ENABLE_SEARCH_QUERY_GENERATION
 app.state.config.ENABLE_RETRIEVAL_QUERY_GENERATION = ENABLE_RETRIEVAL_QUERY_GENERATION
+app.state.config.ENABLE_PLAN_GENERATION = ENABLE_PLAN_GENERATION
 app.state.config.ENABLE_AUTOCOMPLETE_GENERATION = ENABLE_AUTOCOMPLETE_GENERATION
 app.state.config.ENABLE_TAGS_GENERATION = ENABLE_TAGS_GENERATION
 app.state.config.ENABLE_TITLE_GENERATION = ENABLE_TITLE_GENERATION
@@ -1343,7 +1365,7 @@ async def chat_completion(
         log.debug(f"Error processing chat payload: {e}")
         if metadata.get("chat_id") and metadata.get("message_id"):
             # Update the chat message with the error
-            Chats.upsert_message_to_chat_by_id_and_message_id(
+            await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                 metadata["chat_id"],
                 metadata["message_id"],
                 {
@@ -1428,7 +1450,7 @@ async def list_tasks_endpoint(user=Depends(get_verified_user)):
 
 @app.get("/api/tasks/chat/{chat_id}")
 async def list_tasks_by_chat_id_endpoint(chat_id: str, user=Depends(get_verified_user)):
-    chat = Chats.get_chat_by_id(chat_id)
+    chat = await Chats.get_chat_by_id_async(chat_id)
     if chat is None or chat.user_id != user.id:
         return {"task_ids": []}
 
@@ -1459,7 +1481,7 @@ async def get_app_config(request: Request):
                 detail="Invalid token",
             )
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = await Users.get_user_by_id_async(data["id"])
 
     user_count = Users.get_num_users()
     onboarding = False
@@ -1704,6 +1726,16 @@ async def healthcheck_with_db():
     return {"status": True}
 
 
+@app.get("/health/models")
+async def healthcheck_with_models():
+    """Readiness of the local models, 503 while any of them is still loading."""
+    ready = MODEL_MANAGER.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": ready, "models": MODEL_MANAGER.get_status()},
+    )
+
+
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 app.mount("/cache", StaticFiles(directory=CACHE_DIR), name="cache")
 
@@ -0,0 +1,34 @@
+"""Add chat listing indexes
+
+Revision ID: b3d2f1c7a9e4
+Revises: 9f0c9cd09105
+Create Date: 2025-06-02 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "b3d2f1c7a9e4"
+down_revision = "9f0c9cd09105"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Composite index backing the sidebar/listing queries and keyset pagination
+    op.create_index(
+        "chat_user_id_archived_pinned_updated_at_idx",
+        "chat",
+        ["user_id", "archived", "pinned", "updated_at"],
+    )
+    op.create_index(
+        "chat_folder_id_user_id_idx",
+        "chat",
+        ["folder_id", "user_id"],
+    )
+
+
+def downgrade():
+    op.drop_index("chat_folder_id_user_id_idx", table_name="chat")
+    op.drop_index("chat_user_id_archived_pinned_updated_at_idx", table_name="chat")
@@ -0,0 +1,26 @@
+"""Add file content hash
+
+Revision ID: d4e8a1b2c3f5
+Revises: b3d2f1c7a9e4
+Create Date: 2025-06-04 02:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d4e8a1b2c3f5"
+down_revision = "b3d2f1c7a9e4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SHA-256 of the raw file contents, used to deduplicate stored blobs
+    op.add_column("file", sa.Column("sha256", sa.String(), nullable=True))
+    op.create_index("file_sha256_idx", "file", ["sha256"])
+
+
+def downgrade():
+    op.drop_index("file_sha256_idx", table_name="file")
+    op.drop_column("file", "sha256")
@@ -0,0 +1,33 @@
+"""Add job table
+
+Revision ID: e1a7c3d9f2b6
+Revises: d4e8a1b2c3f5
+Create Date: 2025-06-05 03:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "e1a7c3d9f2b6"
+down_revision = "d4e8a1b2c3f5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "job",
+        sa.Column("id", sa.Text(), nullable=False, primary_key=True, unique=True),
+        sa.Column("user_id", sa.Text(), nullable=True),
+        sa.Column("type", sa.Text(), nullable=True),
+        sa.Column("status", sa.Text(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("meta", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("job")
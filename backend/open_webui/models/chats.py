@@ -4,12 +4,12 @@ import time
 import uuid
 from typing import Optional
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, async_db_fallback, get_async_db, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON, Index
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 
@@ -39,6 +39,19 @@ class Chat(Base):
     meta = Column(JSON, server_default="{}")
     folder_id = Column(Text, nullable=True)
 
+    __table_args__ = (
+        # Covers the sidebar/listing queries, which filter by owner, archive and
+        # pin state and are ordered by recency.
+        Index(
+            "chat_user_id_archived_pinned_updated_at_idx",
+            "user_id",
+            "archived",
+            "pinned",
+            "updated_at",
+        ),
+        Index("chat_folder_id_user_id_idx", "folder_id", "user_id"),
+    )
+
 
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -104,6 +117,66 @@ class ChatTitleIdResponse(BaseModel):
     created_at: int
 
 
+class ChatListItemModel(BaseModel):
+    """Lightweight projection of a chat row that never carries the `chat` JSON."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    title: str
+    updated_at: int
+    created_at: int
+
+    archived: bool = False
+    pinned: Optional[bool] = False
+    folder_id: Optional[str] = None
+
+
+# Columns loaded for list views; the (potentially huge) `chat` column is excluded.
+CHAT_LIST_COLUMNS = (
+    Chat.id,
+    Chat.title,
+    Chat.updated_at,
+    Chat.created_at,
+    Chat.archived,
+    Chat.pinned,
+    Chat.folder_id,
+)
+
+
+def encode_chat_cursor(updated_at: int, id: str) -> str:
+    return f"{updated_at}:{id}"
+
+
+def decode_chat_cursor(cursor: str) -> tuple[int, str]:
+    """
+    Decodes a keyset pagination cursor of the form `<updated_at>:<id>`, i.e. the
+    values of the last item of the previous page.
+    """
+    try:
+        updated_at, id = cursor.split(":", 1)
+        return int(updated_at), id
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def apply_chat_cursor(query, cursor: Optional[str]):
+    """
+    Applies keyset pagination ordered by (updated_at, id) descending. Unlike
+    offset pagination, the database can seek directly using the listing index.
+    """
+    query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+    if cursor:
+        updated_at, id = decode_chat_cursor(cursor)
+        query = query.filter(
+            or_(
+                Chat.updated_at < updated_at,
+                and_(Chat.updated_at == updated_at, Chat.id < id),
+            )
+        )
+    return query
+
+
 class ChatTable:
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
@@ -232,7 +305,12 @@ class ChatTable:
         if chat is None:
             return None
 
-        chat = chat.chat
+        return self.update_chat_by_id(
+            id, self._merge_message_into_chat(chat.chat, message_id, message)
+        )
+
+    @staticmethod
+    def _merge_message_into_chat(chat: dict, message_id: str, message: dict) -> dict:
         history = chat.get("history", {})
 
         if message_id in history.get("messages", {}):
@@ -246,7 +324,7 @@ class ChatTable:
         history["currentId"] = message_id
 
         chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return chat
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
@@ -255,7 +333,12 @@ class ChatTable:
         if chat is None:
             return None
 
-        chat = chat.chat
+        return self.update_chat_by_id(
+            id, self._add_status_to_chat_message(chat.chat, message_id, status)
+        )
+
+    @staticmethod
+    def _add_status_to_chat_message(chat: dict, message_id: str, status: dict) -> dict:
         history = chat.get("history", {})
 
         if message_id in history.get("messages", {}):
@@ -264,7 +347,7 @@ class ChatTable:
             history["messages"][message_id]["statusHistory"] = status_history
 
         chat["history"] = history
-        return self.update_chat_by_id(id, chat)
+        return chat
 
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
@@ -376,42 +459,56 @@ class ChatTable:
         except Exception:
             return False
 
+    def _apply_list_filter(
+        self, query, filter: Optional[dict], skip: int, cursor: Optional[str]
+    ):
+        order_by = None
+        direction = None
+
+        if filter:
+            query_key = filter.get("query")
+            if query_key:
+                query = query.filter(Chat.title.ilike(f"%{query_key}%"))
+
+            order_by = filter.get("order_by")
+            direction = filter.get("direction")
+
+        if order_by and direction and getattr(Chat, order_by):
+            if direction.lower() == "asc":
+                query = query.order_by(getattr(Chat, order_by).asc())
+            elif direction.lower() == "desc":
+                query = query.order_by(getattr(Chat, order_by).desc())
+            else:
+                raise ValueError("Invalid direction for ordering")
+            # Cursors follow the default order, custom orders are paged by offset
+            cursor = None
+        else:
+            query = apply_chat_cursor(query, cursor)
+
+        if skip and not cursor:
+            query = query.offset(skip)
+        return query
+
     def get_archived_chat_list_by_user_id(
         self,
         user_id: str,
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+        cursor: Optional[str] = None,
+    ) -> list[ChatListItemModel]:
 
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id, archived=True)
-
-            if filter:
-                query_key = filter.get("query")
-                if query_key:
-                    query = query.filter(Chat.title.ilike(f"%{query_key}%"))
-
-                order_by = filter.get("order_by")
-                direction = filter.get("direction")
-
-                if order_by and direction and getattr(Chat, order_by):
-                    if direction.lower() == "asc":
-                        query = query.order_by(getattr(Chat, order_by).asc())
-                    elif direction.lower() == "desc":
-                        query = query.order_by(getattr(Chat, order_by).desc())
-                    else:
-                        raise ValueError("Invalid direction for ordering")
-            else:
-                query = query.order_by(Chat.updated_at.desc())
-
-            if skip:
-                query = query.offset(skip)
+            query = (
+                db.query(Chat)
+                .filter_by(user_id=user_id, archived=True)
+                .with_entities(*CHAT_LIST_COLUMNS)
+            )
+            query = self._apply_list_filter(query, filter, skip, cursor)
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [ChatListItemModel.model_validate(chat) for chat in query.all()]
 
     def get_chat_list_by_user_id(
         self,
@@ -420,37 +517,22 @@ class ChatTable:
         filter: Optional[dict] = None,
         skip: int = 0,
         limit: int = 50,
-    ) -> list[ChatModel]:
+        cursor: Optional[str] = None,
+    ) -> list[ChatListItemModel]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
+            query = (
+                db.query(Chat)
+                .filter_by(user_id=user_id)
+                .with_entities(*CHAT_LIST_COLUMNS)
+            )
             if not include_archived:
                 query = query.filter_by(archived=False)
 
-            if filter:
-                query_key = filter.get("query")
-                if query_key:
-                    query = query.filter(Chat.title.ilike(f"%{query_key}%"))
-
-                order_by = filter.get("order_by")
-                direction = filter.get("direction")
-
-                if order_by and direction and getattr(Chat, order_by):
-                    if direction.lower() == "asc":
-                        query = query.order_by(getattr(Chat, order_by).asc())
-                    elif direction.lower() == "desc":
-                        query = query.order_by(getattr(Chat, order_by).desc())
-                    else:
-                        raise ValueError("Invalid direction for ordering")
-            else:
-                query = query.order_by(Chat.updated_at.desc())
-
-            if skip:
-                query = query.offset(skip)
+            query = self._apply_list_filter(query, filter, skip, cursor)
             if limit:
                 query = query.limit(limit)
 
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [ChatListItemModel.model_validate(chat) for chat in query.all()]
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -458,6 +540,7 @@ class ChatTable:
         include_archived: bool = False,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
             query = db.query(Chat).filter_by(user_id=user_id).filter_by(folder_id=None)
@@ -466,11 +549,11 @@ class ChatTable:
             if not include_archived:
                 query = query.filter_by(archived=False)
 
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
+            query = apply_chat_cursor(query, cursor).with_entities(
                 Chat.id, Chat.title, Chat.updated_at, Chat.created_at
             )
 
-            if skip:
+            if skip and not cursor:
                 query = query.offset(skip)
             if limit:
                 query = query.limit(limit)
@@ -576,7 +659,7 @@ class ChatTable:
         include_archived: bool = False,
         skip: int = 0,
         limit: int = 60,
-    ) -> list[ChatModel]:
+    ) -> list[ChatListItemModel]:
         """
         Filters chats based on a search query using Python, allowing pagination using skip and limit.
         """
@@ -603,7 +686,11 @@ class ChatTable:
         search_text = " ".join(search_text_words)
 
         with get_db() as db:
-            query = db.query(Chat).filter(Chat.user_id == user_id)
+            query = (
+                db.query(Chat)
+                .filter(Chat.user_id == user_id)
+                .with_entities(*CHAT_LIST_COLUMNS)
+            )
 
             if not include_archived:
                 query = query.filter(Chat.archived == False)
@@ -720,20 +807,24 @@ class ChatTable:
             log.info(f"The number of chats: {len(all_chats)}")
 
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [ChatListItemModel.model_validate(chat) for chat in all_chats]
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
-    ) -> list[ChatModel]:
+    ) -> list[ChatListItemModel]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(folder_id=folder_id, user_id=user_id)
+            query = (
+                db.query(Chat)
+                .filter_by(folder_id=folder_id, user_id=user_id)
+                .with_entities(*CHAT_LIST_COLUMNS)
+            )
             query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
             query = query.filter_by(archived=False)
 
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return [ChatListItemModel.model_validate(chat) for chat in all_chats]
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -951,5 +1042,81 @@ class ChatTable:
         except Exception:
             return False
 
+    ####################
+    # Async variants of the hot-path methods, used from the event loop
+    ####################
+
+    @async_db_fallback("get_chat_by_id")
+    async def get_chat_by_id_async(self, id: str) -> Optional[ChatModel]:
+        async with get_async_db() as db:
+            chat = await db.get(Chat, id)
+            return ChatModel.model_validate(chat) if chat else None
+
+    @async_db_fallback("get_chat_by_id_and_user_id")
+    async def get_chat_by_id_and_user_id_async(
+        self, id: str, user_id: str
+    ) -> Optional[ChatModel]:
+        async with get_async_db() as db:
+            result = await db.execute(select(Chat).filter_by(id=id, user_id=user_id))
+            chat = result.scalars().first()
+            return ChatModel.model_validate(chat) if chat else None
+
+    @async_db_fallback("update_chat_by_id")
+    async def update_chat_by_id_async(self, id: str, chat: dict) -> Optional[ChatModel]:
+        async with get_async_db() as db:
+            chat_item = await db.get(Chat, id)
+            if chat_item is None:
+                return None
+
+            chat_item.chat = chat
+            chat_item.title = chat["title"] if "title" in chat else "New Chat"
+            chat_item.updated_at = int(time.time())
+            await db.commit()
+            await db.refresh(chat_item)
+
+            return ChatModel.model_validate(chat_item)
+
+    @async_db_fallback("get_messages_by_chat_id")
+    async def get_messages_by_chat_id_async(self, id: str) -> Optional[dict]:
+        chat = await self.get_chat_by_id_async(id)
+        if chat is None:
+            return None
+
+        return chat.chat.get("history", {}).get("messages", {}) or {}
+
+    @async_db_fallback("get_message_by_id_and_message_id")
+    async def get_message_by_id_and_message_id_async(
+        self, id: str, message_id: str
+    ) -> Optional[dict]:
+        chat = await self.get_chat_by_id_async(id)
+        if chat is None:
+            return None
+
+        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+
+    @async_db_fallback("upsert_message_to_chat_by_id_and_message_id")
+    async def upsert_message_to_chat_by_id_and_message_id_async(
+        self, id: str, message_id: str, message: dict
+    ) -> Optional[ChatModel]:
+        chat = await self.get_chat_by_id_async(id)
+        if chat is None:
+            return None
+
+        return await self.update_chat_by_id_async(
+            id, self._merge_message_into_chat(chat.chat, message_id, message)
+        )
+
+    @async_db_fallback("add_message_status_to_chat_by_id_and_message_id")
+    async def add_message_status_to_chat_by_id_and_message_id_async(
+        self, id: str, message_id: str, status: dict
+    ) -> Optional[ChatModel]:
+        chat = await self.get_chat_by_id_async(id)
+        if chat is None:
+            return None
+
+        return await self.update_chat_by_id_async(
+            id, self._add_status_to_chat_message(chat.chat, message_id, status)
+        )
+
 
 Chats = ChatTable()
@@ -2,10 +2,16 @@ import logging
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import (
+    Base,
+    JSONField,
+    async_db_fallback,
+    get_async_db,
+    get_db,
+)
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, Index, String, Text, JSON, select
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -20,6 +26,8 @@ class File(Base):
     id = Column(String, primary_key=True)
     user_id = Column(String)
     hash = Column(Text, nullable=True)
+    # SHA-256 of the raw file contents; files with identical content share one blob
+    sha256 = Column(String, nullable=True)
 
     filename = Column(Text)
     path = Column(Text, nullable=True)
@@ -32,6 +40,8 @@ class File(Base):
     created_at = Column(BigInteger)
     updated_at = Column(BigInteger)
 
+    __table_args__ = (Index("file_sha256_idx", "sha256"),)
+
 
 class FileModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -39,6 +49,7 @@ class FileModel(BaseModel):
     id: str
     user_id: str
     hash: Optional[str] = None
+    sha256: Optional[str] = None
 
     filename: str
     path: Optional[str] = None
@@ -61,6 +72,7 @@ class FileMeta(BaseModel):
     name: Optional[str] = None
     content_type: Optional[str] = None
     size: Optional[int] = None
+    sha256: Optional[str] = None
     request_id: Optional[str] = None
 
     model_config = ConfigDict(extra="allow")
@@ -91,6 +103,7 @@ class FileMetadataResponse(BaseModel):
 class FileForm(BaseModel):
     id: str
     hash: Optional[str] = None
+    sha256: Optional[str] = None
     filename: str
     path: str
     data: dict = {}
@@ -180,6 +193,27 @@ class FilesTable:
                 for file in db.query(File).filter_by(user_id=user_id).all()
             ]
 
+    def get_files_by_sha256(self, sha256: str) -> list[FileModel]:
+        with get_db() as db:
+            return [
+                FileModel.model_validate(file)
+                for file in db.query(File)
+                .filter_by(sha256=sha256)
+                .order_by(File.created_at.asc())
+                .all()
+            ]
+
+    def get_processed_file_by_sha256(self, sha256: str) -> Optional[FileModel]:
+        """Oldest file with this content whose parse results are available."""
+        for file in self.get_files_by_sha256(sha256):
+            if file.hash and (file.data or {}).get("content"):
+                return file
+        return None
+
+    def get_file_count_by_path(self, path: str) -> int:
+        with get_db() as db:
+            return db.query(File).filter_by(path=path).count()
+
     def update_file_hash_by_id(self, id: str, hash: str) -> Optional[FileModel]:
         with get_db() as db:
             try:
@@ -232,5 +266,23 @@ class FilesTable:
             except Exception:
                 return False
 
+    ####################
+    # Async variants of the hot-path methods, used from the event loop
+    ####################
+
+    @async_db_fallback("get_file_by_id")
+    async def get_file_by_id_async(self, id: str) -> Optional[FileModel]:
+        async with get_async_db() as db:
+            file = await db.get(File, id)
+            return FileModel.model_validate(file) if file else None
+
+    @async_db_fallback("get_files_by_ids")
+    async def get_files_by_ids_async(self, ids: list[str]) -> list[FileModel]:
+        async with get_async_db() as db:
+            result = await db.execute(
+                select(File).filter(File.id.in_(ids)).order_by(File.updated_at.desc())
+            )
+            return [FileModel.model_validate(file) for file in result.scalars().all()]
+
 
 Files = FilesTable()
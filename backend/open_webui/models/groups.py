@@ -4,14 +4,14 @@ import time
 from typing import Optional
 import uuid
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, async_db_fallback, get_async_db, get_db
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON, func
+from sqlalchemy import BigInteger, Column, String, Text, JSON, func, select
 
 
 log = logging.getLogger(__name__)
@@ -245,5 +245,26 @@ class GroupTable:
                 log.exception(e)
                 return False
 
+    ####################
+    # Async variants of the hot-path methods, used from the event loop
+    ####################
+
+    @async_db_fallback("get_groups_by_member_id")
+    async def get_groups_by_member_id_async(self, user_id: str) -> list[GroupModel]:
+        async with get_async_db() as db:
+            result = await db.execute(
+                select(Group)
+                .filter(
+                    func.json_array_length(Group.user_ids) > 0
+                )  # Ensure array exists
+                .filter(
+                    Group.user_ids.cast(String).like(f'%"{user_id}"%')
+                )  # String-based check
+                .order_by(Group.updated_at.desc())
+            )
+            return [
+                GroupModel.model_validate(group) for group in result.scalars().all()
+            ]
+
 
 Groups = GroupTable()
@@ -0,0 +1,132 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Text, JSON
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+####################
+# Job DB Schema
+####################
+
+
+class Job(Base):
+    __tablename__ = "job"
+    id = Column(Text, primary_key=True)
+    user_id = Column(Text)
+    type = Column(Text)
+    # pending, running, completed or failed
+    status = Column(Text)
+    # Job input and per-item progress
+    data = Column(JSON, nullable=True)
+    meta = Column(JSON, nullable=True)
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+
+class JobModel(BaseModel):
+    id: str
+    user_id: str
+    type: str
+    status: str
+    data: Optional[dict] = None
+    meta: Optional[dict] = None
+    created_at: int
+    updated_at: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+####################
+# Forms
+####################
+
+
+class JobForm(BaseModel):
+    type: str
+    data: Optional[dict] = None
+    meta: Optional[dict] = None
+
+
+class JobTable:
+    def insert_new_job(self, user_id: str, form_data: JobForm) -> Optional[JobModel]:
+        with get_db() as db:
+            job = JobModel(
+                **{
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "status": "pending",
+                    **form_data.model_dump(),
+                    "created_at": int(time.time()),
+                    "updated_at": int(time.time()),
+                }
+            )
+            try:
+                result = Job(**job.model_dump())
+                db.add(result)
+                db.commit()
+                db.refresh(result)
+                if result:
+                    return JobModel.model_validate(result)
+                else:
+                    return None
+            except Exception as e:
+                log.exception(f"Error creating a new job: {e}")
+                return None
+
+    def get_job_by_id(self, id: str) -> Optional[JobModel]:
+        try:
+            with get_db() as db:
+                job = db.query(Job).filter_by(id=id).first()
+                if not job:
+                    return None
+                return JobModel.model_validate(job)
+        except Exception:
+            return None
+
+    def get_jobs_by_type_and_status(
+        self, type: str, statuses: list[str]
+    ) -> list[JobModel]:
+        with get_db() as db:
+            return [
+                JobModel.model_validate(job)
+                for job in db.query(Job)
+                .filter(Job.type == type, Job.status.in_(statuses))
+                .order_by(Job.created_at.asc())
+                .all()
+            ]
+
+    def update_job_by_id(
+        self, id: str, status: Optional[str] = None, data: Optional[dict] = None
+    ) -> Optional[JobModel]:
+        with get_db() as db:
+            job = db.query(Job).filter_by(id=id).first()
+            if not job:
+                return None
+
+            if status:
+                job.status = status
+            if data is not None:
+                job.data = data
+
+            job.updated_at = int(time.time())
+
+            db.commit()
+            return JobModel.model_validate(job)
+
+    def delete_job_by_id(self, id: str) -> bool:
+        with get_db() as db:
+            db.query(Job).filter_by(id=id).delete()
+            db.commit()
+            return True
+
+
+Jobs = JobTable()
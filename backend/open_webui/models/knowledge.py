@@ -4,7 +4,7 @@ import time
 from typing import Optional
 import uuid
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, async_db_fallback, get_async_db, get_db
 from open_webui.env import SRC_LOG_LEVELS
 
 from open_webui.models.files import FileMetadataResponse
@@ -12,7 +12,7 @@ from open_webui.models.users import Users, UserResponse
 
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, select
 
 from open_webui.utils.access_control import has_access
 
@@ -217,5 +217,16 @@ class KnowledgeTable:
             except Exception:
                 return False
 
+    ####################
+    # Async variants of the hot-path methods, used from the event loop
+    ####################
+
+    @async_db_fallback("get_knowledge_by_id")
+    async def get_knowledge_by_id_async(self, id: str) -> Optional[KnowledgeModel]:
+        async with get_async_db() as db:
+            result = await db.execute(select(Knowledge).filter_by(id=id))
+            knowledge = result.scalars().first()
+            return KnowledgeModel.model_validate(knowledge) if knowledge else None
+
 
 Knowledges = KnowledgeTable()
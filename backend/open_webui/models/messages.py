@@ -3,7 +3,7 @@ import time
 import uuid
 from typing import Optional
 
-from open_webui.internal.db import Base, get_db
+from open_webui.internal.db import Base, async_db_fallback, get_async_db, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
 
 
@@ -275,5 +275,37 @@ class MessageTable:
             db.commit()
             return True
 
+    ####################
+    # Async variants of the hot-path methods, used from the event loop
+    ####################
+
+    @async_db_fallback("insert_new_message")
+    async def insert_new_message_async(
+        self, form_data: MessageForm, channel_id: str, user_id: str
+    ) -> Optional[MessageModel]:
+        async with get_async_db() as db:
+            id = str(uuid.uuid4())
+
+            ts = int(time.time_ns())
+            message = MessageModel(
+                **{
+                    "id": id,
+                    "user_id": user_id,
+                    "channel_id": channel_id,
+                    "parent_id": form_data.parent_id,
+                    "content": form_data.content,
+                    "data": form_data.data,
+                    "meta": form_data.meta,
+                    "created_at": ts,
+                    "updated_at": ts,
+                }
+            )
+
+            result = Message(**message.model_dump())
+            db.add(result)
+            await db.commit()
+            await db.refresh(result)
+            return MessageModel.model_validate(result) if result else None
+
 
 Messages = MessageTable()
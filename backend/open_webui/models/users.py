@@ -1,7 +1,13 @@
 import time
 from typing import Optional
 
-from open_webui.internal.db import Base, JSONField, get_db
+from open_webui.internal.db import (
+    Base,
+    JSONField,
+    async_db_fallback,
+    get_async_db,
+    get_db,
+)
 
 
 from open_webui.models.chats import Chats
@@ -10,7 +16,7 @@ from open_webui.models.groups import Groups
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Column, String, Text
-from sqlalchemy import or_
+from sqlalchemy import or_, select, update
 
 
 ####################
@@ -399,5 +405,48 @@ class UsersTable:
             else:
                 return None
 
+    ####################
+    # Async variants of the hot-path methods, used from the event loop
+    ####################
+
+    @async_db_fallback("get_user_by_id")
+    async def get_user_by_id_async(self, id: str) -> Optional[UserModel]:
+        async with get_async_db() as db:
+            result = await db.execute(select(User).filter_by(id=id))
+            user = result.scalars().first()
+            return UserModel.model_validate(user) if user else None
+
+    @async_db_fallback("get_user_by_api_key")
+    async def get_user_by_api_key_async(self, api_key: str) -> Optional[UserModel]:
+        async with get_async_db() as db:
+            result = await db.execute(select(User).filter_by(api_key=api_key))
+            user = result.scalars().first()
+            return UserModel.model_validate(user) if user else None
+
+    @async_db_fallback("get_user_webhook_url_by_id")
+    async def get_user_webhook_url_by_id_async(self, id: str) -> Optional[str]:
+        user = await self.get_user_by_id_async(id)
+        if user is None or user.settings is None:
+            return None
+
+        return (
+            user.settings.model_dump()
+            .get("ui", {})
+            .get("notifications", {})
+            .get("webhook_url", None)
+        )
+
+    @async_db_fallback("update_user_last_active_by_id")
+    async def update_user_last_active_by_id_async(self, id: str) -> Optional[UserModel]:
+        async with get_async_db() as db:
+            await db.execute(
+                update(User).filter_by(id=id).values(last_active_at=int(time.time()))
+            )
+            await db.commit()
+
+            result = await db.execute(select(User).filter_by(id=id))
+            user = result.scalars().first()
+            return UserModel.model_validate(user) if user else None
+
 
 Users = UsersTable()
@@ -0,0 +1,585 @@
+import asyncio
+import logging
+import mimetypes
+import os
+import time
+import uuid
+import zipfile
+from typing import BinaryIO, Callable, Optional
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.documents import Document
+
+from open_webui.config import RAG_EMBEDDING_CONTENT_PREFIX
+from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import (
+    KNOWLEDGE_ARCHIVE_MAX_FILES,
+    KNOWLEDGE_ARCHIVE_MAX_SIZE_MB,
+    KNOWLEDGE_INGEST_EMBEDDING_BATCH_SIZE,
+    KNOWLEDGE_INGEST_INSERT_BATCH_SIZE,
+    KNOWLEDGE_INGEST_WORKERS,
+    KNOWLEDGE_REINDEX_MAX_FILES_PER_SECOND,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.files import FileForm, FileModel, Files
+from open_webui.models.jobs import JobForm, JobModel, Jobs
+from open_webui.models.knowledge import Knowledges
+from open_webui.retrieval.upstage_parser import generate_upstage_document_parsing
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.routers.retrieval import (
+    EMBEDDING_FINGERPRINT_KEYS,
+    get_index_fingerprint,
+    get_rag_embedding_function,
+    get_vector_metadatas,
+    record_index_fingerprint,
+    split_documents,
+)
+from open_webui.socket.main import get_user_room, sio
+from open_webui.storage.provider import Storage
+from open_webui.utils.misc import calculate_sha256_string
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class AsyncBatcher:
+    """
+    Coalesces concurrent calls into batched calls of `process_batch`, which maps
+    a list of inputs to a list of results of the same length and runs in the
+    threadpool. A batch is flushed once it holds `max_batch_size` inputs or
+    `max_delay` seconds after its first input, and every caller gets back the
+    results for its own inputs. If a batch fails, each caller's inputs are
+    retried on their own so one bad input only fails its own caller.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list], list],
+        max_batch_size: int,
+        max_delay: float = 0.05,
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max_delay
+
+        self._pending: list[tuple[list, asyncio.Future]] = []
+        self._pending_size = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def submit(self, inputs: list) -> list:
+        if not inputs:
+            return []
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((inputs, future))
+        self._pending_size += len(inputs)
+
+        if self._pending_size >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending, self._pending_size = self._pending, [], 0
+        if batch:
+            task = asyncio.create_task(self._process(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, batch: list[tuple[list, asyncio.Future]]):
+        try:
+            results = await run_in_threadpool(
+                self.process_batch, [x for inputs, _ in batch for x in inputs]
+            )
+        except Exception as e:
+            if len(batch) == 1:
+                self._set_exception(batch[0][1], e)
+                return
+
+            for inputs, future in batch:
+                try:
+                    self._set_result(
+                        future, await run_in_threadpool(self.process_batch, inputs)
+                    )
+                except Exception as e:
+                    self._set_exception(future, e)
+            return
+
+        offset = 0
+        for inputs, future in batch:
+            self._set_result(future, results[offset : offset + len(inputs)])
+            offset += len(inputs)
+
+    @staticmethod
+    def _set_result(future: asyncio.Future, result):
+        if not future.done():
+            future.set_result(result)
+
+    @staticmethod
+    def _set_exception(future: asyncio.Future, e: Exception):
+        if not future.done():
+            future.set_exception(e)
+
+
+class RateLimiter:
+    """Spaces out callers of `wait` to at most `rate` per second (0 disables it)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate and rate > 0 else 0
+        self._next_at = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+
+        now = time.monotonic()
+        delay = self._next_at - now
+        self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+####################
+# Knowledge ingestion jobs
+####################
+
+KNOWLEDGE_INGEST_JOB_TYPE = "knowledge_ingest"
+KNOWLEDGE_REINDEX_JOB_TYPE = "knowledge_reindex"
+
+# Running jobs by id, so a job is never run twice at once by this process
+RUNNING_JOBS: dict[str, asyncio.Task] = {}
+
+
+def load_file_docs(request: Request, file: FileModel) -> list[Document]:
+    """
+    Parsed documents of `file`. Files without content are parsed first, reusing
+    the parse results of a processed file with identical contents if any.
+    """
+    content = (file.data or {}).get("content")
+
+    if not content and file.sha256:
+        source_file = Files.get_processed_file_by_sha256(file.sha256)
+        if source_file:
+            content = source_file.data.get("content")
+
+    metadata = {
+        "name": file.filename,
+        "created_by": file.user_id,
+        "file_id": file.id,
+        "source": file.filename,
+    }
+
+    if content:
+        docs = [
+            Document(
+                page_content=content.replace("<br/>", "\n"),
+                metadata={**(file.meta or {}), **metadata},
+            )
+        ]
+    elif file.path:
+        docs = generate_upstage_document_parsing(
+            model="document-parse",
+            file_path=Storage.get_file(file.path),
+            key=request.app.state.config.RAG_UPSTAGE_API_KEY,
+        )
+        docs = [
+            Document(
+                page_content=doc.page_content, metadata={**doc.metadata, **metadata}
+            )
+            for doc in docs
+        ]
+        content = " ".join([doc.page_content for doc in docs])
+    else:
+        docs = []
+
+    Files.update_file_data_by_id(file.id, {"content": content or ""})
+    Files.update_file_hash_by_id(file.id, calculate_sha256_string(content or ""))
+    return docs
+
+
+def prepare_file_chunks(
+    request: Request, file: FileModel, collection_name: str, replace: bool = False
+) -> tuple[list[str], list[dict]]:
+    """Loads and splits `file`, returning its chunk texts and vector metadata."""
+    if replace:
+        # Drop any chunks of the file already in the collection, e.g. left
+        # behind by an earlier attempt or built with outdated settings
+        try:
+            if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+                VECTOR_DB_CLIENT.delete(
+                    collection_name=collection_name, filter={"file_id": file.id}
+                )
+        except Exception as e:
+            log.debug(e)
+
+    docs = split_documents(request, load_file_docs(request, file))
+    if not docs:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    file = Files.get_file_by_id(file.id)
+    metadatas = get_vector_metadatas(
+        request,
+        docs,
+        {"file_id": file.id, "name": file.filename, "hash": file.hash},
+    )
+    return [doc.page_content for doc in docs], metadatas
+
+
+def store_archive_files(
+    request: Request, archive: BinaryIO, user, internal: bool = False
+) -> list[str]:
+    """
+    Stores every file of a zip archive as a new file and returns their ids.
+    Members with extensions that are not allowed, or larger than FILE_MAX_SIZE,
+    are skipped. Raises ValueError before anything is extracted if the members
+    exceed KNOWLEDGE_ARCHIVE_MAX_FILES or KNOWLEDGE_ARCHIVE_MAX_SIZE_MB.
+    """
+    allowed_extensions = [
+        ext for ext in request.app.state.config.ALLOWED_FILE_EXTENSIONS or [] if ext
+    ]
+    max_file_size = request.app.state.config.FILE_MAX_SIZE
+
+    file_ids = []
+    with zipfile.ZipFile(archive) as zip_file:
+        members = []
+        for info in zip_file.infolist():
+            name = os.path.basename(info.filename)
+            if (
+                info.is_dir()
+                or not name
+                or name.startswith(".")
+                or (info.filename.startswith("__MACOSX/"))
+            ):
+                continue
+
+            extension = os.path.splitext(name)[1][1:]
+            if (
+                not internal
+                and allowed_extensions
+                and extension not in allowed_extensions
+            ):
+                log.info(
+                    f"Skipping {info.filename}: file type {extension} is not allowed"
+                )
+                continue
+
+            # Sizes are those declared by the archive, which reading enforces
+            if max_file_size and info.file_size > max_file_size * 1024 * 1024:
+                log.info(f"Skipping {info.filename}: larger than {max_file_size} MB")
+                continue
+
+            members.append((info, name))
+
+        if len(members) > KNOWLEDGE_ARCHIVE_MAX_FILES:
+            raise ValueError(
+                ERROR_MESSAGES.ARCHIVE_TOO_LARGE(f"{KNOWLEDGE_ARCHIVE_MAX_FILES} files")
+            )
+        if (
+            sum(info.file_size for info, _ in members)
+            > KNOWLEDGE_ARCHIVE_MAX_SIZE_MB * 1024 * 1024
+        ):
+            raise ValueError(
+                ERROR_MESSAGES.ARCHIVE_TOO_LARGE(f"{KNOWLEDGE_ARCHIVE_MAX_SIZE_MB} MB")
+            )
+
+        for info, name in members:
+            id = str(uuid.uuid4())
+            try:
+                with zip_file.open(info) as member:
+                    file_info, file_path = Storage.upload_file(
+                        member,
+                        f"{id}_{name}",
+                        {
+                            "OpenWebUI-User-Email": user.email,
+                            "OpenWebUI-User-Id": user.id,
+                            "OpenWebUI-User-Name": user.name,
+                            "OpenWebUI-File-Id": id,
+                        },
+                    )
+            except ValueError:
+                log.info(f"Skipping {info.filename}: empty file")
+                continue
+
+            file_item = Files.insert_new_file(
+                user.id,
+                FileForm(
+                    id=id,
+                    sha256=file_info["sha256"],
+                    filename=name,
+                    path=file_path,
+                    meta={
+                        "name": name,
+                        "content_type": mimetypes.guess_type(name)[0],
+                        "size": file_info["size"],
+                        "sha256": file_info["sha256"],
+                        "data": {},
+                    },
+                ),
+            )
+            if file_item:
+                file_ids.append(file_item.id)
+
+    return file_ids
+
+
+def get_job_progress(items: dict) -> dict:
+    statuses = [item["status"] for item in items.values()]
+    return {
+        "total": len(statuses),
+        "completed": statuses.count("completed"),
+        "failed": statuses.count("failed"),
+    }
+
+
+def insert_new_knowledge_ingest_job(
+    user_id: str, knowledge_id: str, file_ids: list[str]
+) -> Optional[JobModel]:
+    items = {
+        file_id: {"status": "pending", "error": None, "attempts": 0}
+        for file_id in dict.fromkeys(file_ids)
+    }
+    return Jobs.insert_new_job(
+        user_id,
+        JobForm(
+            type=KNOWLEDGE_INGEST_JOB_TYPE,
+            data={
+                "knowledge_id": knowledge_id,
+                "items": items,
+                "progress": get_job_progress(items),
+            },
+        ),
+    )
+
+
+def plan_knowledge_reindex(request: Request) -> tuple[dict, list[str]]:
+    """
+    Compares the stored index fingerprint of every knowledge base file with the
+    current one. Returns job items for the stale files, and the collections to
+    rebuild from scratch because none of their vectors use the current
+    embedding model anymore. Knowledge bases with invalid data are deleted.
+    """
+    items = {}
+    reset_collection_names = []
+
+    for knowledge in Knowledges.get_knowledge_bases():
+        if not knowledge.data or not isinstance(knowledge.data, dict):
+            log.warning(
+                f"Knowledge base {knowledge.id} has no data or invalid data ({knowledge.data!r}). Deleting."
+            )
+            try:
+                Knowledges.delete_knowledge_by_id(id=knowledge.id)
+            except Exception as e:
+                log.error(
+                    f"Failed to delete invalid knowledge base {knowledge.id}: {e}"
+                )
+            continue
+
+        stale_files = []
+        has_current_embedding = False
+        for file in Files.get_files_by_ids(knowledge.data.get("file_ids", [])):
+            fingerprint = get_index_fingerprint(request, file)
+            stored_fingerprint = (
+                (file.meta or {}).get("index_fingerprints", {}).get(knowledge.id)
+            )
+
+            if stored_fingerprint and all(
+                stored_fingerprint.get(key) == fingerprint[key]
+                for key in EMBEDDING_FINGERPRINT_KEYS
+            ):
+                has_current_embedding = True
+            if stored_fingerprint != fingerprint:
+                stale_files.append(file)
+
+        if stale_files and not has_current_embedding:
+            # Vectors of another embedding model cannot share the collection
+            reset_collection_names.append(knowledge.id)
+
+        for file in stale_files:
+            items[f"{knowledge.id}:{file.id}"] = {
+                "knowledge_id": knowledge.id,
+                "file_id": file.id,
+                "status": "pending",
+                "error": None,
+                "attempts": 0,
+                "replace": True,
+            }
+
+    return items, reset_collection_names
+
+
+def insert_new_knowledge_reindex_job(user_id: str, items: dict) -> Optional[JobModel]:
+    return Jobs.insert_new_job(
+        user_id,
+        JobForm(
+            type=KNOWLEDGE_REINDEX_JOB_TYPE,
+            data={
+                "items": items,
+                "progress": get_job_progress(items),
+                "max_files_per_second": KNOWLEDGE_REINDEX_MAX_FILES_PER_SECOND,
+            },
+        ),
+    )
+
+
+def get_running_job(type: str) -> Optional[JobModel]:
+    """A job of the given type this process is currently running, if any."""
+    for job in Jobs.get_jobs_by_type_and_status(type, ["pending", "running"]):
+        if job.id in RUNNING_JOBS:
+            return job
+    return None
+
+
+def start_knowledge_ingest_job(request: Request, job_id: str, user) -> bool:
+    """Runs the job in the background. Returns False if it is already running."""
+    if job_id in RUNNING_JOBS:
+        return False
+
+    task = asyncio.create_task(run_knowledge_ingest_job(request, job_id, user))
+    RUNNING_JOBS[job_id] = task
+    task.add_done_callback(lambda _: RUNNING_JOBS.pop(job_id, None))
+    return True
+
+
+async def run_knowledge_ingest_job(request: Request, job_id: str, user):
+    """
+    Parses, chunks and embeds the files of an ingestion or reindex job into
+    their knowledge bases. Up to KNOWLEDGE_INGEST_WORKERS files are processed
+    at once, optionally rate limited by the job's `max_files_per_second`; their
+    chunks share one embedding batcher, and vector inserts are batched too.
+    Completed items are skipped, so running a job again only retries the
+    items that have not completed yet.
+    """
+    job = Jobs.get_job_by_id(job_id)
+    items = job.data["items"]
+
+    last_persisted_at = 0
+
+    async def persist(status: str, force: bool = False):
+        nonlocal last_persisted_at
+        if not force and time.time() - last_persisted_at < 1:
+            return
+        last_persisted_at = time.time()
+
+        progress = get_job_progress(items)
+        Jobs.update_job_by_id(
+            job_id,
+            status=status,
+            data={**job.data, "items": items, "progress": progress},
+        )
+        try:
+            await sio.emit(
+                "job-events",
+                {"job_id": job_id, "status": status, "progress": progress},
+                room=get_user_room(job.user_id),
+            )
+        except Exception as e:
+            log.debug(f"Error emitting job progress: {e}")
+
+    embedding_function = get_rag_embedding_function(request)
+    embedder = AsyncBatcher(
+        lambda texts: embedding_function(
+            [text.replace("\n", " ") for text in texts],
+            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+            user=user,
+        ),
+        KNOWLEDGE_INGEST_EMBEDDING_BATCH_SIZE,
+    )
+
+    def insert_items(vector_items: list[tuple[str, dict]]) -> list[None]:
+        collections = {}
+        for collection_name, vector_item in vector_items:
+            collections.setdefault(collection_name, []).append(vector_item)
+        for collection_name, collection_items in collections.items():
+            VECTOR_DB_CLIENT.insert(
+                collection_name=collection_name, items=collection_items
+            )
+        return [None] * len(vector_items)
+
+    inserter = AsyncBatcher(
+        insert_items, KNOWLEDGE_INGEST_INSERT_BATCH_SIZE, max_delay=0.5
+    )
+    semaphore = asyncio.Semaphore(max(1, KNOWLEDGE_INGEST_WORKERS))
+    rate_limiter = RateLimiter(job.data.get("max_files_per_second", 0))
+
+    async def ingest(key: str):
+        item = items[key]
+        knowledge_id = item.get("knowledge_id", job.data.get("knowledge_id"))
+        file_id = item.get("file_id", key)
+
+        async with semaphore:
+            await rate_limiter.wait()
+            try:
+                file = Files.get_file_by_id(file_id)
+                if not file:
+                    raise ValueError(ERROR_MESSAGES.NOT_FOUND)
+
+                texts, metadatas = await run_in_threadpool(
+                    prepare_file_chunks,
+                    request,
+                    file,
+                    knowledge_id,
+                    item["attempts"] > 0 or item.get("replace", False),
+                )
+                embeddings = await embedder.submit(texts)
+                await inserter.submit(
+                    [
+                        (
+                            knowledge_id,
+                            {
+                                "id": str(uuid.uuid4()),
+                                "text": text,
+                                "vector": embeddings[idx],
+                                "metadata": metadatas[idx],
+                            },
+                        )
+                        for idx, text in enumerate(texts)
+                    ]
+                )
+
+                Files.update_file_metadata_by_id(
+                    file_id, {"collection_name": knowledge_id}
+                )
+                record_index_fingerprint(request, file_id, knowledge_id)
+
+                knowledge = Knowledges.get_knowledge_by_id(id=knowledge_id)
+                data = knowledge.data or {}
+                file_ids = data.get("file_ids", [])
+                if file_id not in file_ids:
+                    data["file_ids"] = [*file_ids, file_id]
+                    Knowledges.update_knowledge_data_by_id(id=knowledge_id, data=data)
+
+                item.update({"status": "completed", "error": None})
+            except Exception as e:
+                log.error(f"Error ingesting file {file_id}: {e}")
+                item.update(
+                    {
+                        "status": "failed",
+                        "error": str(e.detail) if hasattr(e, "detail") else str(e),
+                    }
+                )
+            finally:
+                item["attempts"] += 1
+
+        await persist("running")
+
+    await persist("running", force=True)
+    try:
+        await asyncio.gather(
+            *[
+                ingest(key)
+                for key, item in items.items()
+                if item["status"] != "completed"
+            ]
+        )
+    finally:
+        failed = any(item["status"] != "completed" for item in items.values())
+        await persist("failed" if failed else "completed", force=True)
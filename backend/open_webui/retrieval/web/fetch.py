@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+import aiohttp
+from langchain_core.documents import Document
+
+from open_webui.config import (
+    WEB_LOADER_CACHE_MAX_PAGES,
+    WEB_LOADER_CACHE_TTL,
+    WEB_LOADER_MAX_CONNECTIONS,
+    WEB_LOADER_MAX_CONNECTIONS_PER_HOST,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL, so the same page found through different searches
+    maps to one cache entry: lowercase scheme and host, no default port,
+    fragment or utm_* parameters, and sorted query parameters.
+    """
+    try:
+        parsed = urllib.parse.urlsplit(url.strip())
+        scheme = parsed.scheme.lower()
+        netloc = (parsed.hostname or "").lower()
+        if ":" in netloc:
+            netloc = f"[{netloc}]"
+        if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+            netloc = f"{netloc}:{parsed.port}"
+        if parsed.username:
+            userinfo = parsed.username
+            if parsed.password:
+                userinfo = f"{userinfo}:{parsed.password}"
+            netloc = f"{userinfo}@{netloc}"
+    except ValueError:
+        return url
+
+    query = urllib.parse.urlencode(
+        sorted(
+            (key, value)
+            for key, value in urllib.parse.parse_qsl(
+                parsed.query, keep_blank_values=True
+            )
+            if not key.lower().startswith("utm_")
+        )
+    )
+    return urllib.parse.urlunsplit((scheme, netloc, parsed.path or "/", query, ""))
+
+
+class WebFetchEngine:
+    """
+    aiohttp sessions shared by the web loaders, so connections to a host are
+    kept alive and reused across pages and searches. The connector bounds the
+    connections open at once, in total and per host; further requests wait for
+    a free connection.
+    """
+
+    def __init__(self, max_connections: int, max_connections_per_host: int):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+
+        # Sessions are bound to the event loop they were created in
+        self._sessions: Dict[tuple, aiohttp.ClientSession] = {}
+
+    def get_session(self, trust_env: bool = False) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        for key in [key for key in self._sessions if key[0].is_closed()]:
+            self._sessions.pop(key)
+
+        session = self._sessions.get((loop, trust_env))
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    limit_per_host=self.max_connections_per_host,
+                    ttl_dns_cache=300,
+                ),
+                # Cookies are passed per request, none are kept between pages
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trust_env=trust_env,
+            )
+            self._sessions[(loop, trust_env)] = session
+        return session
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        for key in [key for key in self._sessions if key[0] is loop]:
+            await self._sessions.pop(key).close()
+
+
+class WebPageCache:
+    """
+    Loaded web pages, keyed by web loader engine and normalized URL, and kept
+    for `ttl` seconds. Besides its documents, each page holds the chunks and
+    embeddings it was saved to the vector DB with, so a repeated or overlapping
+    search neither refetches nor re-embeds it. At most `max_pages` pages are
+    kept, least recently used first out.
+    """
+
+    def __init__(self, ttl: int, max_pages: int):
+        self.ttl = ttl
+        self.max_pages = max_pages
+
+        self._pages: OrderedDict[str, dict] = OrderedDict()
+        # Chunks are read and stored from the threadpool
+        self._lock = threading.Lock()
+        self._loading: Dict[str, asyncio.Future] = {}
+
+    def get_key(self, url: str, engine: str = "") -> str:
+        return f"{engine}:{normalize_url(url)}"
+
+    def _get_page(self, key: str) -> Optional[dict]:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                return None
+            if time.time() - page["loaded_at"] > self.ttl:
+                self._pages.pop(key, None)
+                return None
+
+            self._pages.move_to_end(key)
+            return page
+
+    def _set_page(self, key: str, docs: list[Document]):
+        with self._lock:
+            self._pages[key] = {"docs": docs, "chunks": {}, "loaded_at": time.time()}
+            self._pages.move_to_end(key)
+            while len(self._pages) > max(self.max_pages, 0):
+                self._pages.popitem(last=False)
+
+    async def load(
+        self,
+        urls: list[str],
+        load_docs: Callable[[list[str]], Awaitable[list[Document]]],
+        engine: str = "",
+    ) -> list[Document]:
+        """
+        Documents of the pages at `urls`. Cached pages are reused, pages being
+        loaded for another request are awaited, and the rest are loaded in one
+        call to `load_docs`.
+        """
+        if self.ttl <= 0:
+            return await load_docs(urls) if urls else []
+
+        keys = list(dict.fromkeys(self.get_key(url, engine) for url in urls))
+        urls_by_key = {}
+        for url in urls:
+            urls_by_key.setdefault(self.get_key(url, engine), url)
+
+        docs_by_key: Dict[str, list[Document]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        missing = []
+        for key in keys:
+            if page := self._get_page(key):
+                docs_by_key[key] = page["docs"]
+            elif key in self._loading:
+                waiting[key] = self._loading[key]
+            else:
+                missing.append(key)
+
+        log.debug(
+            f"Web pages: {len(docs_by_key)} cached, {len(waiting)} loading, "
+            f"{len(missing)} to load"
+        )
+
+        extra_docs = []
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in missing}
+            self._loading.update(futures)
+
+            try:
+                docs = await load_docs([urls_by_key[key] for key in missing])
+
+                for doc in docs:
+                    key = self.get_key(doc.metadata.get("source", ""), engine)
+                    if key in futures:
+                        docs_by_key.setdefault(key, []).append(doc)
+                    else:
+                        # e.g. a redirect, returned but not cached
+                        extra_docs.append(doc)
+
+                for key in missing:
+                    page_docs = docs_by_key.get(key, [])
+                    if any(doc.page_content.strip() for doc in page_docs):
+                        self._set_page(key, page_docs)
+            finally:
+                for key, future in futures.items():
+                    self._loading.pop(key, None)
+                    # Requests waiting on a page that failed to load skip it
+                    future.set_result(docs_by_key.get(key))
+
+        for key, future in waiting.items():
+            if (page_docs := await future) is not None:
+                docs_by_key[key] = page_docs
+
+        # Copies, so callers can't alter the cached documents
+        return [
+            Document(page_content=doc.page_content, metadata=dict(doc.metadata))
+            for key in keys
+            for doc in docs_by_key.get(key, [])
+        ] + extra_docs
+
+    def get_chunks(
+        self, url: str, fingerprint: str, engine: str = ""
+    ) -> Optional[list]:
+        """Vector DB items of a cached page embedded with `fingerprint`, if any."""
+        if page := self._get_page(self.get_key(url, engine)):
+            return page["chunks"].get(fingerprint)
+        return None
+
+    def set_chunks(self, url: str, fingerprint: str, chunks: list, engine: str = ""):
+        if page := self._get_page(self.get_key(url, engine)):
+            page["chunks"][fingerprint] = chunks
+
+
+WEB_FETCH_ENGINE = WebFetchEngine(
+    WEB_LOADER_MAX_CONNECTIONS, WEB_LOADER_MAX_CONNECTIONS_PER_HOST
+)
+WEB_PAGE_CACHE = WebPageCache(WEB_LOADER_CACHE_TTL, WEB_LOADER_CACHE_MAX_PAGES)
@@ -26,6 +26,7 @@ from langchain_community.document_loaders.base import BaseLoader
 from langchain_core.documents import Document
 from open_webui.retrieval.loaders.tavily import TavilyLoader
 from open_webui.retrieval.loaders.external_web import ExternalWebLoader
+from open_webui.retrieval.web.fetch import WEB_FETCH_ENGINE
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.config import (
     ENABLE_RAG_LOCAL_WEB_FETCH,
@@ -504,32 +505,33 @@ class SafeWebBaseLoader(WebBaseLoader):
     async def _fetch(
         self, url: str, retries: int = 3, cooldown: int = 2, backoff: float = 1.5
     ) -> str:
-        async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
-            for i in range(retries):
-                try:
-                    kwargs: Dict = dict(
-                        headers=self.session.headers,
-                        cookies=self.session.cookies.get_dict(),
+        # Shared session, so connections are reused and limited per host
+        session = WEB_FETCH_ENGINE.get_session(self.trust_env)
+        for i in range(retries):
+            try:
+                kwargs: Dict = dict(
+                    headers=self.session.headers,
+                    cookies=self.session.cookies.get_dict(),
+                )
+                if not self.session.verify:
+                    kwargs["ssl"] = False
+
+                async with session.get(
+                    url,
+                    **(self.requests_kwargs | kwargs),
+                ) as response:
+                    if self.raise_for_status:
+                        response.raise_for_status()
+                    return await response.text()
+            except aiohttp.ClientConnectionError as e:
+                if i == retries - 1:
+                    raise
+                else:
+                    log.warning(
+                        f"Error fetching {url} with attempt "
+                        f"{i + 1}/{retries}: {e}. Retrying..."
                     )
-                    if not self.session.verify:
-                        kwargs["ssl"] = False
-
-                    async with session.get(
-                        url,
-                        **(self.requests_kwargs | kwargs),
-                    ) as response:
-                        if self.raise_for_status:
-                            response.raise_for_status()
-                        return await response.text()
-                except aiohttp.ClientConnectionError as e:
-                    if i == retries - 1:
-                        raise
-                    else:
-                        log.warning(
-                            f"Error fetching {url} with attempt "
-                            f"{i + 1}/{retries}: {e}. Retrying..."
-                        )
-                        await asyncio.sleep(cooldown * backoff**i)
+                    await asyncio.sleep(cooldown * backoff**i)
         raise ValueError("retry count exceeded")
 
     def _unpack_fetch_results(
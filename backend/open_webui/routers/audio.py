@@ -1,4 +1,5 @@
 import hashlib
+import io
 import json
 import logging
 import os
@@ -12,7 +13,6 @@ from typing import Optional
 
 
 import aiohttp
-import aiofiles
 import requests
 import mimetypes
 
@@ -27,8 +27,9 @@ from fastapi import (
     status,
     APIRouter,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 
 
@@ -38,9 +39,13 @@ from open_webui.config import (
     WHISPER_MODEL_DIR,
     CACHE_DIR,
     WHISPER_LANGUAGE,
+    AUDIO_STT_WORKERS,
+    AUDIO_STT_SEGMENT_DURATION,
 )
 
 from open_webui.constants import ERROR_MESSAGES
+from open_webui.utils.model_manager import MODEL_MANAGER
+from open_webui.utils.speech_cache import SPEECH_CACHE, stream_speech_request
 from open_webui.env import (
     AIOHTTP_CLIENT_SESSION_SSL,
     AIOHTTP_CLIENT_TIMEOUT,
@@ -62,8 +67,11 @@ AZURE_MAX_FILE_SIZE = AZURE_MAX_FILE_SIZE_MB * 1024 * 1024  # Convert MB to byte
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["AUDIO"])
 
-SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
-SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# Shared by all requests, so concurrent transcriptions are bounded as a whole
+STT_EXECUTOR = ThreadPoolExecutor(
+    max_workers=AUDIO_STT_WORKERS, thread_name_prefix="stt"
+)
 
 
 ##########################################
@@ -129,6 +137,8 @@ def set_faster_whisper_model(model: str, auto_update: bool = False):
             "device": DEVICE_TYPE if DEVICE_TYPE and DEVICE_TYPE == "cuda" else "cpu",
             "compute_type": "int8",
             "download_root": WHISPER_MODEL_DIR,
+            # Lets segments transcribed from several threads run in parallel
+            "num_workers": AUDIO_STT_WORKERS,
             "local_files_only": not auto_update,
         }
 
@@ -143,6 +153,28 @@ def set_faster_whisper_model(model: str, auto_update: bool = False):
     return whisper_model
 
 
+def load_faster_whisper_model(app, auto_update: bool = False):
+    """
+    Loads the local Whisper model as `app.state.faster_whisper_model` in the
+    background, or unloads it if another STT engine is used.
+    """
+    model = app.state.config.WHISPER_MODEL
+    if app.state.config.STT_ENGINE == "" and model:
+        app.state.faster_whisper_model = MODEL_MANAGER.load(
+            "whisper", model, lambda: set_faster_whisper_model(model, auto_update)
+        )
+    else:
+        MODEL_MANAGER.unload("whisper")
+        app.state.faster_whisper_model = None
+
+
+def get_faster_whisper_model(request: Request):
+    # Loaded once, even when several segments are transcribed at the same time
+    if request.app.state.faster_whisper_model is None:
+        load_faster_whisper_model(request.app)
+    return request.app.state.faster_whisper_model.get()
+
+
 ##########################################
 #
 # Audio API
@@ -246,10 +278,9 @@ async def update_audio_config(
         form_data.stt.AZURE_MAX_SPEAKERS
     )
 
-    if request.app.state.config.STT_ENGINE == "":
-        request.app.state.faster_whisper_model = set_faster_whisper_model(
-            form_data.stt.WHISPER_MODEL, WHISPER_MODEL_AUTO_UPDATE
-        )
+    load_faster_whisper_model(request.app, WHISPER_MODEL_AUTO_UPDATE)
+    if request.app.state.config.TTS_ENGINE != "transformers":
+        MODEL_MANAGER.unload("tts")
 
     return {
         "tts": {
@@ -280,19 +311,30 @@ async def update_audio_config(
     }
 
 
-def load_speech_pipeline(request):
-    from transformers import pipeline
-    from datasets import load_dataset
+def load_speech_pipeline(app):
+    """
+    Loads the transformers TTS pipeline and its speaker embeddings as
+    `app.state.speech_synthesiser` in the background.
+    """
+
+    def load():
+        from transformers import pipeline
+        from datasets import load_dataset
 
-    if request.app.state.speech_synthesiser is None:
-        request.app.state.speech_synthesiser = pipeline(
-            "text-to-speech", "microsoft/speecht5_tts"
+        return (
+            pipeline("text-to-speech", "microsoft/speecht5_tts"),
+            load_dataset("Matthijs/cmu-arctic-xvectors", split="validation"),
         )
 
-    if request.app.state.speech_speaker_embeddings_dataset is None:
-        request.app.state.speech_speaker_embeddings_dataset = load_dataset(
-            "Matthijs/cmu-arctic-xvectors", split="validation"
-        )
+    app.state.speech_synthesiser = MODEL_MANAGER.load(
+        "tts", "microsoft/speecht5_tts", load
+    )
+    return app.state.speech_synthesiser
+
+
+@router.get("/speech/cache")
+async def get_speech_cache_stats(user=Depends(get_admin_user)):
+    return SPEECH_CACHE.get_stats()
 
 
 @router.post("/speech")
@@ -304,13 +346,6 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         + str(request.app.state.config.TTS_MODEL).encode("utf-8")
     ).hexdigest()
 
-    file_path = SPEECH_CACHE_DIR.joinpath(f"{name}.mp3")
-    file_body_path = SPEECH_CACHE_DIR.joinpath(f"{name}.json")
-
-    # Check if the file already exists in the cache
-    if file_path.is_file():
-        return FileResponse(file_path)
-
     payload = None
     try:
         payload = json.loads(body.decode("utf-8"))
@@ -321,56 +356,24 @@ async def speech(request: Request, user=Depends(get_verified_user)):
     if request.app.state.config.TTS_ENGINE == "openai":
         payload["model"] = request.app.state.config.TTS_MODEL
 
-        try:
-            timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-            async with aiohttp.ClientSession(
-                timeout=timeout, trust_env=True
-            ) as session:
-                async with session.post(
-                    url=f"{request.app.state.config.TTS_OPENAI_API_BASE_URL}/audio/speech",
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {request.app.state.config.TTS_OPENAI_API_KEY}",
-                        **(
-                            {
-                                "X-OpenWebUI-User-Name": user.name,
-                                "X-OpenWebUI-User-Id": user.id,
-                                "X-OpenWebUI-User-Email": user.email,
-                                "X-OpenWebUI-User-Role": user.role,
-                            }
-                            if ENABLE_FORWARD_USER_INFO_HEADERS
-                            else {}
-                        ),
-                    },
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                ) as r:
-                    r.raise_for_status()
-
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-            return FileResponse(file_path)
-
-        except Exception as e:
-            log.exception(e)
-            detail = None
-
-            try:
-                if r.status != 200:
-                    res = await r.json()
-
-                    if "error" in res:
-                        detail = f"External: {res['error'].get('message', '')}"
-            except Exception:
-                detail = f"External: {e}"
-
-            raise HTTPException(
-                status_code=getattr(r, "status", 500) if r else 500,
-                detail=detail if detail else "Open WebUI: Server Connection Error",
+        def synthesize():
+            return stream_speech_request(
+                f"{request.app.state.config.TTS_OPENAI_API_BASE_URL}/audio/speech",
+                json=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {request.app.state.config.TTS_OPENAI_API_KEY}",
+                    **(
+                        {
+                            "X-OpenWebUI-User-Name": user.name,
+                            "X-OpenWebUI-User-Id": user.id,
+                            "X-OpenWebUI-User-Email": user.email,
+                            "X-OpenWebUI-User-Role": user.role,
+                        }
+                        if ENABLE_FORWARD_USER_INFO_HEADERS
+                        else {}
+                    ),
+                },
             )
 
     elif request.app.state.config.TTS_ENGINE == "elevenlabs":
@@ -382,149 +385,90 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                 detail="Invalid voice id",
             )
 
-        try:
-            timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-            async with aiohttp.ClientSession(
-                timeout=timeout, trust_env=True
-            ) as session:
-                async with session.post(
-                    f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
-                    json={
-                        "text": payload["input"],
-                        "model_id": request.app.state.config.TTS_MODEL,
-                        "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
-                    },
-                    headers={
-                        "Accept": "audio/mpeg",
-                        "Content-Type": "application/json",
-                        "xi-api-key": request.app.state.config.TTS_API_KEY,
-                    },
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                ) as r:
-                    r.raise_for_status()
-
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-            return FileResponse(file_path)
-
-        except Exception as e:
-            log.exception(e)
-            detail = None
-
-            try:
-                if r.status != 200:
-                    res = await r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error'].get('message', '')}"
-            except Exception:
-                detail = f"External: {e}"
-
-            raise HTTPException(
-                status_code=getattr(r, "status", 500) if r else 500,
-                detail=detail if detail else "Open WebUI: Server Connection Error",
+        def synthesize():
+            return stream_speech_request(
+                f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
+                json={
+                    "text": payload["input"],
+                    "model_id": request.app.state.config.TTS_MODEL,
+                    "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
+                },
+                headers={
+                    "Accept": "audio/mpeg",
+                    "Content-Type": "application/json",
+                    "xi-api-key": request.app.state.config.TTS_API_KEY,
+                },
             )
 
     elif request.app.state.config.TTS_ENGINE == "azure":
-        try:
-            payload = json.loads(body.decode("utf-8"))
-        except Exception as e:
-            log.exception(e)
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
-
         region = request.app.state.config.TTS_AZURE_SPEECH_REGION or "eastus"
         base_url = request.app.state.config.TTS_AZURE_SPEECH_BASE_URL
         language = request.app.state.config.TTS_VOICE
         locale = "-".join(request.app.state.config.TTS_VOICE.split("-")[:1])
         output_format = request.app.state.config.TTS_AZURE_SPEECH_OUTPUT_FORMAT
 
-        try:
-            data = f"""<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{locale}">
-                <voice name="{language}">{payload["input"]}</voice>
-            </speak>"""
-            timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-            async with aiohttp.ClientSession(
-                timeout=timeout, trust_env=True
-            ) as session:
-                async with session.post(
-                    (base_url or f"https://{region}.tts.speech.microsoft.com")
-                    + "/cognitiveservices/v1",
-                    headers={
-                        "Ocp-Apim-Subscription-Key": request.app.state.config.TTS_API_KEY,
-                        "Content-Type": "application/ssml+xml",
-                        "X-Microsoft-OutputFormat": output_format,
-                    },
-                    data=data,
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                ) as r:
-                    r.raise_for_status()
+        data = f"""<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{locale}">
+            <voice name="{language}">{payload["input"]}</voice>
+        </speak>"""
 
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
+        def synthesize():
+            return stream_speech_request(
+                (base_url or f"https://{region}.tts.speech.microsoft.com")
+                + "/cognitiveservices/v1",
+                headers={
+                    "Ocp-Apim-Subscription-Key": request.app.state.config.TTS_API_KEY,
+                    "Content-Type": "application/ssml+xml",
+                    "X-Microsoft-OutputFormat": output_format,
+                },
+                data=data,
+            )
 
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
+    elif request.app.state.config.TTS_ENGINE == "transformers":
 
-                    return FileResponse(file_path)
+        def synthesize_speech() -> bytes:
+            import torch
+            import soundfile as sf
 
-        except Exception as e:
-            log.exception(e)
-            detail = None
+            synthesiser, embeddings_dataset = load_speech_pipeline(request.app).get()
 
+            speaker_index = 6799
             try:
-                if r.status != 200:
-                    res = await r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error'].get('message', '')}"
+                speaker_index = embeddings_dataset["filename"].index(
+                    request.app.state.config.TTS_MODEL
+                )
             except Exception:
-                detail = f"External: {e}"
-
-            raise HTTPException(
-                status_code=getattr(r, "status", 500) if r else 500,
-                detail=detail if detail else "Open WebUI: Server Connection Error",
-            )
-
-    elif request.app.state.config.TTS_ENGINE == "transformers":
-        payload = None
-        try:
-            payload = json.loads(body.decode("utf-8"))
-        except Exception as e:
-            log.exception(e)
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+                pass
 
-        import torch
-        import soundfile as sf
+            speaker_embedding = torch.tensor(
+                embeddings_dataset[speaker_index]["xvector"]
+            ).unsqueeze(0)
 
-        load_speech_pipeline(request)
-
-        embeddings_dataset = request.app.state.speech_speaker_embeddings_dataset
+            speech = synthesiser(
+                payload["input"],
+                forward_params={"speaker_embeddings": speaker_embedding},
+            )
 
-        speaker_index = 6799
-        try:
-            speaker_index = embeddings_dataset["filename"].index(
-                request.app.state.config.TTS_MODEL
+            buffer = io.BytesIO()
+            sf.write(
+                buffer,
+                speech["audio"],
+                samplerate=speech["sampling_rate"],
+                format="MP3",
             )
-        except Exception:
-            pass
+            return buffer.getvalue()
 
-        speaker_embedding = torch.tensor(
-            embeddings_dataset[speaker_index]["xvector"]
-        ).unsqueeze(0)
+        async def synthesize():
+            yield await run_in_threadpool(synthesize_speech)
 
-        speech = request.app.state.speech_synthesiser(
-            payload["input"],
-            forward_params={"speaker_embeddings": speaker_embedding},
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail=ERROR_MESSAGES.DEFAULT("Unsupported TTS engine"),
         )
 
-        sf.write(file_path, speech["audio"], samplerate=speech["sampling_rate"])
-
-        async with aiofiles.open(file_body_path, "w") as f:
-            await f.write(json.dumps(payload))
-
-        return FileResponse(file_path)
+    # Served from the cache if the audio is already there; `synthesize` only
+    # runs on a miss
+    return await SPEECH_CACHE.get_response(name, synthesize, payload)
 
 
 def transcription_handler(request, file_path, metadata):
@@ -535,12 +479,7 @@ def transcription_handler(request, file_path, metadata):
     metadata = metadata or {}
 
     if request.app.state.config.STT_ENGINE == "":
-        if request.app.state.faster_whisper_model is None:
-            request.app.state.faster_whisper_model = set_faster_whisper_model(
-                request.app.state.config.WHISPER_MODEL
-            )
-
-        model = request.app.state.faster_whisper_model
+        model = get_faster_whisper_model(request)
         segments, info = model.transcribe(
             file_path,
             beam_size=5,
@@ -552,8 +491,19 @@ def transcription_handler(request, file_path, metadata):
             % (info.language, info.language_probability)
         )
 
-        transcript = "".join([segment.text for segment in list(segments)])
-        data = {"text": transcript.strip()}
+        segments = list(segments)
+        transcript = "".join([segment.text for segment in segments])
+        data = {
+            "text": transcript.strip(),
+            "segments": [
+                {
+                    "start": segment.start,
+                    "end": segment.end,
+                    "text": segment.text.strip(),
+                }
+                for segment in segments
+            ],
+        }
 
         # save the transcript to a json file
         transcript_file = f"{file_dir}/{id}.json"
@@ -786,7 +736,15 @@ def transcription_handler(request, file_path, metadata):
             )
 
 
-def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None):
+def transcribe_segments(
+    request: Request, file_path: str, metadata: Optional[dict] = None
+):
+    """
+    Transcribes the audio file as segments that run concurrently on the STT
+    worker pool, yielding the result of each segment in order as soon as it and
+    the segments before it are done. Segment timestamps are shifted by the
+    segment's position in the recording.
+    """
     log.info(f"transcribe: {file_path} {metadata}")
 
     if is_audio_conversion_required(file_path):
@@ -797,10 +755,16 @@ def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None
     except Exception as e:
         log.exception(e)
 
-    # Always produce a list of chunk paths (could be one entry if small)
+    # The local model only gains from splitting long recordings, remote
+    # engines are split when they exceed the upload limit
+    max_duration_ms = None
+    if request.app.state.config.STT_ENGINE == "" and AUDIO_STT_SEGMENT_DURATION > 0:
+        max_duration_ms = AUDIO_STT_SEGMENT_DURATION * 1000
+
+    # Always produce a list of chunks (could be one entry if small)
     try:
-        chunk_paths = split_audio(file_path, MAX_FILE_SIZE)
-        print(f"Chunk paths: {chunk_paths}")
+        chunks = split_audio_segments(file_path, MAX_FILE_SIZE, max_duration_ms)
+        log.debug(f"Chunks: {chunks}")
     except Exception as e:
         log.exception(e)
         raise HTTPException(
@@ -808,35 +772,85 @@ def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None
             detail=ERROR_MESSAGES.DEFAULT(e),
         )
 
-    results = []
+    futures = [
+        STT_EXECUTOR.submit(transcription_handler, request, chunk_path, metadata)
+        for chunk_path, _ in chunks
+    ]
     try:
-        with ThreadPoolExecutor() as executor:
-            # Submit tasks for each chunk_path
-            futures = [
-                executor.submit(transcription_handler, request, chunk_path, metadata)
-                for chunk_path in chunk_paths
-            ]
-            # Gather results as they complete
-            for future in futures:
-                try:
-                    results.append(future.result())
-                except Exception as transcribe_exc:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=f"Error transcribing chunk: {transcribe_exc}",
-                    )
+        for idx, future in enumerate(futures):
+            try:
+                result = future.result()
+            except Exception as transcribe_exc:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Error transcribing chunk: {transcribe_exc}",
+                )
+
+            offset = chunks[idx][1] / 1000
+            if result.get("segments"):
+                result = {
+                    **result,
+                    "segments": [
+                        {
+                            **segment,
+                            "start": segment["start"] + offset,
+                            "end": segment["end"] + offset,
+                        }
+                        for segment in result["segments"]
+                    ],
+                }
+            yield result
     finally:
+        for future in futures:
+            future.cancel()
+
         # Clean up only the temporary chunks, never the original file
-        for chunk_path in chunk_paths:
+        for chunk_path, _ in chunks:
             if chunk_path != file_path and os.path.isfile(chunk_path):
                 try:
                     os.remove(chunk_path)
                 except Exception:
                     pass
 
-    return {
+
+def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None):
+    results = list(transcribe_segments(request, file_path, metadata))
+
+    data = {
         "text": " ".join([result["text"] for result in results]),
     }
+    if any("segments" in result for result in results):
+        data["segments"] = [
+            segment for result in results for segment in result.get("segments", [])
+        ]
+    return data
+
+
+def transcribe_stream(
+    request: Request, file_path: str, metadata: Optional[dict] = None
+):
+    """
+    Server-sent events with the text of each segment as it is transcribed,
+    followed by a final event with the full transcript.
+    """
+    results = []
+    try:
+        segments = transcribe_segments(request, file_path, metadata)
+        for idx, result in enumerate(segments):
+            results.append(result)
+            yield f"data: {json.dumps({'index': idx, **result})}\n\n"
+    except Exception as e:
+        log.exception(e)
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield f"data: {json.dumps({'error': {'detail': detail}})}\n\n"
+        return
+
+    data = {
+        "text": " ".join([result["text"] for result in results]),
+        "filename": os.path.basename(file_path),
+        "done": True,
+    }
+    yield f"data: {json.dumps(data)}\n\n"
 
 
 def compress_audio(file_path):
@@ -858,20 +872,54 @@ def compress_audio(file_path):
         return file_path
 
 
-def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
+def get_audio_duration_ms(file_path) -> int:
+    try:
+        return int(float(mediainfo(file_path).get("duration", 0)) * 1000)
+    except Exception as e:
+        log.debug(f"Error getting audio duration: {e}")
+        return 0
+
+
+def find_split_point(audio, start, end, window_ms=5000, step_ms=250):
     """
-    Splits audio into chunks not exceeding max_bytes.
-    Returns a list of chunk file paths. If audio fits, returns list with original path.
+    The quietest position in the last `window_ms` before `end`, so chunks are
+    not cut in the middle of a word.
+    """
+    split_point = end
+    min_dbfs = None
+    for position in range(
+        max(start + (end - start) // 2, end - window_ms), end, step_ms
+    ):
+        dbfs = audio[position : position + step_ms].dBFS
+        # Ties go to the later position, keeping chunks close to their size
+        if min_dbfs is None or dbfs <= min_dbfs:
+            split_point = position + step_ms // 2
+            min_dbfs = dbfs
+    return split_point
+
+
+def split_audio_segments(
+    file_path, max_bytes, max_duration_ms=None, format="mp3", bitrate="32k"
+):
+    """
+    Splits audio into chunks not exceeding max_bytes, nor about max_duration_ms
+    if given. Returns a list of (chunk file path, start in milliseconds) pairs.
+    If audio fits, returns a list with the original path.
     """
     file_size = os.path.getsize(file_path)
-    if file_size <= max_bytes:
-        return [file_path]  # Nothing to split
+    if file_size <= max_bytes and not (
+        max_duration_ms and get_audio_duration_ms(file_path) > max_duration_ms
+    ):
+        return [(file_path, 0)]  # Nothing to split
 
     audio = AudioSegment.from_file(file_path)
     duration_ms = len(audio)
     orig_size = file_size
 
     approx_chunk_ms = max(int(duration_ms * (max_bytes / orig_size)) - 1000, 1000)
+    if max_duration_ms:
+        approx_chunk_ms = min(approx_chunk_ms, max_duration_ms)
+
     chunks = []
     start = 0
     i = 0
@@ -880,6 +928,9 @@ def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
 
     while start < duration_ms:
         end = min(start + approx_chunk_ms, duration_ms)
+        if end < duration_ms:
+            end = find_split_point(audio, start, end)
+
         chunk = audio[start:end]
         chunk_path = f"{base}_chunk_{i}.{format}"
         chunk.export(chunk_path, format=format, bitrate=bitrate)
@@ -894,20 +945,38 @@ def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
             os.remove(chunk_path)
             raise Exception("Audio chunk cannot be reduced below max file size.")
 
-        chunks.append(chunk_path)
+        chunks.append((chunk_path, start))
         start = end
         i += 1
 
     return chunks
 
 
+def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
+    """
+    Splits audio into chunks not exceeding max_bytes.
+    Returns a list of chunk file paths. If audio fits, returns list with original path.
+    """
+    return [
+        chunk_path
+        for chunk_path, _ in split_audio_segments(
+            file_path, max_bytes, format=format, bitrate=bitrate
+        )
+    ]
+
+
 @router.post("/transcriptions")
 def transcription(
     request: Request,
     file: UploadFile = File(...),
     language: Optional[str] = Form(None),
+    stream: bool = Form(False),
     user=Depends(get_verified_user),
 ):
+    """
+    Transcribes an audio file. With `stream`, the transcript is returned as
+    server-sent events, one per segment, so long recordings show progressively.
+    """
     log.info(f"file.content_type: {file.content_type}")
 
     SUPPORTED_CONTENT_TYPES = {"video/webm"}  # Extend if you add more video types!
@@ -940,6 +1009,12 @@ def transcription(
             if language:
                 metadata = {"language": language}
 
+            if stream:
+                return StreamingResponse(
+                    transcribe_stream(request, file_path, metadata),
+                    media_type="text/event-stream",
+                )
+
             result = transcribe(request, file_path, metadata)
 
             return {
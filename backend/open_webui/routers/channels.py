@@ -240,7 +240,9 @@ async def post_new_message(
         )
 
     try:
-        message = Messages.insert_new_message(form_data, channel.id, user.id)
+        message = await Messages.insert_new_message_async(
+            form_data, channel.id, user.id
+        )
 
         if message:
             event_data = {
@@ -37,9 +37,22 @@ router = APIRouter()
 @router.get("/", response_model=list[ChatTitleIdResponse])
 @router.get("/list", response_model=list[ChatTitleIdResponse])
 async def get_session_user_chat_list(
-    user=Depends(get_verified_user), page: Optional[int] = None
+    user=Depends(get_verified_user),
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
 ):
-    if page is not None:
+    if cursor is not None:
+        # Keyset pagination: `cursor` is `<updated_at>:<id>` of the last item of the previous page
+        try:
+            return Chats.get_chat_title_id_list_by_user_id(
+                user.id, cursor=cursor, limit=60
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=ERROR_MESSAGES.DEFAULT(e),
+            )
+    elif page is not None:
         limit = 60
         skip = (page - 1) * limit
 
@@ -77,6 +90,7 @@ async def delete_all_user_chats(request: Request, user=Depends(get_verified_user
 async def get_user_chat_list_by_user_id(
     user_id: str,
     page: Optional[int] = None,
+    cursor: Optional[str] = None,
     query: Optional[str] = None,
     order_by: Optional[str] = None,
     direction: Optional[str] = None,
@@ -102,9 +116,20 @@ async def get_user_chat_list_by_user_id(
     if direction:
         filter["direction"] = direction
 
-    return Chats.get_chat_list_by_user_id(
-        user_id, include_archived=True, filter=filter, skip=skip, limit=limit
-    )
+    try:
+        return Chats.get_chat_list_by_user_id(
+            user_id,
+            include_archived=True,
+            filter=filter,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
 
 
 ############################
@@ -285,6 +310,7 @@ async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
 @router.get("/archived", response_model=list[ChatTitleIdResponse])
 async def get_archived_session_user_chat_list(
     page: Optional[int] = None,
+    cursor: Optional[str] = None,
     query: Optional[str] = None,
     order_by: Optional[str] = None,
     direction: Optional[str] = None,
@@ -304,15 +330,22 @@ async def get_archived_session_user_chat_list(
     if direction:
         filter["direction"] = direction
 
-    chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_archived_chat_list_by_user_id(
-            user.id,
-            filter=filter,
-            skip=skip,
-            limit=limit,
+    try:
+        chat_list = [
+            ChatTitleIdResponse(**chat.model_dump())
+            for chat in Chats.get_archived_chat_list_by_user_id(
+                user.id,
+                filter=filter,
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        ]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
         )
-    ]
 
     return chat_list
 
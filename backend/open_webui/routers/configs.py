@@ -7,7 +7,14 @@ from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.config import get_config, save_config
 from open_webui.config import BannerModel
 
-from open_webui.utils.tools import get_tool_server_data, get_tool_servers_data
+from open_webui.arcade_tools import ARCADE_TOOL_CATALOG
+from open_webui.utils.rate_limit import RATE_LIMITER
+from open_webui.utils.tools import (
+    TOOL_SERVER_SPEC_CACHE,
+    get_tool_server_data,
+    get_tool_server_url,
+    get_tool_servers_data,
+)
 
 
 router = APIRouter()
@@ -137,6 +144,34 @@ async def verify_tool_servers_config(
         )
 
 
+@router.get("/tool_servers/health")
+async def get_tool_servers_health(request: Request, user=Depends(get_admin_user)):
+    """
+    Outcome of the last spec fetch of each tool server, None if not fetched yet.
+    """
+    return [
+        {
+            "idx": idx,
+            "url": connection.get("url"),
+            "health": TOOL_SERVER_SPEC_CACHE.get_health(
+                get_tool_server_url(connection)
+            ),
+        }
+        for idx, connection in enumerate(
+            request.app.state.config.TOOL_SERVER_CONNECTIONS
+        )
+    ]
+
+
+@router.get("/rate_limits")
+async def get_rate_limits_stats(request: Request, user=Depends(get_admin_user)):
+    """
+    Chat completions held to the requests/tokens per minute budgets: admitted,
+    queued and rejected counts, queue depth and budget usage of each bucket.
+    """
+    return RATE_LIMITER.get_stats()
+
+
 ############################
 # Arcade Tools Config
 ############################
@@ -182,16 +217,12 @@ async def set_arcade_tools_config(
 async def reset_arcade_tools_config(request: Request, user=Depends(get_admin_user)):
     request.app.state.config.ARCADE_TOOLS_CONFIG = []
 
-    arcade_tool_mapper = {}
-    for tool in request.app.state.ARCADE_TOOLS:
-        arcade_tool_mapper[tool.qualified_name] = tool
-    
     for toolset in request.app.state.ARCADE_TOOLS_TO_DISPLAY.keys():
         tools = []
         for tool in request.app.state.ARCADE_TOOLS_TO_DISPLAY[toolset]:
             tools.append({
                 "name": tool,
-                "description": arcade_tool_mapper[tool].description,
+                "description": ARCADE_TOOL_CATALOG.get_tool(tool).description,
                 "enabled": True,
             })
         request.app.state.config.ARCADE_TOOLS_CONFIG.append({
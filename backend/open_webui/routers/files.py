@@ -2,6 +2,7 @@ import logging
 import os
 import uuid
 import json
+from email.utils import formatdate, parsedate_to_datetime
 from fnmatch import fnmatch
 from pathlib import Path
 from typing import Optional
@@ -18,9 +19,16 @@ from fastapi import (
     status,
     Query,
 )
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import (
+    FileResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from open_webui.config import ENABLE_STORAGE_PRESIGNED_URL_REDIRECT
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import ENABLE_BACKGROUND_FILE_PROCESSING, SRC_LOG_LEVELS
 
 from open_webui.models.users import Users
 from open_webui.models.files import (
@@ -32,9 +40,14 @@ from open_webui.models.files import (
 from open_webui.models.knowledge import Knowledges
 
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
-from open_webui.routers.retrieval import ProcessFileForm, process_file
+from open_webui.routers.retrieval import (
+    ProcessFileForm,
+    process_file,
+    reuse_processed_file,
+)
 from open_webui.routers.audio import transcribe
 from open_webui.storage.provider import Storage
+from open_webui.utils.file_processing import FILE_PROCESSING_POOL
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from pydantic import BaseModel
 
@@ -77,13 +90,139 @@ def has_access_to_file(
     return has_access
 
 
+############################
+# Serve stored file contents
+############################
+
+
+def is_not_modified(request: Request, etag: str, last_modified: int) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return etag in [tag.strip() for tag in if_none_match.split(",")] or (
+            if_none_match.strip() == "*"
+        )
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= last_modified
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+async def get_file_content_response(
+    request: Request,
+    file: FileModel,
+    headers: dict,
+    media_type: Optional[str] = None,
+):
+    """
+    Serves the stored contents of `file`. Stored blobs never change, so the
+    content hash is used as a strong ETag and conditional requests are answered
+    without fetching the file; byte ranges are handled by FileResponse.
+    """
+    if file.sha256:
+        headers = {
+            **headers,
+            "ETag": f'"{file.sha256}"',
+            "Last-Modified": formatdate(file.created_at, usegmt=True),
+        }
+        if is_not_modified(request, headers["ETag"], file.created_at):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={
+                    "ETag": headers["ETag"],
+                    "Last-Modified": headers["Last-Modified"],
+                },
+            )
+
+    if ENABLE_STORAGE_PRESIGNED_URL_REDIRECT:
+        presigned_url = Storage.get_presigned_url(
+            file.path,
+            content_type=media_type,
+            content_disposition=headers.get("Content-Disposition"),
+        )
+        if presigned_url:
+            return RedirectResponse(presigned_url)
+
+    # Remote providers may have to download the file into the local cache first
+    file_path = Path(await run_in_threadpool(Storage.get_file, file.path))
+
+    if file_path.is_file():
+        return FileResponse(file_path, headers=headers, media_type=media_type)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+
 ############################
 # Upload File
 ############################
 
 
+def process_uploaded_file(
+    request: Request,
+    file_id: str,
+    content_type: Optional[str],
+    source_file: Optional[FileModel],
+    user,
+):
+    """Processes a freshly uploaded file; run by FILE_PROCESSING_POOL."""
+    from open_webui.retrieval.upstage_parser import generate_upstage_document_parsing_async
+
+    file = Files.get_file_by_id(file_id)
+
+    if source_file:
+        reuse_processed_file(request, file.id, source_file, user=user)
+    # 🎯 Async document parse (Upstage API) for supported formats
+    elif content_type in [
+        "image/jpeg", "image/png", "image/bmp", "application/pdf",
+        "image/tiff", "image/heic",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  # .docx
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation",  # .pptx
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",  # .xlsx
+        "application/x-hwp",  # .hwp
+        "application/vnd.hancom.hwp",  # alternative hwp
+        "application/vnd.hancom.hwpx",  # .hwpx
+    ]:
+        file_path_on_disk = Storage.get_file(file.path)
+        request_id = generate_upstage_document_parsing_async(
+            model="document-parse",
+            file_path=file_path_on_disk,
+            key=request.app.state.config.RAG_UPSTAGE_API_KEY
+        )
+        Files.update_file_metadata_by_id(file.id, {"request_id": request_id})
+    elif content_type in [
+        "audio/mpeg",
+        "audio/wav",
+        "audio/ogg",
+        "audio/x-m4a",
+    ]:
+        file_path_on_disk = Storage.get_file(file.path)
+        result = transcribe(request, file_path_on_disk)
+
+        process_file(
+            request,
+            ProcessFileForm(file_id=file.id, content=result.get("text", "")),
+            user=user,
+        )
+    elif (not content_type.startswith(("image/", "video/"))) or (
+        request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
+    ):
+        process_file(request, ProcessFileForm(file_id=file.id), user=user)
+    else:
+        log.info(
+            f"File type {content_type} is not provided, but trying to process anyway"
+        )
+        process_file(request, ProcessFileForm(file_id=file.id), user=user)
+
+
 @router.post("/", response_model=FileModelResponse)
-def upload_file(
+async def upload_file(
     request: Request,
     file: UploadFile = File(...),
     metadata: Optional[dict | str] = Form(None),
@@ -91,7 +230,6 @@ def upload_file(
     internal: bool = False,
     user=Depends(get_verified_user),
 ):
-    from open_webui.retrieval.upstage_parser import generate_upstage_document_parsing_async
     log.info(f"file.content_type: {file.content_type}")
 
     if isinstance(metadata, str):
@@ -104,6 +242,14 @@ def upload_file(
             )
     file_metadata = metadata if metadata else {}
 
+    # Refuse before storing anything if the user already has too much in flight
+    background = process and ENABLE_BACKGROUND_FILE_PROCESSING
+    if background and not FILE_PROCESSING_POOL.can_admit(user.id):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ERROR_MESSAGES.FILE_PROCESSING_QUEUE_FULL,
+        )
+
     try:
         unsanitized_filename = file.filename
         filename = os.path.basename(unsanitized_filename)
@@ -135,107 +281,85 @@ def upload_file(
             "OpenWebUI-User-Name": user.name,
             "OpenWebUI-File-Id": id,
         }
-        contents, file_path = Storage.upload_file(file.file, filename, tags)
-
-        # file_item = Files.insert_new_file(
-        #     user.id,
-        #     FileForm(
-        #         **{
-        #             "id": id,
-        #             "filename": name,
-        #             "path": file_path,
-        #             "meta": {
-        #                 "name": name,
-        #                 "content_type": file.content_type,
-        #                 "size": len(contents),
-        #                 "data": file_metadata,
-        #             },
-        #         }
-        #     ),
-        # )
-
-        request_id = None
+        file_info, file_path = await run_in_threadpool(
+            Storage.upload_file, file.file, filename, tags
+        )
+        sha256 = file_info["sha256"]
+
+        # Identical content is already stored: keep a single blob shared by path
+        # and reuse its parse results instead of processing it again
+        duplicate_file = next(iter(Files.get_files_by_sha256(sha256)), None)
+        if (
+            duplicate_file
+            and duplicate_file.path
+            and duplicate_file.path != file_path
+            and os.path.dirname(duplicate_file.path) == os.path.dirname(file_path)
+        ):
+            await run_in_threadpool(Storage.delete_file, file_path)
+            file_path = duplicate_file.path
+
+        source_file = Files.get_processed_file_by_sha256(sha256) if process else None
 
         # Save file metadata
         meta_data = {
             "name": name,
             "content_type": file.content_type,
-            "size": len(contents),
+            "size": file_info["size"],
+            "sha256": sha256,
             "data": file_metadata,
         }
 
-        if process:
-            try:
-                # 🎯 Async document parse (Upstage API) for supported formats
-                if file.content_type in [
-                    "image/jpeg", "image/png", "image/bmp", "application/pdf",
-                    "image/tiff", "image/heic",
-                    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  # .docx
-                    "application/vnd.openxmlformats-officedocument.presentationml.presentation",  # .pptx
-                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",  # .xlsx
-                    "application/x-hwp",  # .hwp
-                    "application/vnd.hancom.hwp",  # alternative hwp
-                    "application/vnd.hancom.hwpx",  # .hwpx
-                ]:
-                    file_path_on_disk = Storage.get_file(file_path)
-                    request_id = generate_upstage_document_parsing_async(
-                        model="document-parse",
-                        file_path=file_path_on_disk,
-                        key=request.app.state.config.RAG_UPSTAGE_API_KEY
-                    )
-                    meta_data["request_id"] = request_id
-                elif file.content_type in [
-                    "audio/mpeg",
-                    "audio/wav",
-                    "audio/ogg",
-                    "audio/x-m4a",
-                ]:
-                    file_path = Storage.get_file(file_path)
-                    result = transcribe(request, file_path)
-
-                    process_file(
-                        request,
-                        ProcessFileForm(file_id=id, content=result.get("text", "")),
-                        user=user,
-                    )
-                elif (not file.content_type.startswith(("image/", "video/"))) or (
-                    request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
-                ):
-                    process_file(request, ProcessFileForm(file_id=id), user=user)
-                else:
-                    log.info(
-                        f"File type {file.content_type} is not provided, but trying to process anyway"
-                    )
-                    process_file(request, ProcessFileForm(file_id=id), user=user)
-
-                # file_item = Files.get_file_by_id(id=id)
-            # except Exception as e:
-            #     log.exception(e)
-            #     log.error(f"Error processing file: {file_item.id}")
-            #     file_item = FileModelResponse(
-            #         **{
-            #             **file_item.model_dump(),
-            #             "error": str(e.detail) if hasattr(e, "detail") else str(e),
-            #         }
-            #     )
-            except Exception as e:
-                log.exception(e)
-                log.error(f"Error processing file: {id}")
-                meta_data["error"] = str(e.detail) if hasattr(e, "detail") else str(e)
-
-        # Insert or update after processing/ID generation
         file_item = Files.insert_new_file(
             user.id,
             FileForm(
                 **{
                     "id": id,
+                    "sha256": sha256,
                     "filename": name,
                     "path": file_path,
-                    "meta": meta_data,
+                    "meta": (
+                        {**meta_data, "status": "pending"} if background else meta_data
+                    ),
                 }
             ),
         )
-    
+
+        if file_item and process and not background:
+            try:
+                await run_in_threadpool(
+                    process_uploaded_file,
+                    request,
+                    id,
+                    file.content_type,
+                    source_file,
+                    user,
+                )
+            except Exception as e:
+                log.exception(e)
+                log.error(f"Error processing file: {id}")
+                Files.update_file_metadata_by_id(
+                    id, {"error": str(e.detail) if hasattr(e, "detail") else str(e)}
+                )
+            file_item = Files.get_file_by_id(id)
+
+        # Processing runs in the background; its progress is reported through
+        # the file status and "file-events" socket messages
+        if file_item and background:
+            if not FILE_PROCESSING_POOL.submit(
+                id,
+                user.id,
+                process_uploaded_file,
+                request,
+                id,
+                file.content_type,
+                source_file,
+                user,
+            ):
+                await FILE_PROCESSING_POOL.set_status(
+                    id, user.id, "failed", ERROR_MESSAGES.FILE_PROCESSING_QUEUE_FULL
+                )
+            file_item = Files.get_file_by_id(id)
+
         if file_item:
             return file_item
         else:
@@ -368,6 +492,39 @@ async def get_file_by_id(id: str, user=Depends(get_verified_user)):
         )
 
 
+############################
+# Get File Process Status By Id
+############################
+
+
+@router.get("/{id}/process/status")
+async def get_file_process_status_by_id(id: str, user=Depends(get_verified_user)):
+    file = Files.get_file_by_id(id)
+
+    if not file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    if (
+        file.user_id == user.id
+        or user.role == "admin"
+        or has_access_to_file(id, "read", user)
+    ):
+        meta = file.meta or {}
+        # Files processed before their upload returned carry no status
+        return {
+            "status": meta.get("status", "failed" if meta.get("error") else "completed"),
+            "error": meta.get("error"),
+        }
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+
 ############################
 # Get File Data Content By Id
 ############################
@@ -448,7 +605,10 @@ async def update_file_data_content_by_id(
 
 @router.get("/{id}/content")
 async def get_file_content_by_id(
-    id: str, user=Depends(get_verified_user), attachment: bool = Query(False)
+    request: Request,
+    id: str,
+    user=Depends(get_verified_user),
+    attachment: bool = Query(False),
 ):
     file = Files.get_file_by_id(id)
 
@@ -464,44 +624,32 @@ async def get_file_content_by_id(
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
-            file_path = Path(file_path)
-
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                # Handle Unicode filenames
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)  # RFC5987 encoding
-
-                content_type = file.meta.get("content_type")
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)
-                headers = {}
-
-                if attachment:
+            # Handle Unicode filenames
+            content_type = file.meta.get("content_type")
+            filename = file.meta.get("name", file.filename)
+            encoded_filename = quote(filename)  # RFC5987 encoding
+            headers = {}
+
+            if attachment:
+                headers["Content-Disposition"] = (
+                    f"attachment; filename*=UTF-8''{encoded_filename}"
+                )
+            else:
+                if content_type == "application/pdf" or filename.lower().endswith(
+                    ".pdf"
+                ):
+                    headers["Content-Disposition"] = (
+                        f"inline; filename*=UTF-8''{encoded_filename}"
+                    )
+                    content_type = "application/pdf"
+                elif content_type != "text/plain":
                     headers["Content-Disposition"] = (
                         f"attachment; filename*=UTF-8''{encoded_filename}"
                     )
-                else:
-                    if content_type == "application/pdf" or filename.lower().endswith(
-                        ".pdf"
-                    ):
-                        headers["Content-Disposition"] = (
-                            f"inline; filename*=UTF-8''{encoded_filename}"
-                        )
-                        content_type = "application/pdf"
-                    elif content_type != "text/plain":
-                        headers["Content-Disposition"] = (
-                            f"attachment; filename*=UTF-8''{encoded_filename}"
-                        )
-
-                return FileResponse(file_path, headers=headers, media_type=content_type)
 
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=ERROR_MESSAGES.NOT_FOUND,
-                )
+            return await get_file_content_response(
+                request, file, headers, media_type=content_type
+            )
         except Exception as e:
             log.exception(e)
             log.error("Error getting file content")
@@ -566,7 +714,9 @@ async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
 
 
 @router.get("/{id}/content/{file_name}")
-async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
+async def get_file_content_by_id(
+    request: Request, id: str, user=Depends(get_verified_user)
+):
     file = Files.get_file_by_id(id)
 
     if not file:
@@ -590,17 +740,7 @@ async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
         }
 
         if file_path:
-            file_path = Storage.get_file(file_path)
-            file_path = Path(file_path)
-
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                return FileResponse(file_path, headers=headers)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=ERROR_MESSAGES.NOT_FOUND,
-                )
+            return await get_file_content_response(request, file, headers)
         else:
             # File path doesn’t exist, return the content as .txt if possible
             file_content = file.content.get("content", "")
@@ -645,7 +785,14 @@ async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
         # We should add Chroma cleanup here
 
         result = Files.delete_file_by_id(id)
-        if result:
+        if not result:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=ERROR_MESSAGES.DEFAULT("Error deleting file"),
+            )
+
+        # The blob may be shared with other files of identical content
+        if file.path and not Files.get_file_count_by_path(file.path):
             try:
                 Storage.delete_file(file.path)
             except Exception as e:
@@ -655,12 +802,7 @@ async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=ERROR_MESSAGES.DEFAULT("Error deleting files"),
                 )
-            return {"message": "File deleted successfully"}
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=ERROR_MESSAGES.DEFAULT("Error deleting file"),
-            )
+        return {"message": "File deleted successfully"}
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -16,6 +16,8 @@ from open_webui.utils.plugin import (
     load_function_module_by_id,
     replace_imports,
     get_function_module_from_cache,
+    remove_function_module,
+    set_function_module,
 )
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
@@ -169,8 +171,9 @@ async def create_new_function(
             )
             form_data.meta.manifest = frontmatter
 
-            FUNCTIONS = request.app.state.FUNCTIONS
-            FUNCTIONS[form_data.id] = function_module
+            set_function_module(
+                request, form_data.id, function_module, form_data.content
+            )
 
             function = Functions.insert_new_function(user.id, function_type, form_data)
 
@@ -285,8 +288,7 @@ async def update_function_by_id(
         )
         form_data.meta.manifest = frontmatter
 
-        FUNCTIONS = request.app.state.FUNCTIONS
-        FUNCTIONS[id] = function_module
+        set_function_module(request, id, function_module, form_data.content)
 
         updated = {**form_data.model_dump(exclude={"id"}), "type": function_type}
         log.debug(updated)
@@ -320,9 +322,7 @@ async def delete_function_by_id(
     result = Functions.delete_function_by_id(id)
 
     if result:
-        FUNCTIONS = request.app.state.FUNCTIONS
-        if id in FUNCTIONS:
-            del FUNCTIONS[id]
+        remove_function_module(request, id)
 
     return result
 
@@ -1,7 +1,9 @@
 from typing import List, Optional
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, File, HTTPException, status, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 import logging
+import zipfile
 
 from open_webui.models.knowledge import (
     Knowledges,
@@ -10,6 +12,18 @@ from open_webui.models.knowledge import (
     KnowledgeUserResponse,
 )
 from open_webui.models.files import Files, FileModel, FileMetadataResponse
+from open_webui.models.jobs import Jobs, JobModel
+from open_webui.retrieval.ingest import (
+    KNOWLEDGE_INGEST_JOB_TYPE,
+    KNOWLEDGE_REINDEX_JOB_TYPE,
+    RUNNING_JOBS,
+    get_running_job,
+    insert_new_knowledge_ingest_job,
+    insert_new_knowledge_reindex_job,
+    plan_knowledge_reindex,
+    start_knowledge_ingest_job,
+    store_archive_files,
+)
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 from open_webui.routers.retrieval import (
     process_file,
@@ -166,80 +180,47 @@ async def create_new_knowledge(
 ############################
 
 
-@router.post("/reindex", response_model=bool)
+@router.post("/reindex", response_model=Optional[JobModel])
 async def reindex_knowledge_files(request: Request, user=Depends(get_verified_user)):
+    """
+    Starts a background job reprocessing the knowledge base files whose index
+    fingerprint (content, loader, chunking and embedding settings) is stale.
+    Only one reindex job runs at a time; an interrupted job is resumed by
+    starting a new one, as files it completed are no longer stale.
+    """
     if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.UNAUTHORIZED,
         )
 
-    knowledge_bases = Knowledges.get_knowledge_bases()
-
-    log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
+    job = get_running_job(KNOWLEDGE_REINDEX_JOB_TYPE)
+    if job:
+        return job
 
-    deleted_knowledge_bases = []
+    items, reset_collection_names = await run_in_threadpool(
+        plan_knowledge_reindex, request
+    )
+    log.info(
+        f"Reindexing {len(items)} stale knowledge files, rebuilding {len(reset_collection_names)} collections"
+    )
 
-    for knowledge_base in knowledge_bases:
-        # -- Robust error handling for missing or invalid data
-        if not knowledge_base.data or not isinstance(knowledge_base.data, dict):
-            log.warning(
-                f"Knowledge base {knowledge_base.id} has no data or invalid data ({knowledge_base.data!r}). Deleting."
-            )
-            try:
-                Knowledges.delete_knowledge_by_id(id=knowledge_base.id)
-                deleted_knowledge_bases.append(knowledge_base.id)
-            except Exception as e:
-                log.error(
-                    f"Failed to delete invalid knowledge base {knowledge_base.id}: {e}"
-                )
-            continue
+    job = insert_new_knowledge_reindex_job(user.id, items)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Error creating reindex job"),
+        )
 
+    for collection_name in reset_collection_names:
         try:
-            file_ids = knowledge_base.data.get("file_ids", [])
-            files = Files.get_files_by_ids(file_ids)
-            try:
-                if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
-                    VECTOR_DB_CLIENT.delete_collection(
-                        collection_name=knowledge_base.id
-                    )
-            except Exception as e:
-                log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
-                continue  # Skip, don't raise
-
-            failed_files = []
-            for file in files:
-                try:
-                    process_file(
-                        request,
-                        ProcessFileForm(
-                            file_id=file.id, collection_name=knowledge_base.id
-                        ),
-                        user=user,
-                    )
-                except Exception as e:
-                    log.error(
-                        f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
-                    )
-                    failed_files.append({"file_id": file.id, "error": str(e)})
-                    continue
-
+            if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+                VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
         except Exception as e:
-            log.error(f"Error processing knowledge base {knowledge_base.id}: {str(e)}")
-            # Don't raise, just continue
-            continue
+            log.error(f"Error deleting collection {collection_name}: {str(e)}")
 
-        if failed_files:
-            log.warning(
-                f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
-            )
-            for failed in failed_files:
-                log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
-
-    log.info(
-        f"Reindexing completed. Deleted {len(deleted_knowledge_bases)} invalid knowledge bases: {deleted_knowledge_bases}"
-    )
-    return True
+    start_knowledge_ingest_job(request, job.id, user)
+    return job
 
 
 ############################
@@ -528,10 +509,24 @@ def remove_file_from_knowledge_by_id(
         pass
 
     try:
-        # Remove the file's collection from vector database
-        file_collection = f"file-{form_data.file_id}"
-        if VECTOR_DB_CLIENT.has_collection(collection_name=file_collection):
-            VECTOR_DB_CLIENT.delete_collection(collection_name=file_collection)
+        # Remove the file's collections from vector database, keeping those still
+        # shared with other files of identical content
+        file_collections = {f"file-{form_data.file_id}"}
+        shared_collection = (file.meta or {}).get("collection_name") or ""
+        if shared_collection.startswith("file-"):
+            file_collections.add(shared_collection)
+
+        if file.sha256:
+            for other_file in Files.get_files_by_sha256(file.sha256):
+                if other_file.id != file.id:
+                    file_collections.discard(
+                        (other_file.meta or {}).get("collection_name")
+                    )
+                    file_collections.discard(f"file-{other_file.id}")
+
+        for file_collection in file_collections:
+            if VECTOR_DB_CLIENT.has_collection(collection_name=file_collection):
+                VECTOR_DB_CLIENT.delete_collection(collection_name=file_collection)
     except Exception as e:
         log.debug("This was most likely caused by bypassing embedding processing")
         log.debug(e)
@@ -758,3 +753,140 @@ def add_files_to_knowledge_batch(
         **knowledge.model_dump(),
         files=Files.get_file_metadatas_by_ids(existing_file_ids),
     )
+
+
+############################
+# Bulk ingestion jobs
+############################
+
+
+class KnowledgeIngestForm(BaseModel):
+    file_ids: list[str]
+
+
+def get_writable_knowledge(id: str, user):
+    knowledge = Knowledges.get_knowledge_by_id(id=id)
+    if not knowledge:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    if (
+        knowledge.user_id != user.id
+        and not has_access(user.id, "write", knowledge.access_control)
+        and user.role != "admin"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
+        )
+
+    return knowledge
+
+
+def create_knowledge_ingest_job(
+    request: Request, knowledge_id: str, file_ids: list[str], user
+) -> JobModel:
+    if not file_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("No files to ingest"),
+        )
+
+    job = insert_new_knowledge_ingest_job(user.id, knowledge_id, file_ids)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Error creating ingestion job"),
+        )
+
+    start_knowledge_ingest_job(request, job.id, user)
+    return job
+
+
+@router.post("/{id}/files/ingest", response_model=Optional[JobModel])
+async def ingest_files_to_knowledge(
+    request: Request,
+    id: str,
+    form_data: KnowledgeIngestForm,
+    user=Depends(get_verified_user),
+):
+    """
+    Starts a background job adding many files to a knowledge base. Progress is
+    reported by GET /jobs/{job_id} and "job-events" socket messages.
+    """
+    get_writable_knowledge(id, user)
+    return create_knowledge_ingest_job(request, id, form_data.file_ids, user)
+
+
+@router.post("/{id}/files/ingest/archive", response_model=Optional[JobModel])
+async def ingest_archive_to_knowledge(
+    request: Request,
+    id: str,
+    file: UploadFile = File(...),
+    user=Depends(get_verified_user),
+):
+    """Stores every file of a zip archive and ingests them into a knowledge base."""
+    get_writable_knowledge(id, user)
+
+    try:
+        file_ids = await run_in_threadpool(
+            store_archive_files, request, file.file, user
+        )
+    except zipfile.BadZipFile:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Invalid zip archive"),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT(e),
+        )
+
+    return create_knowledge_ingest_job(request, id, file_ids, user)
+
+
+def get_knowledge_ingest_job(job_id: str, user) -> JobModel:
+    job = Jobs.get_job_by_id(job_id)
+    if (
+        not job
+        or job.type not in [KNOWLEDGE_INGEST_JOB_TYPE, KNOWLEDGE_REINDEX_JOB_TYPE]
+        or (job.user_id != user.id and user.role != "admin")
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=Optional[JobModel])
+async def get_knowledge_job_by_id(job_id: str, user=Depends(get_verified_user)):
+    return get_knowledge_ingest_job(job_id, user)
+
+
+@router.post("/jobs/{job_id}/retry", response_model=Optional[JobModel])
+async def retry_knowledge_job_by_id(
+    request: Request, job_id: str, user=Depends(get_verified_user)
+):
+    """Runs the items of an ingestion or reindex job that have not completed again."""
+    job = get_knowledge_ingest_job(job_id, user)
+    if job.type == KNOWLEDGE_REINDEX_JOB_TYPE:
+        if user.role != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=ERROR_MESSAGES.UNAUTHORIZED,
+            )
+    else:
+        get_writable_knowledge(job.data["knowledge_id"], user)
+
+    if job_id in RUNNING_JOBS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Job is already running"),
+        )
+
+    start_knowledge_ingest_job(request, job_id, user)
+    return Jobs.get_job_by_id(job_id)
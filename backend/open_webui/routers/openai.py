@@ -2,6 +2,7 @@ import asyncio
 import hashlib
 import json
 import logging
+import math
 from pathlib import Path
 from typing import Literal, Optional, overload
 
@@ -42,6 +43,14 @@ from open_webui.utils.misc import (
 )
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.rate_limit import (
+    RATE_LIMITER,
+    RateLimitExceeded,
+    estimate_tokens,
+    get_connection_rate_limit,
+    get_user_group_rate_limit,
+)
+from open_webui.utils.speech_cache import SPEECH_CACHE, stream_speech_request
 from open_webui.utils.access_control import has_access
 
 
@@ -196,21 +205,11 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         body = await request.body()
         name = hashlib.sha256(body).hexdigest()
 
-        SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
-        SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        file_path = SPEECH_CACHE_DIR.joinpath(f"{name}.mp3")
-        file_body_path = SPEECH_CACHE_DIR.joinpath(f"{name}.json")
-
-        # Check if the file already exists in the cache
-        if file_path.is_file():
-            return FileResponse(file_path)
-
         url = request.app.state.config.OPENAI_API_BASE_URLS[idx]
 
-        r = None
-        try:
-            r = requests.post(
-                url=f"{url}/audio/speech",
+        def synthesize():
+            return stream_speech_request(
+                f"{url}/audio/speech",
                 data=body,
                 headers={
                     "Content-Type": "application/json",
@@ -234,38 +233,15 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                         else {}
                     ),
                 },
-                stream=True,
             )
 
-            r.raise_for_status()
-
-            # Save the streaming content to a file
-            with open(file_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-
-            with open(file_body_path, "w") as f:
-                json.dump(json.loads(body.decode("utf-8")), f)
-
-            # Return the saved file
-            return FileResponse(file_path)
-
-        except Exception as e:
-            log.exception(e)
-
-            detail = None
-            if r is not None:
-                try:
-                    res = r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error']}"
-                except Exception:
-                    detail = f"External: {e}"
+        try:
+            payload = json.loads(body.decode("utf-8"))
+        except Exception:
+            payload = None
 
-            raise HTTPException(
-                status_code=r.status_code if r else 500,
-                detail=detail if detail else "Open WebUI: Server Connection Error",
-            )
+        # Served from the cache, or streamed while it is cached
+        return await SPEECH_CACHE.get_response(name, synthesize, payload)
 
     except ValueError:
         raise HTTPException(status_code=401, detail=ERROR_MESSAGES.OPENAI_NOT_FOUND)
@@ -826,6 +802,25 @@ async def generate_chat_completion(
         request_url = f"{url}/chat/completions"
         headers["Authorization"] = f"Bearer {key}"
 
+    # Wait for the requests/tokens per minute budgets of the connection and
+    # of the user's group
+    rate_limits = [
+        rate_limit
+        for rate_limit in [
+            get_connection_rate_limit(url, key, api_config),
+            await get_user_group_rate_limit(user),
+        ]
+        if rate_limit
+    ]
+    try:
+        await RATE_LIMITER.acquire(rate_limits, estimate_tokens(payload), user.id)
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+
     payload = json.dumps(payload)
 
     r = None
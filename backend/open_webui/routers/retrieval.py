@@ -46,6 +46,7 @@ from open_webui.retrieval.upstage_parser import generate_upstage_document_parsin
 # Web search engines
 from open_webui.retrieval.web.main import SearchResult
 from open_webui.retrieval.web.utils import get_web_loader
+from open_webui.retrieval.web.fetch import WEB_PAGE_CACHE
 from open_webui.retrieval.web.brave import search_brave
 from open_webui.retrieval.web.kagi import search_kagi
 from open_webui.retrieval.web.mojeek import search_mojeek
@@ -104,6 +105,7 @@ from open_webui.env import (
 )
 
 from open_webui.constants import ERROR_MESSAGES
+from open_webui.utils.model_manager import MODEL_MANAGER
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -190,6 +192,59 @@ def get_rf(
     return rf
 
 
+def load_embedding_model(app, auto_update: bool = False, preload: bool = True):
+    """
+    Loads the local embedding model as `app.state.ef` in the background, or on
+    its first use without `preload`. Unloads it if the embedding engine does
+    not use one.
+    """
+    engine = app.state.config.RAG_EMBEDDING_ENGINE
+    model = app.state.config.RAG_EMBEDDING_MODEL
+
+    if engine == "" and model:
+        app.state.ef = MODEL_MANAGER.load(
+            "embedding",
+            (engine, model),
+            lambda: get_ef(engine, model, auto_update),
+            lazy=not preload,
+        )
+    else:
+        MODEL_MANAGER.unload("embedding")
+        app.state.ef = None
+
+
+def load_reranking_model(
+    app, auto_update: bool = False, on_error=None, preload: bool = True
+):
+    """
+    Loads the reranking model as `app.state.rf` in the background, or on its
+    first use without `preload`. Unloads it if none is configured. Reranking is
+    skipped if the model fails to load.
+    """
+    engine = app.state.config.RAG_RERANKING_ENGINE
+    model = app.state.config.RAG_RERANKING_MODEL
+    url = app.state.config.RAG_EXTERNAL_RERANKER_URL
+    key = app.state.config.RAG_EXTERNAL_RERANKER_API_KEY
+
+    if not model:
+        MODEL_MANAGER.unload("reranking")
+        app.state.rf = None
+        return
+
+    def handle_error(e: Exception):
+        app.state.rf = None
+        if on_error:
+            on_error(e)
+
+    app.state.rf = MODEL_MANAGER.load(
+        "reranking",
+        (engine, model, url, key),
+        lambda: get_rf(engine, model, url, key, auto_update),
+        on_error=handle_error,
+        lazy=not preload,
+    )
+
+
 ##########################################
 #
 # API routes
@@ -341,10 +396,7 @@ async def update_embedding_config(
                 form_data.embedding_batch_size
             )
 
-        request.app.state.ef = get_ef(
-            request.app.state.config.RAG_EMBEDDING_ENGINE,
-            request.app.state.config.RAG_EMBEDDING_MODEL,
-        )
+        load_embedding_model(request.app)
 
         request.app.state.EMBEDDING_FUNCTION = get_embedding_function(
             request.app.state.config.RAG_EMBEDDING_ENGINE,
@@ -699,6 +751,7 @@ async def update_rag_config(
     )
     # Free up memory if hybrid search is disabled
     if not request.app.state.config.ENABLE_RAG_HYBRID_SEARCH:
+        MODEL_MANAGER.unload("reranking")
         request.app.state.rf = None
 
     request.app.state.config.TOP_K_RERANKER = (
@@ -851,17 +904,11 @@ async def update_rag_config(
     try:
         request.app.state.config.RAG_RERANKING_MODEL = form_data.RAG_RERANKING_MODEL
 
-        try:
-            request.app.state.rf = get_rf(
-                request.app.state.config.RAG_RERANKING_ENGINE,
-                request.app.state.config.RAG_RERANKING_MODEL,
-                request.app.state.config.RAG_EXTERNAL_RERANKER_URL,
-                request.app.state.config.RAG_EXTERNAL_RERANKER_API_KEY,
-                True,
-            )
-        except Exception as e:
+        def disable_hybrid_search(e: Exception):
             log.error(f"Error loading reranking model: {e}")
             request.app.state.config.ENABLE_RAG_HYBRID_SEARCH = False
+
+        load_reranking_model(request.app, True, on_error=disable_hybrid_search)
     except Exception as e:
         log.exception(f"Problem updating reranking model: {e}")
         raise HTTPException(
@@ -1124,6 +1171,108 @@ async def update_rag_config(
 ####################################
 
 
+def split_documents(request: Request, docs: list[Document]) -> list[Document]:
+    """Splits documents into chunks with the configured text splitter."""
+    if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    elif request.app.state.config.TEXT_SPLITTER == "token":
+        log.info(
+            f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
+        )
+
+        tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
+        text_splitter = TokenTextSplitter(
+            encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+    return text_splitter.split_documents(docs)
+
+
+def get_vector_metadatas(
+    request: Request, docs: list[Document], metadata: Optional[dict] = None
+) -> list[dict]:
+    """Vector DB metadata for each document chunk."""
+    metadatas = [
+        {
+            **doc.metadata,
+            **(metadata if metadata else {}),
+            "embedding_config": json.dumps(
+                {
+                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+                }
+            ),
+        }
+        for doc in docs
+    ]
+
+    # ChromaDB does not like datetime formats
+    # for meta-data so convert them to string.
+    for metadata in metadatas:
+        # Copied from the file meta, only relevant to the file itself
+        metadata.pop("index_fingerprints", None)
+
+        for key, value in metadata.items():
+            if (
+                isinstance(value, datetime)
+                or isinstance(value, list)
+                or isinstance(value, dict)
+            ):
+                metadata[key] = str(value)
+
+    return metadatas
+
+
+def get_rag_embedding_function(request: Request):
+    """Embedding function for the configured RAG embedding engine and model."""
+    return get_embedding_function(
+        request.app.state.config.RAG_EMBEDDING_ENGINE,
+        request.app.state.config.RAG_EMBEDDING_MODEL,
+        request.app.state.ef,
+        (
+            request.app.state.config.RAG_OPENAI_API_BASE_URL
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_BASE_URL
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else (
+                    request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
+                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
+                    else request.app.state.config.RAG_UPSTAGE_API_BASE_URL
+                )
+            )
+        ),
+        (
+            request.app.state.config.RAG_OPENAI_API_KEY
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_API_KEY
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else (
+                    request.app.state.config.RAG_AZURE_OPENAI_API_KEY
+                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
+                    else request.app.state.config.RAG_UPSTAGE_API_KEY
+                )
+            )
+        ),
+        request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+        azure_api_version=(
+            request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
+            else None
+        ),
+    )
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -1168,57 +1317,13 @@ def save_docs_to_vector_db(
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
     if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
-
-        docs = text_splitter.split_documents(docs)
+        docs = split_documents(request, docs)
 
     if len(docs) == 0:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
 
     texts = [doc.page_content for doc in docs]
-    metadatas = [
-        {
-            **doc.metadata,
-            **(metadata if metadata else {}),
-            "embedding_config": json.dumps(
-                {
-                    "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
-                    "model": request.app.state.config.RAG_EMBEDDING_MODEL,
-                }
-            ),
-        }
-        for doc in docs
-    ]
-
-    # ChromaDB does not like datetime formats
-    # for meta-data so convert them to string.
-    for metadata in metadatas:
-        for key, value in metadata.items():
-            if (
-                isinstance(value, datetime)
-                or isinstance(value, list)
-                or isinstance(value, dict)
-            ):
-                metadata[key] = str(value)
+    metadatas = get_vector_metadatas(request, docs, metadata)
 
     try:
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
@@ -1236,43 +1341,7 @@ def save_docs_to_vector_db(
         log.info(f"adding to collection {collection_name}")
         print("embedding_function", request.app.state.config.RAG_EMBEDDING_ENGINE)
         print("embedding_engine", request.app.state.config.RAG_EMBEDDING_MODEL)
-        embedding_function = get_embedding_function(
-            request.app.state.config.RAG_EMBEDDING_ENGINE,
-            request.app.state.config.RAG_EMBEDDING_MODEL,
-            request.app.state.ef,
-            (
-                request.app.state.config.RAG_OPENAI_API_BASE_URL
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_BASE_URL
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else (
-                        request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
-                        if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
-                        else request.app.state.config.RAG_UPSTAGE_API_BASE_URL
-                    )
-                )
-            ),
-            (
-                request.app.state.config.RAG_OPENAI_API_KEY
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_API_KEY
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else (
-                        request.app.state.config.RAG_AZURE_OPENAI_API_KEY
-                        if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
-                        else request.app.state.config.RAG_UPSTAGE_API_KEY
-                    )
-                )
-            ),
-            request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
-            azure_api_version=(
-                request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
-                else None
-            ),
-        )
+        embedding_function = get_rag_embedding_function(request)
 
         embeddings = embedding_function(
             list(map(lambda x: x.replace("\n", " "), texts)),
@@ -1301,6 +1370,124 @@ def save_docs_to_vector_db(
         raise e
 
 
+def save_web_pages_to_vector_db(
+    request: Request,
+    docs: list[Document],
+    collection_name: str,
+    engine: str = "",
+    user=None,
+) -> bool:
+    """
+    Saves loaded web pages to a collection, replacing it. Pages cached in
+    WEB_PAGE_CACHE reuse the chunks and embeddings they were saved with by an
+    earlier search, so only new pages are split and embedded.
+    """
+    fingerprint = json.dumps(get_chunk_fingerprint(request), sort_keys=True)
+
+    chunks = []
+    new_docs = []
+    for doc in docs:
+        page_chunks = WEB_PAGE_CACHE.get_chunks(
+            doc.metadata.get("source", ""), fingerprint, engine
+        )
+        if page_chunks is None:
+            new_docs.append(doc)
+        else:
+            chunks.extend(page_chunks)
+
+    log.info(
+        f"save_web_pages_to_vector_db: {len(docs) - len(new_docs)} cached and "
+        f"{len(new_docs)} new page documents to {collection_name}"
+    )
+
+    if new_docs:
+        split_docs = split_documents(request, new_docs)
+        texts = [doc.page_content for doc in split_docs]
+        metadatas = get_vector_metadatas(request, split_docs)
+
+        embeddings = []
+        if texts:
+            embedding_function = get_rag_embedding_function(request)
+            embeddings = embedding_function(
+                list(map(lambda x: x.replace("\n", " "), texts)),
+                prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+                user=user,
+            )
+
+        chunks_by_source = {doc.metadata.get("source", ""): [] for doc in new_docs}
+        for idx, text in enumerate(texts):
+            chunk = {
+                "text": text,
+                "vector": embeddings[idx],
+                "metadata": metadatas[idx],
+            }
+            chunks_by_source.setdefault(metadatas[idx].get("source", ""), []).append(
+                chunk
+            )
+            chunks.append(chunk)
+
+        for source, page_chunks in chunks_by_source.items():
+            WEB_PAGE_CACHE.set_chunks(source, fingerprint, page_chunks, engine)
+
+    if len(chunks) == 0:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        log.info(f"deleting existing collection {collection_name}")
+        VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+
+    VECTOR_DB_CLIENT.insert(
+        collection_name=collection_name,
+        items=[{"id": str(uuid.uuid4()), **chunk} for chunk in chunks],
+    )
+    return True
+
+
+# Fingerprint fields that change the vector dimensions of a collection
+EMBEDDING_FINGERPRINT_KEYS = ["embedding_engine", "embedding_model"]
+
+
+def get_chunk_fingerprint(request: Request) -> dict:
+    """The splitter and embedding settings the vectors of any content depend on."""
+    return {
+        "text_splitter": request.app.state.config.TEXT_SPLITTER,
+        "chunk_size": request.app.state.config.CHUNK_SIZE,
+        "chunk_overlap": request.app.state.config.CHUNK_OVERLAP,
+        "embedding_engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+        "embedding_model": request.app.state.config.RAG_EMBEDDING_MODEL,
+    }
+
+
+def get_index_fingerprint(request: Request, file: FileModel) -> dict:
+    """
+    Everything the vectors of a file depend on. Reindexing only reprocesses
+    files whose stored fingerprint differs from the current one.
+    """
+    return {
+        "content_hash": file.hash or file.sha256,
+        "loader": "upstage:document-parse",
+        **get_chunk_fingerprint(request),
+    }
+
+
+def record_index_fingerprint(request: Request, file_id: str, collection_name: str):
+    """Stores the fingerprint a file was just indexed into a collection with."""
+    file = Files.get_file_by_id(file_id)
+    if not file:
+        return
+
+    fingerprints = (file.meta or {}).get("index_fingerprints") or {}
+    Files.update_file_metadata_by_id(
+        file_id,
+        {
+            "index_fingerprints": {
+                **fingerprints,
+                collection_name: get_index_fingerprint(request, file),
+            }
+        },
+    )
+
+
 class ProcessFileForm(BaseModel):
     file_id: str
     content: Optional[str] = None
@@ -1475,6 +1662,8 @@ def process_file(
                             "collection_name": collection_name,
                         },
                     )
+                    if form_data.collection_name:
+                        record_index_fingerprint(request, file.id, collection_name)
 
                     return {
                         "status": True,
@@ -1506,6 +1695,46 @@ def process_file(
             )
 
 
+def reuse_processed_file(
+    request: Request, file_id: str, source_file: FileModel, user
+) -> dict:
+    """
+    Reuses the parse results of `source_file`, an already processed file with
+    identical contents, instead of parsing `file_id` again. The vector collection
+    is shared only between files of the same owner, since its chunks carry the
+    source file's name; otherwise the reused content is embedded into the
+    file's own collection.
+    """
+    file = Files.get_file_by_id(file_id)
+    text_content = source_file.data.get("content", "")
+
+    collection_name = (source_file.meta or {}).get("collection_name") or ""
+    if not collection_name.startswith("file-"):
+        # Processed into a knowledge base; only its own file collection is shareable
+        collection_name = f"file-{source_file.id}"
+
+    if (
+        file.user_id == source_file.user_id
+        and not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
+        and VECTOR_DB_CLIENT.has_collection(collection_name=collection_name)
+    ):
+        Files.update_file_data_by_id(file.id, {"content": text_content})
+        Files.update_file_hash_by_id(file.id, source_file.hash)
+        Files.update_file_metadata_by_id(
+            file.id, {"collection_name": collection_name}
+        )
+        return {
+            "status": True,
+            "collection_name": collection_name,
+            "filename": file.filename,
+            "content": text_content,
+        }
+
+    return process_file(
+        request, ProcessFileForm(file_id=file.id, content=text_content), user=user
+    )
+
+
 class ProcessTextForm(BaseModel):
     name: str
     content: str
@@ -1937,13 +2166,20 @@ async def process_web_search(
                 if hasattr(result, "snippet")
             ]
         else:
-            loader = get_web_loader(
-                urls,
-                verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
-                requests_per_second=request.app.state.config.WEB_SEARCH_CONCURRENT_REQUESTS,
-                trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
+
+            async def load_docs(urls: list[str]) -> list[Document]:
+                loader = get_web_loader(
+                    urls,
+                    verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
+                    requests_per_second=request.app.state.config.WEB_SEARCH_CONCURRENT_REQUESTS,
+                    trust_env=request.app.state.config.WEB_SEARCH_TRUST_ENV,
+                )
+                return await loader.aload()
+
+            # Pages loaded by a recent search are reused instead of refetched
+            docs = await WEB_PAGE_CACHE.load(
+                urls, load_docs, engine=request.app.state.config.WEB_LOADER_ENGINE
             )
-            docs = await loader.aload()
 
         urls = [
             doc.metadata.get("source") for doc in docs if doc.metadata.get("source")
@@ -1973,11 +2209,11 @@ async def process_web_search(
 
             try:
                 await run_in_threadpool(
-                    save_docs_to_vector_db,
+                    save_web_pages_to_vector_db,
                     request,
                     docs,
                     collection_name,
-                    overwrite=True,
+                    engine=request.app.state.config.WEB_LOADER_ENGINE,
                     user=user,
                 )
             except Exception as e:
@@ -2263,6 +2499,7 @@ def process_files_batch(
                 Files.update_file_metadata_by_id(
                     result.file_id, {"collection_name": collection_name}
                 )
+                record_index_fingerprint(request, result.file_id, collection_name)
                 result.status = "completed"
 
         except Exception as e:
@@ -10,6 +10,7 @@ from open_webui.utils.chat import generate_chat_completion
 from open_webui.utils.task import (
     title_generation_template,
     query_generation_template,
+    plan_generation_template,
     image_prompt_generation_template,
     autocomplete_generation_template,
     tags_generation_template,
@@ -28,6 +29,7 @@ from open_webui.config import (
     DEFAULT_TAGS_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_IMAGE_PROMPT_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_QUERY_GENERATION_PROMPT_TEMPLATE,
+    DEFAULT_PLAN_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_AUTOCOMPLETE_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_EMOJI_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_MOA_GENERATION_PROMPT_TEMPLATE,
@@ -62,6 +64,7 @@ async def get_task_config(request: Request, user=Depends(get_verified_user)):
         "ENABLE_TITLE_GENERATION": request.app.state.config.ENABLE_TITLE_GENERATION,
         "ENABLE_SEARCH_QUERY_GENERATION": request.app.state.config.ENABLE_SEARCH_QUERY_GENERATION,
         "ENABLE_RETRIEVAL_QUERY_GENERATION": request.app.state.config.ENABLE_RETRIEVAL_QUERY_GENERATION,
+        "ENABLE_PLAN_GENERATION": request.app.state.config.ENABLE_PLAN_GENERATION,
         "QUERY_GENERATION_PROMPT_TEMPLATE": request.app.state.config.QUERY_GENERATION_PROMPT_TEMPLATE,
         "TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE": request.app.state.config.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE,
     }
@@ -79,6 +82,7 @@ class TaskConfigForm(BaseModel):
     ENABLE_TAGS_GENERATION: bool
     ENABLE_SEARCH_QUERY_GENERATION: bool
     ENABLE_RETRIEVAL_QUERY_GENERATION: bool
+    ENABLE_PLAN_GENERATION: Optional[bool] = None
     QUERY_GENERATION_PROMPT_TEMPLATE: str
     TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE: str
 
@@ -115,6 +119,10 @@ async def update_task_config(
     request.app.state.config.ENABLE_RETRIEVAL_QUERY_GENERATION = (
         form_data.ENABLE_RETRIEVAL_QUERY_GENERATION
     )
+    if form_data.ENABLE_PLAN_GENERATION is not None:
+        request.app.state.config.ENABLE_PLAN_GENERATION = (
+            form_data.ENABLE_PLAN_GENERATION
+        )
 
     request.app.state.config.QUERY_GENERATION_PROMPT_TEMPLATE = (
         form_data.QUERY_GENERATION_PROMPT_TEMPLATE
@@ -135,6 +143,7 @@ async def update_task_config(
         "ENABLE_TAGS_GENERATION": request.app.state.config.ENABLE_TAGS_GENERATION,
         "ENABLE_SEARCH_QUERY_GENERATION": request.app.state.config.ENABLE_SEARCH_QUERY_GENERATION,
         "ENABLE_RETRIEVAL_QUERY_GENERATION": request.app.state.config.ENABLE_RETRIEVAL_QUERY_GENERATION,
+        "ENABLE_PLAN_GENERATION": request.app.state.config.ENABLE_PLAN_GENERATION,
         "QUERY_GENERATION_PROMPT_TEMPLATE": request.app.state.config.QUERY_GENERATION_PROMPT_TEMPLATE,
         "TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE": request.app.state.config.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE,
     }
@@ -460,6 +469,82 @@ async def generate_queries(
         )
 
 
+@router.post("/plan/completions")
+async def generate_plan(
+    request: Request, form_data: dict, user=Depends(get_verified_user)
+):
+    """
+    Plans a chat turn in one completion: web search queries if `web_search`
+    is set, retrieval queries if `retrieval` is set, and calls to the `tools`
+    specs if any. The response is parsed with `get_plan_from_response`.
+    """
+    if not request.app.state.config.ENABLE_PLAN_GENERATION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Plan generation is disabled",
+        )
+
+    if getattr(request.state, "direct", False) and hasattr(request.state, "model"):
+        models = {
+            request.state.model["id"]: request.state.model,
+        }
+    else:
+        models = request.app.state.MODELS
+
+    model_id = form_data["model"]
+    if model_id not in models:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found",
+        )
+
+    # Check if the user has a custom task model
+    # If the user has a custom task model, use that model
+    task_model_id = get_task_model_id(
+        model_id,
+        request.app.state.config.TASK_MODEL,
+        request.app.state.config.TASK_MODEL_EXTERNAL,
+        models,
+    )
+
+    log.debug(f"generating plan using model {task_model_id} for user {user.email}")
+
+    content = plan_generation_template(
+        DEFAULT_PLAN_GENERATION_PROMPT_TEMPLATE,
+        form_data["messages"],
+        web_search=form_data.get("web_search", False),
+        retrieval=form_data.get("retrieval", False),
+        tools_specs=form_data.get("tools", None),
+        user={"name": user.name},
+    )
+
+    payload = {
+        "model": task_model_id,
+        "messages": [{"role": "user", "content": content}],
+        "stream": False,
+        "metadata": {
+            **(request.state.metadata if hasattr(request.state, "metadata") else {}),
+            "task": str(TASKS.PLAN_GENERATION),
+            "task_body": form_data,
+            "chat_id": form_data.get("chat_id", None),
+        },
+    }
+
+    # Process the payload through the pipeline
+    try:
+        payload = await process_pipeline_inlet_filter(request, payload, user, models)
+    except Exception as e:
+        raise e
+
+    try:
+        return await generate_chat_completion(request, form_data=payload, user=user)
+    except Exception as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"detail": str(e)},
+        )
+
+
 @router.post("/auto/completions")
 async def generate_autocompletion(
     request: Request, form_data: dict, user=Depends(get_verified_user)
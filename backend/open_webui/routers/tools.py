@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from pathlib import Path
 from typing import Optional
@@ -13,15 +14,26 @@ from open_webui.models.tools import (
     ToolUserResponse,
     Tools,
 )
-from open_webui.utils.plugin import load_tool_module_by_id, replace_imports
+from open_webui.utils.plugin import (
+    get_tool_module_from_cache,
+    load_tool_module_by_id,
+    remove_tool_module,
+    replace_imports,
+    set_tool_module,
+)
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import RedirectResponse
 from open_webui.utils.tools import get_tool_specs
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
 from open_webui.env import SRC_LOG_LEVELS
-from open_webui.arcade_tools import get_arcade_tools
+from open_webui.arcade_tools import (
+    ARCADE_AUTH_CACHE,
+    get_arcade_client,
+    get_arcade_tools,
+)
 
 from open_webui.utils.tools import get_tool_servers_data
 
@@ -94,6 +106,40 @@ async def get_tools(request: Request, user=Depends(get_verified_user)):
     return tools
 
 
+############################
+# ArcadeAuthCallback
+############################
+
+
+@router.get("/arcade/auth/callback")
+async def arcade_auth_callback(
+    request: Request, flow_id: Optional[str] = None, user=Depends(get_verified_user)
+):
+    """
+    Where users return to after authorizing an Arcade toolkit. Confirms the
+    authorization flow for the user if Arcade sends one, and drops their cached
+    authorization statuses, so the tools list shows the new ones.
+    """
+    ARCADE_AUTH_CACHE.invalidate(user.id)
+
+    next_uri = "/"
+    if flow_id:
+        try:
+            client = get_arcade_client(request.app.state.config.ARCADE_API_KEY)
+            response = await asyncio.to_thread(
+                client.auth.confirm_user, flow_id=flow_id, user_id=user.id
+            )
+            next_uri = response.next_uri or next_uri
+        except Exception as e:
+            log.exception(f"Error confirming Arcade authorization: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=ERROR_MESSAGES.DEFAULT(e),
+            )
+
+    return RedirectResponse(next_uri)
+
+
 ############################
 # GetToolList
 ############################
@@ -230,10 +276,9 @@ async def create_new_tools(
             )
             form_data.meta.manifest = frontmatter
 
-            TOOLS = request.app.state.TOOLS
-            TOOLS[form_data.id] = tool_module
+            set_tool_module(request, form_data.id, tool_module, form_data.content)
 
-            specs = get_tool_specs(TOOLS[form_data.id])
+            specs = get_tool_specs(tool_module)
             tools = Tools.insert_new_tool(user.id, form_data, specs)
 
             tool_cache_dir = CACHE_DIR / "tools" / form_data.id
@@ -317,10 +362,9 @@ async def update_tools_by_id(
         tool_module, frontmatter = load_tool_module_by_id(id, content=form_data.content)
         form_data.meta.manifest = frontmatter
 
-        TOOLS = request.app.state.TOOLS
-        TOOLS[id] = tool_module
+        set_tool_module(request, id, tool_module, form_data.content)
 
-        specs = get_tool_specs(TOOLS[id])
+        specs = get_tool_specs(tool_module)
 
         updated = {
             **form_data.model_dump(exclude={"id"}),
@@ -373,9 +417,7 @@ async def delete_tools_by_id(
 
     result = Tools.delete_tool_by_id(id)
     if result:
-        TOOLS = request.app.state.TOOLS
-        if id in TOOLS:
-            del TOOLS[id]
+        remove_tool_module(request, id)
 
     return result
 
@@ -415,11 +457,7 @@ async def get_tools_valves_spec_by_id(
 ):
     tools = Tools.get_tool_by_id(id)
     if tools:
-        if id in request.app.state.TOOLS:
-            tools_module = request.app.state.TOOLS[id]
-        else:
-            tools_module, _ = load_tool_module_by_id(id)
-            request.app.state.TOOLS[id] = tools_module
+        tools_module = get_tool_module_from_cache(request, id, tools)
 
         if hasattr(tools_module, "Valves"):
             Valves = tools_module.Valves
@@ -458,11 +496,7 @@ async def update_tools_valves_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    if id in request.app.state.TOOLS:
-        tools_module = request.app.state.TOOLS[id]
-    else:
-        tools_module, _ = load_tool_module_by_id(id)
-        request.app.state.TOOLS[id] = tools_module
+    tools_module = get_tool_module_from_cache(request, id, tools)
 
     if not hasattr(tools_module, "Valves"):
         raise HTTPException(
@@ -514,11 +548,7 @@ async def get_tools_user_valves_spec_by_id(
 ):
     tools = Tools.get_tool_by_id(id)
     if tools:
-        if id in request.app.state.TOOLS:
-            tools_module = request.app.state.TOOLS[id]
-        else:
-            tools_module, _ = load_tool_module_by_id(id)
-            request.app.state.TOOLS[id] = tools_module
+        tools_module = get_tool_module_from_cache(request, id, tools)
 
         if hasattr(tools_module, "UserValves"):
             UserValves = tools_module.UserValves
@@ -538,11 +568,7 @@ async def update_tools_user_valves_by_id(
     tools = Tools.get_tool_by_id(id)
 
     if tools:
-        if id in request.app.state.TOOLS:
-            tools_module = request.app.state.TOOLS[id]
-        else:
-            tools_module, _ = load_tool_module_by_id(id)
-            request.app.state.TOOLS[id] = tools_module
+        tools_module = get_tool_module_from_cache(request, id, tools)
 
         if hasattr(tools_module, "UserValves"):
             UserValves = tools_module.UserValves
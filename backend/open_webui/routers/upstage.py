@@ -2,6 +2,7 @@ import asyncio
 import hashlib
 import json
 import logging
+import math
 from pathlib import Path
 from typing import Literal, Optional, overload
 
@@ -41,6 +42,20 @@ from open_webui.utils.misc import (
 )
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.rate_limit import (
+    RATE_LIMITER,
+    RateLimitExceeded,
+    estimate_tokens,
+    get_connection_rate_limit,
+    get_user_group_rate_limit,
+)
+from open_webui.utils.upstage_connections import (
+    UPSTAGE_CONNECTION_POOL,
+    ConnectionLease,
+    is_retryable_status,
+    parse_retry_after,
+)
+from open_webui.utils.speech_cache import SPEECH_CACHE, stream_speech_request
 from open_webui.utils.access_control import has_access
 
 
@@ -113,6 +128,16 @@ async def cleanup_response(
         await session.close()
 
 
+async def cleanup_connection_response(
+    response: Optional[aiohttp.ClientResponse],
+    lease: Optional[ConnectionLease],
+):
+    if response:
+        response.close()
+    if lease:
+        lease.release()
+
+
 # def openai_o1_o3_handler(payload):
 #     """
 #     Handle o1, o3 specific parameters
@@ -205,6 +230,25 @@ async def update_config(
     }
 
 
+@router.get("/connections/health")
+async def get_connections_health(request: Request, user=Depends(get_admin_user)):
+    """
+    Load balancing state of each connection: outcome of its last request,
+    requests in flight and seconds left on cool-down. None if not used yet.
+    """
+    return [
+        {
+            "idx": idx,
+            "url": url,
+            "health": UPSTAGE_CONNECTION_POOL.get_health(
+                url, request.app.state.config.UPSTAGE_API_KEYS[idx]
+            ),
+        }
+        for idx, url in enumerate(request.app.state.config.UPSTAGE_API_BASE_URLS)
+        if idx < len(request.app.state.config.UPSTAGE_API_KEYS)
+    ]
+
+
 @router.post("/audio/speech")
 async def speech(request: Request, user=Depends(get_verified_user)):
     idx = None
@@ -216,21 +260,11 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         body = await request.body()
         name = hashlib.sha256(body).hexdigest()
 
-        SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
-        SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        file_path = SPEECH_CACHE_DIR.joinpath(f"{name}.mp3")
-        file_body_path = SPEECH_CACHE_DIR.joinpath(f"{name}.json")
-
-        # Check if the file already exists in the cache
-        if file_path.is_file():
-            return FileResponse(file_path)
-
         url = request.app.state.config.UPSTAGE_API_BASE_URLS[idx]
 
-        r = None
-        try:
-            r = requests.post(
-                url=f"{url}/audio/speech",
+        def synthesize():
+            return stream_speech_request(
+                f"{url}/audio/speech",
                 data=body,
                 headers={
                     "Content-Type": "application/json",
@@ -254,38 +288,15 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                         else {}
                     ),
                 },
-                stream=True,
             )
 
-            r.raise_for_status()
-
-            # Save the streaming content to a file
-            with open(file_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-
-            with open(file_body_path, "w") as f:
-                json.dump(json.loads(body.decode("utf-8")), f)
-
-            # Return the saved file
-            return FileResponse(file_path)
-
-        except Exception as e:
-            log.exception(e)
-
-            detail = None
-            if r is not None:
-                try:
-                    res = r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error']}"
-                except Exception:
-                    detail = f"External: {e}"
+        try:
+            payload = json.loads(body.decode("utf-8"))
+        except Exception:
+            payload = None
 
-            raise HTTPException(
-                status_code=r.status_code if r else 500,
-                detail=detail if detail else "Open WebUI: Server Connection Error",
-            )
+        # Served from the cache, or streamed while it is cached
+        return await SPEECH_CACHE.get_response(name, synthesize, payload)
 
     except ValueError:
         raise HTTPException(status_code=401, detail=ERROR_MESSAGES.UPSTAGE_NOT_FOUND)
@@ -462,21 +473,25 @@ async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
         log.debug(f"merge_models_lists {model_lists}")
         merged_list = []
 
+        # A model served by several connections is listed once, with all
+        # their indexes, so its requests can be spread over them
+        merged_models = {}
         for idx, models in enumerate(model_lists):
             if models is not None and "error" not in models:
-
-                merged_list.extend(
-                    [
-                        {
-                            **model,
-                            "name": model.get("name", model["id"]),
-                            "owned_by": "upstage",
-                            "upstage": model,
-                            "urlIdx": idx,
-                        }
-                        for model in models
-                    ]
-                )
+                for model in models:
+                    if model["id"] in merged_models:
+                        merged_models[model["id"]]["urlIdxs"].append(idx)
+                        continue
+
+                    merged_models[model["id"]] = {
+                        **model,
+                        "name": model.get("name", model["id"]),
+                        "owned_by": "upstage",
+                        "upstage": model,
+                        "urlIdx": idx,
+                        "urlIdxs": [idx],
+                    }
+                    merged_list.append(merged_models[model["id"]])
 
         return merged_list
 
@@ -764,6 +779,15 @@ async def generate_chat_completion(
     model = request.app.state.UPSTAGE_MODELS.get(model_id)
     if model:
         idx = model["urlIdx"]
+        # Connections serving the model, its requests are spread over them
+        connections = {
+            url_idx: (
+                request.app.state.config.UPSTAGE_API_BASE_URLS[url_idx],
+                request.app.state.config.UPSTAGE_API_KEYS[url_idx],
+            )
+            for url_idx in model.get("urlIdxs", [idx])
+            if url_idx < len(request.app.state.config.UPSTAGE_API_BASE_URLS)
+        }
     else:
         raise HTTPException(
             status_code=404,
@@ -792,19 +816,10 @@ async def generate_chat_completion(
             "role": user.role,
         }
 
-    url = request.app.state.config.UPSTAGE_API_BASE_URLS[idx]
-    key = request.app.state.config.UPSTAGE_API_KEYS[idx]
-
     # Fix: o1,o3 does not support the "max_tokens" parameter, Modify "max_tokens" to "max_completion_tokens"
     # is_o1_o3 = payload["model"].lower().startswith(("o1", "o3-"))
     # if is_o1_o3:
     #     payload = openai_o1_o3_handler(payload)
-    if "api.upstage.ai" not in url:
-        # Remove "max_completion_tokens" from the payload for backward compatibility
-        if "max_completion_tokens" in payload:
-            payload["max_tokens"] = payload["max_completion_tokens"]
-            del payload["max_completion_tokens"]
-
     if "max_tokens" in payload and "max_completion_tokens" in payload:
         del payload["max_tokens"]
 
@@ -848,46 +863,107 @@ async def generate_chat_completion(
         else:
             return {"choices": [{"message": {"content": generic_error_message}}]}
 
-    # print("payload", payload)
-    payload = json.dumps(payload)
+    def get_connection_payload(url: str) -> str:
+        connection_payload = {**payload}
+        if "api.upstage.ai" not in url:
+            # Remove "max_completion_tokens" from the payload for backward compatibility
+            if "max_completion_tokens" in connection_payload:
+                connection_payload["max_tokens"] = connection_payload.pop(
+                    "max_completion_tokens"
+                )
+        return json.dumps(connection_payload)
 
     r = None
-    session = None
     streaming = False
     response = None
+    lease = None
 
-    try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
+    tokens = estimate_tokens(payload)
+    group_rate_limit = await get_user_group_rate_limit(user)
 
-        r = await session.request(
-            method="POST",
-            url=f"{url}/chat/completions",
-            data=payload,
-            headers={
-                "Authorization": f"Bearer {key}",
-                "Content-Type": "application/json",
-                **(
-                    {
-                        "HTTP-Referer": "https://openwebui.com/",
-                        "X-Title": "Open WebUI",
-                    }
-                    if "openrouter.ai" in url
-                    else {}
-                ),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS
-                    else {}
+    try:
+        # The user's group is charged once, however many connections are tried
+        if group_rate_limit:
+            await RATE_LIMITER.acquire([group_rate_limit], tokens, user.id)
+
+        tried = []
+        while True:
+            idx = UPSTAGE_CONNECTION_POOL.select(connections, exclude=tried)
+            tried.append(idx)
+            url, key = connections[idx]
+            # Whether a rate limit or server error is failed over to another connection
+            can_fail_over = len(tried) < len(connections)
+
+            connection_rate_limit = get_connection_rate_limit(
+                url,
+                key,
+                request.app.state.config.UPSTAGE_API_CONFIGS.get(
+                    str(idx),
+                    request.app.state.config.UPSTAGE_API_CONFIGS.get(url, {}),
                 ),
-            },
-        )
+            )
+            # Out of budget, another connection may have some left. The last
+            # one is waited for
+            if connection_rate_limit and not await RATE_LIMITER.acquire(
+                [connection_rate_limit], tokens, user.id, wait=not can_fail_over
+            ):
+                continue
+
+            lease = UPSTAGE_CONNECTION_POOL.acquire(url, key)
+            try:
+                r = await UPSTAGE_CONNECTION_POOL.get_session().request(
+                    method="POST",
+                    url=f"{url}/chat/completions",
+                    data=get_connection_payload(url),
+                    headers={
+                        "Authorization": f"Bearer {key}",
+                        "Content-Type": "application/json",
+                        **(
+                            {
+                                "HTTP-Referer": "https://openwebui.com/",
+                                "X-Title": "Open WebUI",
+                            }
+                            if "openrouter.ai" in url
+                            else {}
+                        ),
+                        **(
+                            {
+                                "X-OpenWebUI-User-Name": user.name,
+                                "X-OpenWebUI-User-Id": user.id,
+                                "X-OpenWebUI-User-Email": user.email,
+                                "X-OpenWebUI-User-Role": user.role,
+                            }
+                            if ENABLE_FORWARD_USER_INFO_HEADERS
+                            else {}
+                        ),
+                    },
+                    timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                lease.release()
+                UPSTAGE_CONNECTION_POOL.report_failure(url, key, error=str(e))
+                if can_fail_over:
+                    log.warning(f"Upstage connection {url} failed, failing over: {e}")
+                    continue
+                raise
+
+            if not is_retryable_status(r.status):
+                UPSTAGE_CONNECTION_POOL.report_success(url, key)
+                break
+
+            UPSTAGE_CONNECTION_POOL.report_failure(
+                url,
+                key,
+                status=r.status,
+                retry_after=parse_retry_after(r.headers.get("Retry-After")),
+            )
+            if not can_fail_over:
+                break
+
+            log.warning(f"Upstage connection {url} returned {r.status}, failing over")
+            r.close()
+            r = None
+            lease.release()
 
         # Check if response is SSE
         if "text/event-stream" in r.headers.get("Content-Type", ""):
@@ -897,7 +973,7 @@ async def generate_chat_completion(
                 status_code=r.status,
                 headers=dict(r.headers),
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    cleanup_connection_response, response=r, lease=lease
                 ),
             )
         else:
@@ -909,6 +985,12 @@ async def generate_chat_completion(
 
             r.raise_for_status()
             return response
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
     except Exception as e:
         log.exception(e)
 
@@ -924,10 +1006,11 @@ async def generate_chat_completion(
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
     finally:
-        if not streaming and session:
+        if not streaming:
             if r:
                 r.close()
-            await session.close()
+            if lease:
+                lease.release()
 
 
 @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
@@ -20,9 +20,21 @@ from open_webui.env import (
     WEBSOCKET_REDIS_LOCK_TIMEOUT,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
+    WEBSOCKET_EVENT_BATCH_INTERVAL,
+    WEBSOCKET_EVENT_BATCH_MAX_INTERVAL,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock
+from open_webui.socket.utils import (
+    ChatEventBatcher,
+    RedisDict,
+    RedisLock,
+    RedisRoomUserPool,
+    RedisUsagePool,
+    RedisUserPool,
+    RoomUserPool,
+    UsagePool,
+    UserPool,
+)
 
 from open_webui.env import (
     GLOBAL_LOG_LEVEL,
@@ -65,6 +77,9 @@ else:
 # Timeout duration in seconds
 TIMEOUT_DURATION = 3
 
+# Seconds the room counters of a crashed worker outlive the room's last session
+ROOM_USER_POOL_TTL = 600
+
 # Dictionary to maintain the user pool
 
 if WEBSOCKET_MANAGER == "redis":
@@ -77,15 +92,22 @@ if WEBSOCKET_MANAGER == "redis":
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
-    USER_POOL = RedisDict(
+    USER_POOL = RedisUserPool(
         "open-webui:user_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
     )
-    USAGE_POOL = RedisDict(
+    USAGE_POOL = RedisUsagePool(
         "open-webui:usage_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
+        timeout_secs=TIMEOUT_DURATION,
+    )
+    ROOM_USER_POOL = RedisRoomUserPool(
+        "open-webui:room_user_pool",
+        redis_url=WEBSOCKET_REDIS_URL,
+        redis_sentinels=redis_sentinels,
+        ttl_secs=ROOM_USER_POOL_TTL,
     )
 
     clean_up_lock = RedisLock(
@@ -99,8 +121,9 @@ if WEBSOCKET_MANAGER == "redis":
     release_func = clean_up_lock.release_lock
 else:
     SESSION_POOL = {}
-    USER_POOL = {}
-    USAGE_POOL = {}
+    USER_POOL = UserPool()
+    USAGE_POOL = UsagePool()
+    ROOM_USER_POOL = RoomUserPool()
     aquire_func = release_func = renew_func = lambda: True
 
 
@@ -116,28 +139,9 @@ async def periodic_usage_pool_cleanup():
                 raise Exception("Unable to renew usage pool cleanup lock.")
 
             now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
-                # Creating a list of sids to remove if they have timed out
-                expired_sids = [
-                    sid
-                    for sid, details in connections.items()
-                    if now - details["updated_at"] > TIMEOUT_DURATION
-                ]
-
-                for sid in expired_sids:
-                    del connections[sid]
-
-                if not connections:
-                    log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
-
-                send_usage = True
-
-            if send_usage:
-                # Emit updated usage information after cleaning
+
+            # Only emit when a model actually dropped out of use
+            if USAGE_POOL.remove_expired(now - TIMEOUT_DURATION):
                 await sio.emit("usage", {"models": get_models_in_use()})
 
             await asyncio.sleep(TIMEOUT_DURATION)
@@ -145,6 +149,20 @@ async def periodic_usage_pool_cleanup():
         release_func()
 
 
+async def periodic_room_user_pool_refresh():
+    # Runs on every worker, each refreshes the rooms of its own sessions
+    while True:
+        await asyncio.sleep(ROOM_USER_POOL_TTL // 4)
+        try:
+            rooms = sio.manager.rooms.get("/", {})
+            sids = rooms.get(None, {})
+            ROOM_USER_POOL.refresh(
+                [room for room in rooms if room is not None and room not in sids]
+            )
+        except Exception as e:
+            log.warning(f"Error refreshing the room user pool: {e}")
+
+
 app = socketio.ASGIApp(
     sio,
     socketio_path="/ws/socket.io",
@@ -153,25 +171,18 @@ app = socketio.ASGIApp(
 
 def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
-    return models_in_use
+    return USAGE_POOL.get_models()
 
 
 @sio.on("usage")
 async def usage(sid, data):
     if sid in SESSION_POOL:
         model_id = data["model"]
-        # Record the timestamp for the last update
-        current_time = int(time.time())
 
-        # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
-
-        # Broadcast the usage data to all clients
-        await sio.emit("usage", {"models": get_models_in_use()})
+        # Record the timestamp for the last update, and broadcast the usage data
+        # to all clients only when the model was not in use before
+        if USAGE_POOL.touch(model_id, sid, int(time.time())):
+            await sio.emit("usage", {"models": get_models_in_use()})
 
 
 @sio.event
@@ -181,18 +192,24 @@ async def connect(sid, environ, auth):
         data = decode_token(auth["token"])
 
         if data is not None and "id" in data:
-            user = Users.get_user_by_id(data["id"])
+            user = await Users.get_user_by_id_async(data["id"])
 
         if user:
             SESSION_POOL[sid] = user.model_dump()
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await enter_room(sid, user.id, get_user_room(user.id))
+            await emit_user_list(USER_POOL.add_session(user.id, sid), sid)
+            await sio.emit("usage", {"models": get_models_in_use()}, to=sid)
 
-            # print(f"user {user.name}({user.id}) connected with session ID {sid}")
-            await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
-            await sio.emit("usage", {"models": get_models_in_use()})
+
+def get_user_room(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+async def enter_room(sid, user_id, room):
+    # Keep the per-room user counters in step with the rooms the session is in
+    if room not in sio.rooms(sid):
+        await sio.enter_room(sid, room)
+        ROOM_USER_POOL.add(room, user_id)
 
 
 @sio.on("user-join")
@@ -206,25 +223,25 @@ async def user_join(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = await Users.get_user_by_id_async(data["id"])
     if not user:
         return
 
     SESSION_POOL[sid] = user.model_dump()
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    user_list_changed = USER_POOL.add_session(user.id, sid)
+
+    # Join the user's own room, which chat events are emitted to
+    await enter_room(sid, user.id, get_user_room(user.id))
 
     # Join all the channels
     channels = Channels.get_channels_by_user_id(user.id)
     log.debug(f"{channels=}")
     for channel in channels:
-        await sio.enter_room(sid, f"channel:{channel.id}")
+        await enter_room(sid, user.id, f"channel:{channel.id}")
 
     # print(f"user {user.name}({user.id}) connected with session ID {sid}")
 
-    await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    await emit_user_list(user_list_changed, sid)
     return {"id": user.id, "name": user.name}
 
 
@@ -238,7 +255,7 @@ async def join_channel(sid, data):
     if data is None or "id" not in data:
         return
 
-    user = Users.get_user_by_id(data["id"])
+    user = await Users.get_user_by_id_async(data["id"])
     if not user:
         return
 
@@ -246,7 +263,7 @@ async def join_channel(sid, data):
     channels = Channels.get_channels_by_user_id(user.id)
     log.debug(f"{channels=}")
     for channel in channels:
-        await sio.enter_room(sid, f"channel:{channel.id}")
+        await enter_room(sid, user.id, f"channel:{channel.id}")
 
 
 @sio.on("channel-events")
@@ -280,7 +297,16 @@ async def channel_events(sid, data):
 @sio.on("user-list")
 async def user_list(sid):
     if sid in SESSION_POOL:
-        await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+        await sio.emit("user-list", {"user_ids": USER_POOL.keys()}, to=sid)
+
+
+async def emit_user_list(changed: bool, sid: str):
+    # Broadcast only when the set of online users changed, otherwise just
+    # bring the requesting session up to date
+    if changed:
+        await sio.emit("user-list", {"user_ids": USER_POOL.keys()})
+    else:
+        await sio.emit("user-list", {"user_ids": USER_POOL.keys()}, to=sid)
 
 
 @sio.event
@@ -289,59 +315,69 @@ async def disconnect(sid):
         user = SESSION_POOL[sid]
         del SESSION_POOL[sid]
 
-        user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
-
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
+        for room in sio.rooms(sid):
+            if room != sid:
+                ROOM_USER_POOL.remove(room, user["id"])
 
-        await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+        if USER_POOL.remove_session(user["id"], sid):
+            await sio.emit("user-list", {"user_ids": USER_POOL.keys()})
     else:
         pass
         # print(f"Unknown session ID {sid} disconnected")
 
 
-def get_event_emitter(request_info, update_db=True):
-    async def __event_emitter__(event_data):
-        user_id = request_info["user_id"]
-
-        session_ids = list(
-            set(
-                USER_POOL.get(user_id, [])
-                + (
-                    [request_info.get("session_id")]
-                    if request_info.get("session_id")
-                    else []
-                )
-            )
+# Batchers of the users' rooms, shared by all the emitters of a room while
+# they have events to send
+EVENT_BATCHERS: dict[str, ChatEventBatcher] = {}
+
+
+def get_event_batcher(room: str) -> ChatEventBatcher:
+    batcher = EVENT_BATCHERS.get(room)
+    if batcher is None:
+
+        async def emit(event):
+            # A single emit to the user's room reaches all of their sessions
+            await sio.emit("chat-events", event, room=room)
+
+        def drop():
+            # The next event of the room creates a new batcher
+            if EVENT_BATCHERS.get(room) is batcher:
+                del EVENT_BATCHERS[room]
+
+        # Streaming deltas are merged into fewer frames
+        batcher = ChatEventBatcher(
+            emit,
+            interval=WEBSOCKET_EVENT_BATCH_INTERVAL / 1000,
+            max_interval=WEBSOCKET_EVENT_BATCH_MAX_INTERVAL / 1000,
+            on_idle=drop,
         )
+        EVENT_BATCHERS[room] = batcher
+    return batcher
 
-        emit_tasks = [
-            sio.emit(
-                "chat-events",
-                {
-                    "chat_id": request_info.get("chat_id", None),
-                    "message_id": request_info.get("message_id", None),
-                    "data": event_data,
-                },
-                to=session_id,
-            )
-            for session_id in session_ids
-        ]
 
-        await asyncio.gather(*emit_tasks)
+def get_event_emitter(request_info, update_db=True):
+    room = get_user_room(request_info["user_id"])
+
+    async def __event_emitter__(event_data):
+        await get_event_batcher(room).send(
+            {
+                "chat_id": request_info.get("chat_id", None),
+                "message_id": request_info.get("message_id", None),
+                "data": event_data,
+            }
+        )
 
         if update_db:
             # log.info(f"event_data: {event_data}")
             if "type" in event_data and event_data["type"] == "status":
-                Chats.add_message_status_to_chat_by_id_and_message_id(
+                await Chats.add_message_status_to_chat_by_id_and_message_id_async(
                     request_info["chat_id"],
                     request_info["message_id"],
                     event_data.get("data", {}),
                 )
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
+                message = await Chats.get_message_by_id_and_message_id_async(
                     request_info["chat_id"],
                     request_info["message_id"],
                 )
@@ -350,7 +386,7 @@ def get_event_emitter(request_info, update_db=True):
                     content = message.get("content", "")
                     content += event_data.get("data", {}).get("content", "")
 
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         request_info["chat_id"],
                         request_info["message_id"],
                         {
@@ -361,7 +397,7 @@ def get_event_emitter(request_info, update_db=True):
             if "type" in event_data and event_data["type"] == "ocr_result":
                 image_ocr = event_data.get("data", {})
                 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
@@ -372,7 +408,7 @@ def get_event_emitter(request_info, update_db=True):
             if "type" in event_data and event_data["type"] == "image_ocr_error":
                 image_ocr = event_data.get("data", {})
                 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
@@ -384,7 +420,7 @@ def get_event_emitter(request_info, update_db=True):
             if "type" in event_data and event_data["type"] == "replace":
                 content = event_data.get("data", {}).get("content", "")
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                     request_info["chat_id"],
                     request_info["message_id"],
                     {
@@ -422,20 +458,8 @@ def get_user_id_from_session_pool(sid):
 
 
 def get_user_ids_from_room(room):
-    active_session_ids = sio.manager.get_participants(
-        namespace="/",
-        room=room,
-    )
-
-    active_user_ids = list(
-        set(
-            [SESSION_POOL.get(session_id[0])["id"] for session_id in active_session_ids]
-        )
-    )
-    return active_user_ids
+    return ROOM_USER_POOL.get_user_ids(room)
 
 
 def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
-        return True
-    return False
+    return user_id in USER_POOL
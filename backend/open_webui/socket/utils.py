@@ -1,5 +1,9 @@
+import asyncio
 import json
+import time
 import uuid
+from typing import Optional
+
 from open_webui.utils.redis import get_redis_connection
 
 
@@ -89,3 +93,445 @@ class RedisDict:
         if key not in self:
             self[key] = default
         return self[key]
+
+
+class UsagePool:
+    """
+    In-memory pool of the models in use, keyed by (model, sid) with the
+    last-seen time of each session.
+    """
+
+    def __init__(self):
+        self.models = {}
+
+    def touch(self, model_id: str, sid: str, now: int) -> bool:
+        """Records usage of `model_id` by `sid`. Returns True if the model was not in use."""
+        added = model_id not in self.models
+        self.models.setdefault(model_id, {})[sid] = now
+        return added
+
+    def remove_expired(self, cutoff: int) -> bool:
+        """Drops sessions last seen before `cutoff`. Returns True if any model was removed."""
+        removed = False
+        for model_id, sessions in list(self.models.items()):
+            for sid, updated_at in list(sessions.items()):
+                if updated_at < cutoff:
+                    del sessions[sid]
+
+            if not sessions:
+                del self.models[model_id]
+                removed = True
+        return removed
+
+    def get_models(self) -> list[str]:
+        return list(self.models.keys())
+
+
+class RedisUsagePool:
+    """
+    Redis-backed pool of the models in use. Every model has a sorted set of
+    session ids scored by last-seen time, and an index sorted set scores each
+    model by its most recent use, so expiring idle models is a single
+    ZREMRANGEBYSCORE instead of a scan over all models and sessions.
+    """
+
+    def __init__(self, name, redis_url, redis_sentinels=[], timeout_secs=3):
+        self.name = name
+        self.models_key = f"{name}:models"
+        self.timeout_secs = timeout_secs
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+
+        # Local read-through cache of the model list, refreshed at most once per timeout
+        self._models_cache = None
+        self._models_cache_expires_at = 0
+
+    def _get_model_key(self, model_id: str) -> str:
+        return f"{self.name}:model:{model_id}"
+
+    def touch(self, model_id: str, sid: str, now: int) -> bool:
+        """Records usage of `model_id` by `sid`. Returns True if the model was not in use."""
+        model_key = self._get_model_key(model_id)
+
+        pipe = self.redis.pipeline()
+        pipe.zadd(self.models_key, {model_id: now})
+        pipe.zadd(model_key, {sid: now})
+        pipe.zremrangebyscore(model_key, "-inf", f"({now - self.timeout_secs}")
+        pipe.expire(model_key, self.timeout_secs * 2)
+        added, *_ = pipe.execute()
+
+        if added:
+            self._models_cache = None
+        return bool(added)
+
+    def remove_expired(self, cutoff: int) -> bool:
+        """Drops models last used before `cutoff`. Returns True if any model was removed."""
+        removed = self.redis.zremrangebyscore(self.models_key, "-inf", f"({cutoff}")
+
+        if removed:
+            self._models_cache = None
+        return bool(removed)
+
+    def get_models(self) -> list[str]:
+        now = time.time()
+        if self._models_cache is None or now >= self._models_cache_expires_at:
+            self._models_cache = self.redis.zrange(self.models_key, 0, -1)
+            self._models_cache_expires_at = now + self.timeout_secs
+        return list(self._models_cache)
+
+
+class UserPool:
+    """In-memory pool mapping user ids to their connected session ids."""
+
+    def __init__(self):
+        self.users = {}
+
+    def add_session(self, user_id: str, sid: str) -> bool:
+        """Returns True if the user had no other session."""
+        added = user_id not in self.users
+        self.users.setdefault(user_id, set()).add(sid)
+        return added
+
+    def remove_session(self, user_id: str, sid: str) -> bool:
+        """Returns True if this was the last session of the user."""
+        sessions = self.users.get(user_id)
+        if sessions is None:
+            return False
+
+        sessions.discard(sid)
+        if not sessions:
+            del self.users[user_id]
+            return True
+        return False
+
+    def get(self, user_id: str, default=None):
+        sessions = self.users.get(user_id)
+        return list(sessions) if sessions else default
+
+    def __contains__(self, user_id):
+        return user_id in self.users
+
+    def keys(self):
+        return list(self.users.keys())
+
+
+class RedisUserPool:
+    """
+    Redis-backed pool mapping user ids to their connected session ids. Each user
+    has a set of session ids and a set of active users is kept alongside, so
+    joins and leaves touch only the affected user instead of rewriting a
+    serialized list.
+    """
+
+    # Removes the session and, if it was the last one, the user, atomically
+    REMOVE_SESSION_SCRIPT = """
+    redis.call('SREM', KEYS[1], ARGV[1])
+    if redis.call('SCARD', KEYS[1]) == 0 then
+        return redis.call('SREM', KEYS[2], ARGV[2])
+    end
+    return 0
+    """
+
+    def __init__(self, name, redis_url, redis_sentinels=[]):
+        self.name = name
+        self.users_key = f"{name}:users"
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+        self._remove_session = self.redis.register_script(self.REMOVE_SESSION_SCRIPT)
+
+    def _get_sessions_key(self, user_id: str) -> str:
+        return f"{self.name}:user:{user_id}"
+
+    def add_session(self, user_id: str, sid: str) -> bool:
+        """Returns True if the user had no other session."""
+        pipe = self.redis.pipeline()
+        pipe.sadd(self._get_sessions_key(user_id), sid)
+        pipe.sadd(self.users_key, user_id)
+        _, added = pipe.execute()
+        return bool(added)
+
+    def remove_session(self, user_id: str, sid: str) -> bool:
+        """Returns True if this was the last session of the user."""
+        removed = self._remove_session(
+            keys=[self._get_sessions_key(user_id), self.users_key],
+            args=[sid, user_id],
+        )
+        return bool(removed)
+
+    def get(self, user_id: str, default=None):
+        sessions = self.redis.smembers(self._get_sessions_key(user_id))
+        return list(sessions) if sessions else default
+
+    def __contains__(self, user_id):
+        return bool(self.redis.sismember(self.users_key, user_id))
+
+    def keys(self):
+        return list(self.redis.smembers(self.users_key))
+
+
+class RoomUserPool:
+    """
+    In-memory counters of the sessions each user has in a room, maintained
+    incrementally as sessions enter rooms and disconnect.
+    """
+
+    def __init__(self):
+        self.rooms = {}
+
+    def add(self, room: str, user_id: str):
+        users = self.rooms.setdefault(room, {})
+        users[user_id] = users.get(user_id, 0) + 1
+
+    def remove(self, room: str, user_id: str):
+        users = self.rooms.get(room, {})
+        if user_id in users:
+            users[user_id] -= 1
+            if users[user_id] <= 0:
+                del users[user_id]
+
+        if not users:
+            self.rooms.pop(room, None)
+
+    def get_user_ids(self, room: str) -> list[str]:
+        return list(self.rooms.get(room, {}).keys())
+
+    def refresh(self, rooms: list[str]):
+        # Counters of a single process can't outlive its sessions
+        pass
+
+
+class RedisRoomUserPool:
+    """
+    Redis-backed counters of the sessions each user has in a room, stored as one
+    hash per room mapping user ids to session counts.
+
+    Every room expires `ttl_secs` after it was last refreshed. Each worker
+    refreshes the rooms its sessions are in, so the counters a crashed worker
+    could not decrement are dropped once no live session is left in the room.
+    """
+
+    # Decrements the counter and drops the user once it reaches zero, atomically
+    REMOVE_SCRIPT = """
+    local count = redis.call('HINCRBY', KEYS[1], ARGV[1], -1)
+    if count <= 0 then
+        redis.call('HDEL', KEYS[1], ARGV[1])
+    end
+    return count
+    """
+
+    def __init__(self, name, redis_url, redis_sentinels=[], ttl_secs=600):
+        self.name = name
+        self.ttl_secs = ttl_secs
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+        self._remove = self.redis.register_script(self.REMOVE_SCRIPT)
+
+    def _get_room_key(self, room: str) -> str:
+        return f"{self.name}:{room}"
+
+    def add(self, room: str, user_id: str):
+        room_key = self._get_room_key(room)
+
+        pipe = self.redis.pipeline()
+        pipe.hincrby(room_key, user_id, 1)
+        pipe.expire(room_key, self.ttl_secs)
+        pipe.execute()
+
+    def remove(self, room: str, user_id: str):
+        self._remove(keys=[self._get_room_key(room)], args=[user_id])
+
+    def get_user_ids(self, room: str) -> list[str]:
+        return self.redis.hkeys(self._get_room_key(room))
+
+    def refresh(self, rooms: list[str]):
+        """Extends the expiry of `rooms`, the ones with sessions on this worker."""
+        pipe = self.redis.pipeline()
+        for room in rooms:
+            pipe.expire(self._get_room_key(room), self.ttl_secs)
+        pipe.execute()
+
+
+def get_completion_delta_content(data: dict) -> Optional[str]:
+    """
+    The content of an upstream completion chunk forwarded as is, when it only
+    carries a content delta of a single choice; None otherwise.
+    """
+    choices = data.get("choices")
+    if not isinstance(choices, list) or len(choices) != 1:
+        return None
+    if data.get("usage") or data.get("error") or data.get("sources"):
+        return None
+
+    choice = choices[0]
+    delta = choice.get("delta")
+    if (
+        not isinstance(delta, dict)
+        or choice.get("finish_reason")
+        or choice.get("logprobs")
+        or not set(delta.keys()) <= {"role", "content"}
+    ):
+        return None
+
+    content = delta.get("content")
+    return content if isinstance(content, str) else None
+
+
+def is_mergeable_chat_event(event_data: dict) -> bool:
+    """
+    Only plain content updates can be merged: full-content snapshots
+    (`chat:completion` carrying just `content`), forwarded upstream content
+    chunks and content deltas. Status changes, tool calls, sources, errors and
+    completion are emitted as-is.
+    """
+    event_type = event_data.get("type")
+    data = event_data.get("data")
+    if not isinstance(data, dict):
+        return False
+
+    if event_type == "chat:completion":
+        return (
+            set(data.keys()) == {"content"}
+            or get_completion_delta_content(data) is not None
+        )
+    if event_type in ("message", "chat:message:delta"):
+        return set(data.keys()) <= {"content"}
+    return False
+
+
+def merge_chat_events(pending: Optional[dict], event_data: dict) -> Optional[dict]:
+    """Returns the merged event, or None if the two cannot share one frame."""
+    if pending is None:
+        return event_data
+    if pending.get("type") != event_data.get("type"):
+        return None
+
+    if event_data["type"] == "chat:completion":
+        pending_content = get_completion_delta_content(pending["data"])
+        content = get_completion_delta_content(event_data["data"])
+        if pending_content is None and content is None:
+            # Snapshots carry the whole message, the latest one wins
+            return event_data
+        if pending_content is None or content is None:
+            return None
+
+        # Upstream chunks are appended by the client, their deltas add up
+        choice = event_data["data"]["choices"][0]
+        return {
+            **event_data,
+            "data": {
+                **event_data["data"],
+                "choices": [
+                    {
+                        **choice,
+                        "delta": {
+                            **choice["delta"],
+                            "content": pending_content + content,
+                        },
+                    }
+                ],
+            },
+        }
+
+    return {
+        **event_data,
+        "data": {
+            "content": pending["data"].get("content", "")
+            + event_data["data"].get("content", ""),
+        },
+    }
+
+
+class ChatEventBatcher:
+    """
+    Coalesces the streaming "chat-events" of a room into fewer frames. One
+    batcher is shared by all the emitters of a room, so its events keep their
+    order, and only deltas of the same message are merged.
+
+    Mergeable events are buffered and flushed at most once per `interval`
+    seconds; any other event first flushes the buffer so ordering is kept.
+    While an emit is in flight new deltas keep merging into the buffer, and a
+    slow emit widens the interval up to `max_interval`, so a slow client or a
+    saturated pub/sub receives fewer, larger frames instead of a growing queue.
+
+    `on_idle` is called whenever the batcher has nothing left to send, so its
+    owner can drop it.
+    """
+
+    def __init__(self, emit, interval: float, max_interval: float, on_idle=None):
+        self.emit = emit
+        self.on_idle = on_idle
+        self.base_interval = interval
+        self.interval = interval
+        self.max_interval = max(interval, max_interval)
+
+        self.pending = None
+        self.flush_task = None
+        self.lock = asyncio.Lock()
+
+    async def send(self, event: dict):
+        """`event` is a "chat-events" payload: its chat_id, message_id and data."""
+        if self.base_interval <= 0:
+            await self.emit(event)
+            self._check_idle()
+            return
+
+        if not is_mergeable_chat_event(event["data"]):
+            await self.flush()
+            async with self.lock:
+                await self.emit(event)
+            self._check_idle()
+            return
+
+        merged = self._merge(event)
+        while merged is None:
+            await self.flush()
+            merged = self._merge(event)
+
+        self.pending = merged
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_periodically())
+
+    def _merge(self, event: dict) -> Optional[dict]:
+        if self.pending is None:
+            return event
+        if (self.pending["chat_id"], self.pending["message_id"]) != (
+            event["chat_id"],
+            event["message_id"],
+        ):
+            return None
+
+        data = merge_chat_events(self.pending["data"], event["data"])
+        return None if data is None else {**event, "data": data}
+
+    async def flush(self):
+        async with self.lock:
+            pending, self.pending = self.pending, None
+            if pending is None:
+                return
+
+            start = time.monotonic()
+            await self.emit(pending)
+            elapsed = time.monotonic() - start
+
+            self.interval = min(max(self.base_interval, elapsed * 2), self.max_interval)
+
+    async def _flush_periodically(self):
+        try:
+            while self.pending is not None:
+                await asyncio.sleep(self.interval)
+                await self.flush()
+        finally:
+            self.flush_task = None
+            self._check_idle()
+
+    def _check_idle(self):
+        if (
+            self.on_idle
+            and self.pending is None
+            and self.flush_task is None
+            and not self.lock.locked()
+        ):
+            self.on_idle()
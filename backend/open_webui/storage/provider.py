@@ -1,12 +1,17 @@
 import os
 import shutil
 import json
+import hashlib
 import logging
 import re
+import threading
+import uuid
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple, Dict
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Callable, Tuple, Dict, Optional
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from open_webui.config import (
@@ -25,13 +30,15 @@ from open_webui.config import (
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
+    STORAGE_LOCAL_CACHE_MAX_SIZE_MB,
+    STORAGE_PRESIGNED_URL_EXPIRES_IN,
     UPLOAD_DIR,
 )
 from google.cloud import storage
 from google.cloud.exceptions import GoogleCloudError, NotFound
 from open_webui.constants import ERROR_MESSAGES
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobSasPermissions, BlobServiceClient, generate_blob_sas
 from azure.core.exceptions import ResourceNotFoundError
 from open_webui.env import SRC_LOG_LEVELS
 
@@ -39,6 +46,148 @@ from open_webui.env import SRC_LOG_LEVELS
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+# Size of the chunks uploads are copied and multipart-uploaded in
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class HashingReader:
+    """
+    Wraps an upload stream and computes its size and SHA-256 while it is read,
+    so uploads can be copied in chunks without holding the file in memory.
+    Raises ValueError up front if the stream is empty.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+        # Peek a single byte to reject empty uploads before anything is written
+        self._buffer = file.read(1)
+        if not self._buffer:
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if size is None or size < 0:
+            chunk = self._buffer + self.file.read()
+            self._buffer = b""
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+            if len(chunk) < size:
+                chunk += self.file.read(size - len(chunk))
+
+        self.size += len(chunk)
+        self.sha256.update(chunk)
+        return chunk
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.size
+
+    def get_file_info(self) -> Dict:
+        return {"size": self.size, "sha256": self.sha256.hexdigest()}
+
+
+class LocalFileCache:
+    """
+    Size-bounded LRU disk cache for objects of remote storage providers, kept
+    in its own directory under UPLOAD_DIR so eviction never removes other
+    uploads. Recency is tracked through file mtimes, so the cache survives
+    restarts and is shared by workers using the same upload directory.
+    """
+
+    DIR_NAME = "storage_cache"
+
+    def __init__(self, max_size: int):
+        # Maximum total size in bytes, 0 for unbounded
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._downloads: Dict[str, threading.Lock] = {}
+
+    def get_dir(self) -> str:
+        cache_dir = os.path.join(UPLOAD_DIR, self.DIR_NAME)
+        os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+
+    def get_path(self, filename: str) -> str:
+        """Local path of the cached copy of object `filename`."""
+        return os.path.join(self.get_dir(), filename)
+
+    def remove(self, filename: str) -> None:
+        try:
+            os.remove(self.get_path(filename))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _touch(local_file_path: str) -> bool:
+        try:
+            os.utime(local_file_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get_file(self, local_file_path: str, download: Callable[[str], None]) -> str:
+        """
+        Returns `local_file_path`, calling `download(path)` to fetch the object
+        on a cache miss. Concurrent misses for the same object share a single
+        download, which is written to a temporary file and moved into place.
+        """
+        if self._touch(local_file_path):
+            return local_file_path
+
+        with self._lock:
+            download_lock = self._downloads.setdefault(
+                local_file_path, threading.Lock()
+            )
+
+        try:
+            with download_lock:
+                if not self._touch(local_file_path):
+                    part_file_path = f"{local_file_path}.{uuid.uuid4().hex}.part"
+                    try:
+                        download(part_file_path)
+                        os.replace(part_file_path, local_file_path)
+                    finally:
+                        if os.path.exists(part_file_path):
+                            os.remove(part_file_path)
+                    self.evict(keep=local_file_path)
+        finally:
+            with self._lock:
+                self._downloads.pop(local_file_path, None)
+
+        return local_file_path
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Removes least recently used files until the cache fits its size cap."""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            entries = [
+                entry
+                for entry in os.scandir(self.get_dir())
+                if entry.is_file() and not entry.name.endswith(".part")
+            ]
+            stats = {entry.path: entry.stat() for entry in entries}
+            total_size = sum(stat.st_size for stat in stats.values())
+
+            for path, stat in sorted(stats.items(), key=lambda item: item[1].st_mtime):
+                if total_size <= self.max_size:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total_size -= stat.st_size
+                except FileNotFoundError:
+                    pass
+
+
+LOCAL_FILE_CACHE = LocalFileCache(STORAGE_LOCAL_CACHE_MAX_SIZE_MB * 1024 * 1024)
+
 
 class StorageProvider(ABC):
     @abstractmethod
@@ -47,14 +196,27 @@ class StorageProvider(ABC):
 
     @abstractmethod
     def upload_file(
-        self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+        self, file: BinaryIO, filename: str, tags: Optional[Dict[str, str]] = None
+    ) -> Tuple[Dict, str]:
+        """
+        Streams `file` to storage in chunks. Returns the file info (`size` and
+        `sha256` of the contents) and the storage path.
+        """
         pass
 
     @abstractmethod
     def delete_all_files(self) -> None:
         pass
 
+    def get_presigned_url(
+        self,
+        file_path: str,
+        content_type: Optional[str] = None,
+        content_disposition: Optional[str] = None,
+    ) -> Optional[str]:
+        """Short-lived direct download URL, or None if the backend has none."""
+        return None
+
     @abstractmethod
     def delete_file(self, file_path: str) -> None:
         pass
@@ -63,15 +225,14 @@ class StorageProvider(ABC):
 class LocalStorageProvider(StorageProvider):
     @staticmethod
     def upload_file(
-        file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
-        contents = file.read()
-        if not contents:
-            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+        file: BinaryIO, filename: str, tags: Optional[Dict[str, str]] = None
+    ) -> Tuple[Dict, str]:
+        reader = HashingReader(file)
         file_path = f"{UPLOAD_DIR}/{filename}"
         with open(file_path, "wb") as f:
-            f.write(contents)
-        return contents, file_path
+            while chunk := reader.read(UPLOAD_CHUNK_SIZE):
+                f.write(chunk)
+        return reader.get_file_info(), file_path
 
     @staticmethod
     def get_file(file_path: str) -> str:
@@ -143,13 +304,24 @@ class S3StorageProvider(StorageProvider):
         return re.sub(r"[^a-zA-Z0-9 äöüÄÖÜß\+\-=\._:/@]", "", s)
 
     def upload_file(
-        self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+        self, file: BinaryIO, filename: str, tags: Optional[Dict[str, str]] = None
+    ) -> Tuple[Dict, str]:
         """Handles uploading of the file to S3 storage."""
-        _, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        reader = HashingReader(file)
         s3_key = os.path.join(self.key_prefix, filename)
         try:
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
+            # Multipart upload straight from the stream, buffering at most
+            # max_concurrency chunks in memory
+            self.s3_client.upload_fileobj(
+                reader,
+                self.bucket_name,
+                s3_key,
+                Config=TransferConfig(
+                    multipart_threshold=UPLOAD_CHUNK_SIZE,
+                    multipart_chunksize=UPLOAD_CHUNK_SIZE,
+                    max_concurrency=4,
+                ),
+            )
             if S3_ENABLE_TAGGING and tags:
                 sanitized_tags = {
                     self.sanitize_tag_value(k): self.sanitize_tag_value(v)
@@ -165,10 +337,7 @@ class S3StorageProvider(StorageProvider):
                     Key=s3_key,
                     Tagging=tagging,
                 )
-            return (
-                open(file_path, "rb").read(),
-                f"s3://{self.bucket_name}/{s3_key}",
-            )
+            return reader.get_file_info(), f"s3://{self.bucket_name}/{s3_key}"
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
@@ -176,12 +345,34 @@ class S3StorageProvider(StorageProvider):
         """Handles downloading of the file from S3 storage."""
         try:
             s3_key = self._extract_s3_key(file_path)
-            local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+            return LOCAL_FILE_CACHE.get_file(
+                LOCAL_FILE_CACHE.get_path(s3_key.split("/")[-1]),
+                lambda path: self.s3_client.download_file(
+                    self.bucket_name, s3_key, path
+                ),
+            )
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
+    def get_presigned_url(
+        self,
+        file_path: str,
+        content_type: Optional[str] = None,
+        content_disposition: Optional[str] = None,
+    ) -> Optional[str]:
+        params = {"Bucket": self.bucket_name, "Key": self._extract_s3_key(file_path)}
+        if content_type:
+            params["ResponseContentType"] = content_type
+        if content_disposition:
+            params["ResponseContentDisposition"] = content_disposition
+        try:
+            return self.s3_client.generate_presigned_url(
+                "get_object", Params=params, ExpiresIn=STORAGE_PRESIGNED_URL_EXPIRES_IN
+            )
+        except ClientError as e:
+            log.warning(f"Error generating presigned S3 URL: {e}")
+            return None
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from S3 storage."""
         try:
@@ -190,8 +381,8 @@ class S3StorageProvider(StorageProvider):
         except ClientError as e:
             raise RuntimeError(f"Error deleting file from S3: {e}")
 
-        # Always delete from local storage
-        LocalStorageProvider.delete_file(file_path)
+        # Always delete the cached copy
+        LOCAL_FILE_CACHE.remove(s3_key.split("/")[-1])
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from S3 storage."""
@@ -216,9 +407,6 @@ class S3StorageProvider(StorageProvider):
     def _extract_s3_key(self, full_file_path: str) -> str:
         return "/".join(full_file_path.split("//")[1].split("/")[1:])
 
-    def _get_local_file_path(self, s3_key: str) -> str:
-        return f"{UPLOAD_DIR}/{s3_key.split('/')[-1]}"
-
 
 class GCSStorageProvider(StorageProvider):
     def __init__(self):
@@ -236,14 +424,15 @@ class GCSStorageProvider(StorageProvider):
         self.bucket = self.gcs_client.bucket(GCS_BUCKET_NAME)
 
     def upload_file(
-        self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+        self, file: BinaryIO, filename: str, tags: Optional[Dict[str, str]] = None
+    ) -> Tuple[Dict, str]:
         """Handles uploading of the file to GCS storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        reader = HashingReader(file)
         try:
-            blob = self.bucket.blob(filename)
-            blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
+            # Setting a chunk size makes this a chunked resumable upload
+            blob = self.bucket.blob(filename, chunk_size=UPLOAD_CHUNK_SIZE)
+            blob.upload_from_file(reader, rewind=False)
+            return reader.get_file_info(), "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
@@ -251,14 +440,33 @@ class GCSStorageProvider(StorageProvider):
         """Handles downloading of the file from GCS storage."""
         try:
             filename = file_path.removeprefix("gs://").split("/")[1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
-            blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
-
-            return local_file_path
+            return LOCAL_FILE_CACHE.get_file(
+                LOCAL_FILE_CACHE.get_path(filename),
+                lambda path: self.bucket.blob(filename).download_to_filename(path),
+            )
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
+    def get_presigned_url(
+        self,
+        file_path: str,
+        content_type: Optional[str] = None,
+        content_disposition: Optional[str] = None,
+    ) -> Optional[str]:
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        try:
+            return self.bucket.blob(filename).generate_signed_url(
+                version="v4",
+                expiration=timedelta(seconds=STORAGE_PRESIGNED_URL_EXPIRES_IN),
+                method="GET",
+                response_type=content_type,
+                response_disposition=content_disposition,
+            )
+        except Exception as e:
+            # Signing requires service account credentials
+            log.warning(f"Error generating signed GCS URL: {e}")
+            return None
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from GCS storage."""
         try:
@@ -268,8 +476,8 @@ class GCSStorageProvider(StorageProvider):
         except NotFound as e:
             raise RuntimeError(f"Error deleting file from GCS: {e}")
 
-        # Always delete from local storage
-        LocalStorageProvider.delete_file(file_path)
+        # Always delete the cached copy
+        LOCAL_FILE_CACHE.remove(filename)
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from GCS storage."""
@@ -308,14 +516,22 @@ class AzureStorageProvider(StorageProvider):
         )
 
     def upload_file(
-        self, file: BinaryIO, filename: str, tags: Dict[str, str]
-    ) -> Tuple[bytes, str]:
+        self, file: BinaryIO, filename: str, tags: Optional[Dict[str, str]] = None
+    ) -> Tuple[Dict, str]:
         """Handles uploading of the file to Azure Blob Storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
+        reader = HashingReader(file)
         try:
+            # Staged block upload read from the stream one block at a time
             blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
-            return contents, f"{self.endpoint}/{self.container_name}/{filename}"
+            blob_client.upload_blob(
+                reader,
+                overwrite=True,
+                max_concurrency=1,
+            )
+            return (
+                reader.get_file_info(),
+                f"{self.endpoint}/{self.container_name}/{filename}",
+            )
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
@@ -323,14 +539,43 @@ class AzureStorageProvider(StorageProvider):
         """Handles downloading of the file from Azure Blob Storage."""
         try:
             filename = file_path.split("/")[-1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+
+            def download(path: str) -> None:
+                with open(path, "wb") as download_file:
+                    blob_client.download_blob().readinto(download_file)
+
+            return LOCAL_FILE_CACHE.get_file(
+                LOCAL_FILE_CACHE.get_path(filename), download
+            )
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
+    def get_presigned_url(
+        self,
+        file_path: str,
+        content_type: Optional[str] = None,
+        content_disposition: Optional[str] = None,
+    ) -> Optional[str]:
+        # SAS tokens are signed with the account key
+        if not AZURE_STORAGE_KEY:
+            return None
+
+        filename = file_path.split("/")[-1]
+        blob_client = self.container_client.get_blob_client(filename)
+        sas_token = generate_blob_sas(
+            account_name=self.blob_service_client.account_name,
+            container_name=self.container_name,
+            blob_name=filename,
+            account_key=AZURE_STORAGE_KEY,
+            permission=BlobSasPermissions(read=True),
+            expiry=datetime.now(timezone.utc)
+            + timedelta(seconds=STORAGE_PRESIGNED_URL_EXPIRES_IN),
+            content_type=content_type,
+            content_disposition=content_disposition,
+        )
+        return f"{blob_client.url}?{sas_token}"
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from Azure Blob Storage."""
         try:
@@ -340,8 +585,8 @@ class AzureStorageProvider(StorageProvider):
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error deleting file from Azure Blob Storage: {e}")
 
-        # Always delete from local storage
-        LocalStorageProvider.delete_file(file_path)
+        # Always delete the cached copy
+        LOCAL_FILE_CACHE.remove(filename)
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from Azure Blob Storage."""
@@ -39,6 +39,27 @@ class TestChats(AbstractPostgresTest):
         assert first_chat["created_at"] is not None
         assert first_chat["updated_at"] is not None
 
+    def test_get_session_user_chat_list_with_cursor(self):
+        from open_webui.models.chats import encode_chat_cursor
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(self.create_url("/"))
+        first_chat = response.json()[0]
+        cursor = encode_chat_cursor(first_chat["updated_at"], first_chat["id"])
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/list", query_params={"cursor": cursor})
+            )
+        assert response.status_code == 200
+        assert response.json() == []
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/list", query_params={"cursor": "invalid"})
+            )
+        assert response.status_code == 400
+
     def test_delete_all_user_chats(self):
         with mock_webui_user(id="2"):
             response = self.fast_api_client.delete(self.create_url("/"))
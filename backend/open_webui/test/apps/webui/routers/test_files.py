@@ -0,0 +1,40 @@
+import os
+
+from test.util.abstract_integration_test import AbstractPostgresTest
+from test.util.mock_user import mock_webui_user
+
+
+class TestFiles(AbstractPostgresTest):
+    BASE_PATH = "/api/v1/files"
+
+    def setup_class(cls):
+        super().setup_class()
+        from open_webui.models.files import Files
+
+        cls.files = Files
+
+    def upload_file(self, content: bytes) -> dict:
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.post(
+                self.create_url("/", query_params={"process": "false"}),
+                files={"file": ("test.txt", content, "text/plain")},
+            )
+        assert response.status_code == 200
+        return response.json()
+
+    def test_delete_file_with_shared_content(self):
+        first = self.upload_file(b"shared content")
+        second = self.upload_file(b"shared content")
+        path = self.files.get_file_by_id(first["id"]).path
+        assert self.files.get_file_by_id(second["id"]).path == path
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.delete(self.create_url(f"/{first['id']}"))
+        assert response.status_code == 200
+        assert self.files.get_file_by_id(first["id"]) is None
+        assert os.path.exists(path)
+
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.delete(self.create_url(f"/{second['id']}"))
+        assert response.status_code == 200
+        assert not os.path.exists(path)
@@ -1,3 +1,4 @@
+import hashlib
 import io
 import os
 import boto3
@@ -11,6 +12,10 @@ from azure.storage.blob import BlobServiceClient, ContainerClient, BlobClient
 from unittest.mock import MagicMock
 
 
+# Remote objects are cached under this directory of UPLOAD_DIR
+CACHE_DIR = provider.LocalFileCache.DIR_NAME
+
+
 def mock_upload_dir(monkeypatch, tmp_path):
     """Fixture to monkey-patch the UPLOAD_DIR and create a temporary directory."""
     directory = tmp_path / "uploads"
@@ -56,6 +61,10 @@ def test_class_instantiation():
     provider.AzureStorageProvider()
 
 
+def expected_file_info(content: bytes) -> dict:
+    return {"size": len(content), "sha256": hashlib.sha256(content).hexdigest()}
+
+
 class TestLocalStorageProvider:
     Storage = provider.LocalStorageProvider()
     file_content = b"test content"
@@ -66,10 +75,12 @@ class TestLocalStorageProvider:
 
     def test_upload_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, file_path = self.Storage.upload_file(self.file_bytesio, self.filename)
+        file_info, file_path = self.Storage.upload_file(
+            self.file_bytesio, self.filename
+        )
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert file_info == expected_file_info(self.file_content)
         assert file_path == str(upload_dir / self.filename)
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -116,15 +127,14 @@ class TestS3StorageProvider:
         with pytest.raises(Exception):
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        file_info, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         object = self.s3_client.Object(self.Storage.bucket_name, self.filename)
         assert self.file_content == object.get()["Body"].read()
-        # local checks
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        # streamed straight to S3 without a local copy
+        assert not (upload_dir / self.filename).exists()
+        assert file_info == expected_file_info(self.file_content)
         assert s3_file_path == "s3://" + self.Storage.bucket_name + "/" + self.filename
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -132,22 +142,23 @@ class TestS3StorageProvider:
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        _, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         file_path = self.Storage.get_file(s3_file_path)
-        assert file_path == str(upload_dir / self.filename)
-        assert (upload_dir / self.filename).exists()
+        assert file_path == str(upload_dir / CACHE_DIR / self.filename)
+        assert (upload_dir / CACHE_DIR / self.filename).exists()
 
     def test_delete_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        _, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
-        assert (upload_dir / self.filename).exists()
+        self.Storage.get_file(s3_file_path)
+        assert (upload_dir / CACHE_DIR / self.filename).exists()
         self.Storage.delete_file(s3_file_path)
-        assert not (upload_dir / self.filename).exists()
+        assert not (upload_dir / CACHE_DIR / self.filename).exists()
         with pytest.raises(ClientError) as exc:
             self.s3_client.Object(self.Storage.bucket_name, self.filename).load()
         error = exc.value.response["Error"]
@@ -161,13 +172,9 @@ class TestS3StorageProvider:
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         object = self.s3_client.Object(self.Storage.bucket_name, self.filename)
         assert self.file_content == object.get()["Body"].read()
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename_extra)
         object = self.s3_client.Object(self.Storage.bucket_name, self.filename_extra)
         assert self.file_content == object.get()["Body"].read()
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
 
         self.Storage.delete_all_files()
         assert not (upload_dir / self.filename).exists()
@@ -229,15 +236,14 @@ class TestGCSStorageProvider:
         with pytest.raises(Exception):
             self.Storage.bucket = monkeypatch(self.Storage, "bucket", None)
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
-        contents, gcs_file_path = self.Storage.upload_file(
+        file_info, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         object = self.Storage.bucket.get_blob(self.filename)
         assert self.file_content == object.download_as_bytes()
-        # local checks
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        # streamed straight to GCS without a local copy
+        assert not (upload_dir / self.filename).exists()
+        assert file_info == expected_file_info(self.file_content)
         assert gcs_file_path == "gs://" + self.Storage.bucket_name + "/" + self.filename
         # test error if file is empty
         with pytest.raises(ValueError):
@@ -245,24 +251,25 @@ class TestGCSStorageProvider:
 
     def test_get_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
+        _, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         file_path = self.Storage.get_file(gcs_file_path)
-        assert file_path == str(upload_dir / self.filename)
-        assert (upload_dir / self.filename).exists()
+        assert file_path == str(upload_dir / CACHE_DIR / self.filename)
+        assert (upload_dir / CACHE_DIR / self.filename).exists()
 
     def test_delete_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
+        _, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
-        # ensure that local directory has the uploaded file as well
-        assert (upload_dir / self.filename).exists()
+        # ensure that local directory has the downloaded file as well
+        self.Storage.get_file(gcs_file_path)
+        assert (upload_dir / CACHE_DIR / self.filename).exists()
         assert self.Storage.bucket.get_blob(self.filename).name == self.filename
         self.Storage.delete_file(gcs_file_path)
         # check that deleting file from gcs will delete the local file as well
-        assert not (upload_dir / self.filename).exists()
+        assert not (upload_dir / CACHE_DIR / self.filename).exists()
         assert self.Storage.bucket.get_blob(self.filename) == None
 
     def test_delete_all_files(self, monkeypatch, tmp_path, setup):
@@ -270,14 +277,10 @@ class TestGCSStorageProvider:
         # create 2 files
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         object = self.Storage.bucket.get_blob(self.filename)
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
         assert self.Storage.bucket.get_blob(self.filename).name == self.filename
         assert self.file_content == object.download_as_bytes()
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename_extra)
         object = self.Storage.bucket.get_blob(self.filename_extra)
-        assert (upload_dir / self.filename_extra).exists()
-        assert (upload_dir / self.filename_extra).read_bytes() == self.file_content
         assert (
             self.Storage.bucket.get_blob(self.filename_extra).name
             == self.filename_extra
@@ -348,22 +351,23 @@ class TestAzureStorageProvider:
         # Reset side effect and create container
         self.Storage.container_client.get_blob_client.side_effect = None
         self.Storage.create_container()
-        contents, azure_file_path = self.Storage.upload_file(
+        upload_blob = self.Storage.container_client.get_blob_client().upload_blob
+        upload_blob.side_effect = lambda data, **kwargs: data.read()
+        file_info, azure_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
 
         # Assertions
         self.Storage.container_client.get_blob_client.assert_called_with(self.filename)
-        self.Storage.container_client.get_blob_client().upload_blob.assert_called_once_with(
-            self.file_content, overwrite=True
-        )
-        assert contents == self.file_content
+        upload_blob.assert_called_once()
+        assert upload_blob.call_args.kwargs["overwrite"] is True
+        assert file_info == expected_file_info(self.file_content)
         assert (
             azure_file_path
             == f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
         )
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        # streamed straight to Azure without a local copy
+        assert not (upload_dir / self.filename).exists()
 
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -375,16 +379,18 @@ class TestAzureStorageProvider:
         # Mock upload behavior
         self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         # Mock blob download behavior
-        self.Storage.container_client.get_blob_client().download_blob().readall.return_value = (
+        self.Storage.container_client.get_blob_client().download_blob().readinto.side_effect = lambda f: f.write(
             self.file_content
         )
 
         file_url = f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
         file_path = self.Storage.get_file(file_url)
 
-        assert file_path == str(upload_dir / self.filename)
-        assert (upload_dir / self.filename).exists()
-        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        assert file_path == str(upload_dir / CACHE_DIR / self.filename)
+        assert (upload_dir / CACHE_DIR / self.filename).exists()
+        assert (
+            upload_dir / CACHE_DIR / self.filename
+        ).read_bytes() == self.file_content
 
     def test_delete_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
@@ -433,3 +439,49 @@ class TestAzureStorageProvider:
         )
         with pytest.raises(Exception, match="Blob not found"):
             self.Storage.get_file(file_url)
+
+
+class TestLocalFileCache:
+    file_content = b"test content"
+
+    def test_get_file(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache = provider.LocalFileCache(max_size=0)
+        downloads = []
+
+        def download(path):
+            downloads.append(path)
+            with open(path, "wb") as f:
+                f.write(self.file_content)
+
+        local_file_path = cache.get_path("test.txt")
+        assert local_file_path == str(upload_dir / CACHE_DIR / "test.txt")
+        assert cache.get_file(local_file_path, download) == local_file_path
+        assert cache.get_file(local_file_path, download) == local_file_path
+        assert len(downloads) == 1
+        assert (upload_dir / CACHE_DIR / "test.txt").read_bytes() == self.file_content
+        assert not list((upload_dir / CACHE_DIR).glob("*.part"))
+
+    def test_evict(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache = provider.LocalFileCache(max_size=2 * len(self.file_content))
+        # Uploads outside the cache are never evicted
+        (upload_dir / "upload.txt").write_bytes(self.file_content)
+        os.utime(upload_dir / "upload.txt", (0, 0))
+
+        def download(path):
+            with open(path, "wb") as f:
+                f.write(self.file_content)
+
+        for i, filename in enumerate(["a.txt", "b.txt", "c.txt"]):
+            cache.get_file(cache.get_path(filename), download)
+            os.utime(upload_dir / CACHE_DIR / filename, (i + 1, i + 1))
+        cache.evict()
+
+        assert (upload_dir / "upload.txt").exists()
+        assert not (upload_dir / CACHE_DIR / "a.txt").exists()
+        assert (upload_dir / CACHE_DIR / "b.txt").exists()
+        assert (upload_dir / CACHE_DIR / "c.txt").exists()
+
+        cache.remove("b.txt")
+        assert not (upload_dir / CACHE_DIR / "b.txt").exists()
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from open_webui import arcade_tools
+
+
+def mock_tool(toolkit: str, name: str, scopes: list[str]) -> dict:
+    return {
+        "fully_qualified_name": f"{toolkit}.{name}@1.0.0",
+        "qualified_name": f"{toolkit}.{name}",
+        "name": name,
+        "description": f"{name} description",
+        "toolkit": {"name": toolkit},
+        "input": {
+            "parameters": [
+                {
+                    "name": "query",
+                    "required": True,
+                    "value_schema": {"val_type": "string"},
+                }
+            ]
+        },
+        "requirements": {
+            "authorization": {
+                "provider_id": toolkit.lower(),
+                "provider_type": "oauth2",
+                "oauth2": {"scopes": scopes},
+            }
+        },
+    }
+
+
+MOCK_TOOLS = [
+    mock_tool("Google", "ListEmails", ["gmail.readonly"]),
+    mock_tool("Google", "SendEmail", ["gmail.send"]),
+    mock_tool("Slack", "ListUsers", ["users:read"]),
+]
+
+
+class MockArcadeServer:
+    """Local stand-in for the Arcade API endpoints used by the catalog."""
+
+    def __init__(self):
+        self.requests = []
+        # Authorization status returned to each user
+        self.statuses = {}
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                server.requests.append(("GET", url.path))
+                if url.path == "/v1/tools":
+                    query = parse_qs(url.query)
+                    offset = int(query.get("offset", ["0"])[0])
+                    # Small pages, so listing has to paginate
+                    items = MOCK_TOOLS[offset : offset + 2]
+                    self.send_json(
+                        {
+                            "items": items,
+                            "offset": offset,
+                            "limit": 2,
+                            "total_count": len(MOCK_TOOLS),
+                        }
+                    )
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                server.requests.append(("POST", url.path))
+                if url.path in ("/v1/auth/authorize", "/v1/tools/authorize"):
+                    user_id = body.get("user_id")
+                    status = server.statuses.get(user_id, "pending")
+                    self.send_json(
+                        {
+                            "id": f"auth-{user_id}",
+                            "status": status,
+                            "url": (
+                                None
+                                if status == "completed"
+                                else "https://arcade.test/authorize"
+                            ),
+                            "user_id": user_id,
+                        }
+                    )
+                elif url.path == "/v1/auth/confirm_user":
+                    server.statuses[body.get("user_id")] = "completed"
+                    self.send_json({"auth_id": "auth", "next_uri": "/c/new"})
+                else:
+                    self.send_error(404)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def count(self, path: str) -> int:
+        return len([request for request in self.requests if request[1] == path])
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def arcade_server(monkeypatch):
+    with MockArcadeServer() as server:
+        monkeypatch.setenv("ARCADE_BASE_URL", server.url)
+        monkeypatch.setattr(arcade_tools, "ARCADE_CLIENTS", {})
+        monkeypatch.setattr(
+            arcade_tools, "ARCADE_TOOL_CATALOG", arcade_tools.ArcadeToolCatalog(3600)
+        )
+        monkeypatch.setattr(
+            arcade_tools, "ARCADE_AUTH_CACHE", arcade_tools.ArcadeAuthCache(600, 10)
+        )
+        yield server
+
+
+TOOLS_CONFIG = [
+    {
+        "toolkit": "Gmail",
+        "description": None,
+        "enabled": True,
+        "tools": [
+            {"name": "Google.ListEmails", "enabled": True},
+            {"name": "Google.SendEmail", "enabled": False},
+        ],
+    },
+    {
+        "toolkit": "Slack",
+        "description": None,
+        "enabled": False,
+        "tools": [{"name": "Slack.ListUsers", "enabled": True}],
+    },
+]
+
+
+def mock_request():
+    config = SimpleNamespace(ARCADE_API_KEY="test", ARCADE_TOOLS_CONFIG=TOOLS_CONFIG)
+    return SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(config=config)))
+
+
+class TestArcadeToolCatalog:
+    def test_load_indexes_tools(self, arcade_server):
+        catalog = arcade_tools.ARCADE_TOOL_CATALOG
+        catalog.load(arcade_tools.get_arcade_client("test"))
+
+        assert arcade_server.count("/v1/tools") == 2
+        assert len(catalog.tools) == 3
+        assert catalog.get_tool("Slack.ListUsers").toolkit.name == "Slack"
+        assert catalog.get_tool("Missing.Tool") is None
+        assert [tool.name for tool in catalog.get_toolkit_tools("Google")] == [
+            "ListEmails",
+            "SendEmail",
+        ]
+
+    def test_enabled_tools(self, arcade_server):
+        catalog = arcade_tools.ARCADE_TOOL_CATALOG
+        catalog.load(arcade_tools.get_arcade_client("test"))
+
+        assert [
+            tool.qualified_name for tool in catalog.get_enabled_tools(TOOLS_CONFIG[0])
+        ] == ["Google.ListEmails"]
+        # Disabled toolkit
+        assert catalog.get_enabled_tools(TOOLS_CONFIG[1]) == []
+
+    def test_auth_requirement_merges_scopes(self, arcade_server):
+        catalog = arcade_tools.ARCADE_TOOL_CATALOG
+        catalog.load(arcade_tools.get_arcade_client("test"))
+
+        requirement = catalog.get_auth_requirement(TOOLS_CONFIG[0])
+        assert requirement["provider_id"] == "google"
+        assert requirement["oauth2"]["scopes"] == ["gmail.readonly", "gmail.send"]
+        assert catalog.get_auth_requirement(TOOLS_CONFIG[0]) is requirement
+
+        # Reloading drops the memoized requirements
+        catalog.load(arcade_tools.get_arcade_client("test"))
+        assert catalog.get_auth_requirement(TOOLS_CONFIG[0]) is not requirement
+
+
+class TestArcadeAuthCache:
+    def test_get_arcade_tools_caches_auth_status(self, arcade_server):
+        arcade_tools.ARCADE_TOOL_CATALOG.load(arcade_tools.get_arcade_client("test"))
+        user = SimpleNamespace(id="user-1")
+        arcade_server.statuses["user-1"] = "completed"
+
+        for _ in range(3):
+            tools = arcade_tools.get_arcade_tools(mock_request(), user)
+            assert [tool.id for tool in tools] == ["arcade:0"]
+            assert tools[0].meta.auth_completed is True
+
+        assert arcade_server.count("/v1/auth/authorize") == 1
+
+    def test_invalidate(self, arcade_server):
+        arcade_tools.ARCADE_TOOL_CATALOG.load(arcade_tools.get_arcade_client("test"))
+        user = SimpleNamespace(id="user-2")
+
+        tools = arcade_tools.get_arcade_tools(mock_request(), user)
+        assert tools[0].meta.auth_completed is False
+        assert tools[0].meta.auth_url == "https://arcade.test/authorize"
+
+        arcade_server.statuses["user-2"] = "completed"
+        # Still the cached pending status
+        tools = arcade_tools.get_arcade_tools(mock_request(), user)
+        assert tools[0].meta.auth_completed is False
+
+        arcade_tools.ARCADE_AUTH_CACHE.invalidate("user-2")
+        tools = arcade_tools.get_arcade_tools(mock_request(), user)
+        assert tools[0].meta.auth_completed is True
+        assert arcade_server.count("/v1/auth/authorize") == 2
+
+    def test_pending_status_expires(self, arcade_server, monkeypatch):
+        monkeypatch.setattr(arcade_tools.ARCADE_AUTH_CACHE, "pending_ttl", 0)
+        arcade_tools.ARCADE_TOOL_CATALOG.load(arcade_tools.get_arcade_client("test"))
+        user = SimpleNamespace(id="user-3")
+
+        arcade_tools.get_arcade_tools(mock_request(), user)
+        arcade_tools.get_arcade_tools(mock_request(), user)
+
+        assert arcade_server.count("/v1/auth/authorize") == 2
+
+    def test_auth_callback_confirms_and_invalidates(self, arcade_server, monkeypatch):
+        from open_webui.routers import tools as tools_router
+
+        monkeypatch.setattr(
+            tools_router, "ARCADE_AUTH_CACHE", arcade_tools.ARCADE_AUTH_CACHE
+        )
+        arcade_tools.ARCADE_TOOL_CATALOG.load(arcade_tools.get_arcade_client("test"))
+        user = SimpleNamespace(id="user-4")
+
+        tools = arcade_tools.get_arcade_tools(mock_request(), user)
+        assert tools[0].meta.auth_completed is False
+
+        response = asyncio.run(
+            tools_router.arcade_auth_callback(mock_request(), "flow-1", user)
+        )
+        assert response.headers["location"] == "/c/new"
+        assert arcade_server.count("/v1/auth/confirm_user") == 1
+
+        tools = arcade_tools.get_arcade_tools(mock_request(), user)
+        assert tools[0].meta.auth_completed is True
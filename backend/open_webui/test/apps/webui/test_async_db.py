@@ -0,0 +1,75 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from open_webui.internal import db as internal_db
+from open_webui.models.chats import Chat, Chats
+
+
+def test_get_async_database_url():
+    assert (
+        internal_db.get_async_database_url("sqlite:///data/webui.db")
+        == "sqlite+aiosqlite:///data/webui.db"
+    )
+    assert (
+        internal_db.get_async_database_url("postgresql+psycopg2://user@host/db")
+        == "postgresql+asyncpg://user@host/db"
+    )
+    assert (
+        internal_db.get_async_database_url(
+            "postgresql://user@host/db?sslmode=require&application_name=webui"
+        )
+        == "postgresql+asyncpg://user@host/db?ssl=require"
+    )
+    assert internal_db.get_async_database_url("oracle://host/db") is None
+
+
+def test_async_engine_query(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'webui.db'}")
+    monkeypatch.setattr(
+        internal_db,
+        "AsyncSessionLocal",
+        async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False),
+    )
+
+    async def main():
+        async with engine.begin() as conn:
+            await conn.run_sync(Chat.__table__.create)
+
+        async with internal_db.get_async_db() as db:
+            db.add(
+                Chat(
+                    id="chat",
+                    user_id="user",
+                    title="Title",
+                    chat={"title": "Title"},
+                    created_at=1,
+                    updated_at=1,
+                    archived=False,
+                    meta={},
+                )
+            )
+            await db.commit()
+
+        chat = await Chats.get_chat_by_id_and_user_id_async("chat", "user")
+        assert chat.title == "Title"
+        assert await Chats.get_chat_by_id_and_user_id_async("chat", "other") is None
+
+        chat = await Chats.update_chat_by_id_async("chat", {"title": "Renamed"})
+        assert chat.updated_at > 1
+        assert (await Chats.get_chat_by_id_async("chat")).title == "Renamed"
+
+        await engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_async_engine_errors_fall_back_to_sync(tmp_path, monkeypatch):
+    # The directory doesn't exist, so every connection fails
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing/webui.db'}")
+    monkeypatch.setattr(
+        internal_db, "AsyncSessionLocal", async_sessionmaker(bind=engine)
+    )
+    monkeypatch.setattr(Chats, "get_chat_by_id", lambda id: f"sync {id}")
+
+    assert asyncio.run(Chats.get_chat_by_id_async("chat")) == "sync chat"
@@ -0,0 +1,69 @@
+from open_webui.utils.context_window import (
+    TokenCounter,
+    fit_messages_to_context,
+    get_context_token_budget,
+)
+
+
+class CharCounter(TokenCounter):
+    """One token per character, besides the message overhead."""
+
+    def count(self, text, encoding_name):
+        return len(text or "")
+
+
+def get_chat(turns: int) -> list[dict]:
+    messages = [{"role": "system", "content": "s" * 16}]
+    for idx in range(turns):
+        messages.append({"role": "user", "content": f"{idx:02}" + "u" * 14})
+        messages.append({"role": "assistant", "content": f"{idx:02}" + "a" * 14})
+    return messages
+
+
+def test_token_counts_are_cached():
+    counter = TokenCounter(2)
+    counter._encodings["test"] = None
+
+    assert counter.count("a" * 40, "test") == 11
+    counter.count("b", "test")
+    counter.count("c", "test")
+    assert len(counter._counts) == 2
+    assert counter.count_message({"role": "user", "content": ""}, "test") == 4
+
+
+def test_get_context_token_budget():
+    model = {"id": "model", "info": {"meta": {"context_window": 1000}}}
+    assert get_context_token_budget(model, {"max_tokens": 200}) == 800
+    assert get_context_token_budget({"id": "model"}, {}) == 0
+    assert get_context_token_budget(model, {"max_tokens": "many"}) == 1000
+
+
+def test_messages_that_fit_are_kept():
+    messages = get_chat(2)
+    assert fit_messages_to_context(messages, 1000, "test", 0.25, CharCounter(100)) == (
+        messages,
+        0,
+    )
+
+
+def test_system_messages_and_last_turn_are_kept():
+    messages = get_chat(5)
+    fitted, trimmed = fit_messages_to_context(
+        messages, 10, "test", 0.25, CharCounter(100)
+    )
+    assert trimmed == 8
+    assert fitted == [messages[0]] + messages[-2:]
+
+
+def test_cut_is_stable_as_the_chat_grows():
+    counter = CharCounter(100)
+    # Every turn takes 40 tokens, the system message 20
+    kept = []
+    for turns in range(1, 20):
+        fitted, _ = fit_messages_to_context(get_chat(turns), 300, "test", 0.5, counter)
+        assert sum(counter.count_message(m, "test") for m in fitted) <= 300
+        kept.append(fitted[1]["content"])
+
+    # The first kept message only moves by whole checkpoints of 4 turns
+    assert len(set(kept)) < len(kept) // 2
+    assert [int(content[:2]) % 4 for content in kept] == [0] * len(kept)
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from open_webui.utils import rate_limit
+from open_webui.utils.rate_limit import (
+    MemoryRateLimitWindow,
+    RateLimiter,
+    RateLimitExceeded,
+)
+
+
+@pytest.fixture
+def short_window(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_WINDOW", 0.2)
+
+
+def test_estimate_tokens():
+    payload = {
+        "messages": [
+            {"role": "system", "content": "a" * 40},
+            {"role": "user", "content": [{"type": "text", "text": "b" * 40}]},
+        ],
+        "max_tokens": 100,
+    }
+    assert rate_limit.estimate_tokens(payload) == 10 + 10 + 2 * 4 + 100
+
+
+def test_get_rate_limit():
+    assert rate_limit.get_rate_limit("key", None) is None
+    assert rate_limit.get_rate_limit("key", {"rpm": 0, "tpm": ""}) is None
+    assert rate_limit.get_rate_limit("key", {"tpm": "1000"}) == {
+        "key": "key",
+        "rpm": 0,
+        "tpm": 1000,
+    }
+
+
+def test_tokens_per_minute(short_window):
+    window = MemoryRateLimitWindow()
+    limits = [{"key": "connection", "rpm": 0, "tpm": 100}]
+
+    assert window.try_acquire(limits, 60) == 0
+    assert 0 < window.try_acquire(limits, 60) <= 0.2
+    assert window.try_acquire(limits, 40) == 0
+    assert window.get_usage("connection") == {"requests": 2, "tokens": 100}
+
+
+def test_all_budgets_must_fit():
+    window = MemoryRateLimitWindow()
+    connection = {"key": "connection", "rpm": 10, "tpm": 0}
+    group = {"key": "group", "rpm": 1, "tpm": 0}
+
+    assert window.try_acquire([connection, group], 1) == 0
+    assert window.try_acquire([connection, group], 1) > 0
+    # The refused request is not counted against the connection
+    assert window.get_usage("connection")["requests"] == 1
+
+
+def test_queue_is_fair_between_users(short_window):
+    limiter = RateLimiter(MemoryRateLimitWindow(), 5)
+    limits = [{"key": "connection", "rpm": 1, "tpm": 0}]
+    order = []
+
+    async def request(user_id, idx):
+        await limiter.acquire(limits, 1, user_id)
+        order.append((user_id, idx))
+
+    async def main():
+        await asyncio.gather(
+            *[request("a", idx) for idx in range(3)],
+            *[request("b", idx) for idx in range(2)],
+        )
+
+    asyncio.run(main())
+    assert order == [("a", 0), ("a", 1), ("b", 0), ("a", 2), ("b", 1)]
+    assert limiter.get_stats()["queued"] == 4
+    assert limiter.get_stats()["queue_depth"] == {}
+
+
+def test_wait_is_bounded():
+    limiter = RateLimiter(MemoryRateLimitWindow(), 0.1)
+    limits = [{"key": "connection", "rpm": 1, "tpm": 0}]
+
+    async def main():
+        assert await limiter.acquire(limits, 1, "a")
+        assert not await limiter.acquire(limits, 1, "a", wait=False)
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire(limits, 1, "a")
+
+    asyncio.run(main())
+    assert limiter.get_stats()["rejected"] == 1
+
+
+def test_queue_timeout_is_rejected():
+    limiter = RateLimiter(MemoryRateLimitWindow(), 0.1)
+    limits = [{"key": "connection", "rpm": 1, "tpm": 0}]
+
+    async def main():
+        # Another request holds the head of the queue past the wait
+        queue = limiter._queues.setdefault("connection", rate_limit.FairQueue())
+        queue.push("b")
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire(limits, 1, "a")
+
+    asyncio.run(main())
+    assert limiter.get_stats()["rejected"] == 1
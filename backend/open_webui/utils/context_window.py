@@ -0,0 +1,164 @@
+import json
+import logging
+from collections import OrderedDict
+from itertools import accumulate
+from typing import Optional
+
+import tiktoken
+
+from open_webui.env import (
+    CHAT_CONTEXT_TOKEN_CACHE_SIZE,
+    CHAT_CONTEXT_TRIM_STEP,
+    CHAT_CONTEXT_WINDOW,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Tokens a message takes besides its content, as its role and separators
+MESSAGE_TOKENS = 4
+
+
+class TokenCounter:
+    """
+    Token counts of message contents, cached by content, so the messages of a
+    chat are only tokenized the first time they're sent and a request only
+    tokenizes its new turn. At most `max_entries` counts are kept, least
+    recently used first out.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+
+        self._counts: OrderedDict[int, int] = OrderedDict()
+        self._encodings = {}
+
+    def get_encoding(self, encoding_name: str):
+        if encoding_name not in self._encodings:
+            try:
+                self._encodings[encoding_name] = tiktoken.get_encoding(encoding_name)
+            except Exception as e:
+                # e.g. offline, without the encoding cached
+                log.warning(
+                    f"Error loading tiktoken encoding {encoding_name}, token counts are estimated: {e}"
+                )
+                self._encodings[encoding_name] = None
+        return self._encodings[encoding_name]
+
+    def count(self, text: str, encoding_name: str) -> int:
+        if not text:
+            return 0
+
+        key = hash((encoding_name, text))
+        count = self._counts.get(key)
+        if count is not None:
+            self._counts.move_to_end(key)
+            return count
+
+        encoding = self.get_encoding(encoding_name)
+        if encoding is not None:
+            count = len(encoding.encode(text, disallowed_special=()))
+        else:
+            count = len(text) // 4 + 1
+
+        self._counts[key] = count
+        while len(self._counts) > max(self.max_entries, 0):
+            self._counts.popitem(last=False)
+        return count
+
+    def count_message(self, message: dict, encoding_name: str) -> int:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = "\n".join(
+                item.get("text", "") for item in content if item.get("type") == "text"
+            )
+
+        count = MESSAGE_TOKENS + self.count(content, encoding_name)
+        if message.get("tool_calls"):
+            count += self.count(json.dumps(message["tool_calls"]), encoding_name)
+        return count
+
+
+def get_context_token_budget(model: dict, form_data: dict) -> int:
+    """
+    Prompt tokens the model can take: its context window, from "context_window"
+    in its meta or CHAT_CONTEXT_WINDOW, less the completion tokens. 0 if unset.
+    """
+    context_window = (
+        model.get("info", {}).get("meta", {}).get("context_window")
+        or CHAT_CONTEXT_WINDOW
+    )
+    try:
+        context_window = int(context_window)
+    except (TypeError, ValueError):
+        return 0
+    if context_window <= 0:
+        return 0
+
+    try:
+        completion_tokens = int(
+            form_data.get("max_completion_tokens") or form_data.get("max_tokens") or 0
+        )
+    except (TypeError, ValueError):
+        completion_tokens = 0
+    return max(context_window - completion_tokens, 1)
+
+
+def fit_messages_to_context(
+    messages: list[dict],
+    budget: int,
+    encoding_name: str,
+    step: Optional[float] = None,
+    counter: Optional["TokenCounter"] = None,
+) -> tuple[list[dict], int]:
+    """
+    Drops the oldest turns of `messages` until they fit in `budget` tokens, and
+    returns the kept messages and the number dropped. The leading system
+    messages and the last turn are always kept, and turns start at a user
+    message.
+
+    Turns are only dropped at checkpoints spaced `step` of the budget apart
+    from the start of the chat. The checkpoints don't move as the chat grows,
+    so the same messages are kept, and the provider's prompt cache still hits,
+    for the next turns until the chat outgrows the budget again.
+    """
+    step = CHAT_CONTEXT_TRIM_STEP if step is None else step
+    counter = counter or TOKEN_COUNTER
+
+    counts = [counter.count_message(message, encoding_name) for message in messages]
+    if sum(counts) <= budget:
+        return messages, 0
+
+    start = 0
+    while start < len(messages) and messages[start].get("role") == "system":
+        start += 1
+
+    turns = [
+        idx
+        for idx in range(start + 1, len(messages))
+        if messages[idx].get("role") == "user"
+    ]
+    if not turns:
+        return messages, 0
+
+    # Tokens of the messages from each index to the end
+    remaining = list(accumulate(reversed(counts)))[::-1] + [0]
+    system_tokens = sum(counts[:start])
+
+    cut = next(
+        (idx for idx in turns if system_tokens + remaining[idx] <= budget), turns[-1]
+    )
+
+    checkpoints = []
+    previous = start
+    for idx in turns:
+        if remaining[previous] - remaining[idx] >= step * budget:
+            checkpoints.append(idx)
+            previous = idx
+    cut = next((idx for idx in checkpoints if idx >= cut), cut)
+
+    return messages[:start] + messages[cut:], cut - start
+
+
+TOKEN_COUNTER = TokenCounter(CHAT_CONTEXT_TOKEN_CACHE_SIZE)
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from open_webui.env import (
+    FILE_PROCESSING_MAX_QUEUE_SIZE,
+    FILE_PROCESSING_MAX_QUEUE_SIZE_PER_USER,
+    FILE_PROCESSING_WORKERS,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.files import Files
+from open_webui.socket.main import get_user_room, sio
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class FileProcessingPool:
+    """
+    Runs the processing of uploaded files in the background. At most
+    `max_workers` jobs run at a time, each in the threadpool; jobs are admitted
+    only while the pool and the submitting user are under their queue limits.
+
+    The status of each file ("pending", "processing", "completed" or "failed")
+    is stored in its meta, leaving its data to the processing results, and
+    pushed to its owner as a "file-events" message.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int, max_user_queue_size: int):
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max_queue_size
+        self.max_user_queue_size = max_user_queue_size
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._queue_size = 0
+        self._user_queue_sizes: Dict[str, int] = {}
+        self._tasks = set()
+
+    def can_admit(self, user_id: str) -> bool:
+        return (
+            self._queue_size < self.max_queue_size
+            and self._user_queue_sizes.get(user_id, 0) < self.max_user_queue_size
+        )
+
+    def submit(
+        self, file_id: str, user_id: str, func: Callable, *args, **kwargs
+    ) -> bool:
+        """Queues `func(*args, **kwargs)` to process `file_id`. Returns False if refused."""
+        if not self.can_admit(user_id):
+            return False
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        self._queue_size += 1
+        self._user_queue_sizes[user_id] = self._user_queue_sizes.get(user_id, 0) + 1
+
+        task = asyncio.create_task(self._run(file_id, user_id, func, args, kwargs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, file_id, user_id, func, args, kwargs):
+        try:
+            async with self._semaphore:
+                await self.set_status(file_id, user_id, "processing")
+                try:
+                    await run_in_threadpool(func, *args, **kwargs)
+                    await self.set_status(file_id, user_id, "completed")
+                except Exception as e:
+                    log.exception(e)
+                    log.error(f"Error processing file: {file_id}")
+                    error = str(e.detail) if hasattr(e, "detail") else str(e)
+                    await self.set_status(file_id, user_id, "failed", error)
+        finally:
+            self._queue_size -= 1
+            self._user_queue_sizes[user_id] -= 1
+            if self._user_queue_sizes[user_id] <= 0:
+                del self._user_queue_sizes[user_id]
+
+    @staticmethod
+    async def set_status(
+        file_id: str, user_id: str, status: str, error: Optional[str] = None
+    ):
+        data = {"status": status}
+        if error:
+            # Clients read processing errors from the file meta
+            data["error"] = error
+        Files.update_file_metadata_by_id(file_id, data)
+
+        try:
+            await sio.emit(
+                "file-events",
+                {"file_id": file_id, **data},
+                room=get_user_room(user_id),
+            )
+        except Exception as e:
+            log.debug(f"Error emitting file status: {e}")
+
+
+FILE_PROCESSING_POOL = FileProcessingPool(
+    FILE_PROCESSING_WORKERS,
+    FILE_PROCESSING_MAX_QUEUE_SIZE,
+    FILE_PROCESSING_MAX_QUEUE_SIZE_PER_USER,
+)
@@ -17,7 +17,10 @@ import ast
 
 from uuid import uuid4
 from concurrent.futures import ThreadPoolExecutor
-from open_webui.arcade_tools import chat_completion_arcade_tools_handler
+from open_webui.arcade_tools import (
+    ARCADE_TOOL_CATALOG,
+    chat_completion_arcade_tools_handler,
+)
 from open_webui.utils.upstage_file_parser import chat_file_parsing_handler
 
 
@@ -38,6 +41,7 @@ from open_webui.routers.tasks import (
     generate_title,
     generate_image_prompt,
     generate_chat_tags,
+    generate_plan,
 )
 from open_webui.routers.retrieval import process_web_search, SearchForm, save_docs_to_vector_db
 from open_webui.routers.images import image_generations, GenerateImageForm
@@ -60,6 +64,7 @@ from open_webui.retrieval.utils import get_sources_from_files
 from open_webui.utils.chat import generate_chat_completion
 from open_webui.utils.task import (
     get_task_model_id,
+    get_plan_from_response,
     rag_template,
     tools_function_calling_generation_template,
 )
@@ -74,13 +79,20 @@ from open_webui.utils.misc import (
     prepend_to_first_user_message_content,
     convert_logit_bias_input_to_json,
 )
-from open_webui.utils.tools import get_tools
+from open_webui.utils.tools import get_tools, run_tool_calls
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.filter import (
+    get_function_module,
     get_sorted_filter_ids,
     process_filter_functions,
 )
+from open_webui.utils.response import StreamContentCollector
+from open_webui.utils.context_window import (
+    fit_messages_to_context,
+    get_context_token_budget,
+)
 from open_webui.utils.code_interpreter import execute_code_jupyter
+from open_webui.utils.stage_graph import Stage, run_stages
 
 from open_webui.tasks import create_task
 
@@ -104,7 +116,13 @@ log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
 async def chat_completion_tools_handler(
-    request: Request, body: dict, extra_params: dict, user: UserModel, models, tools
+    request: Request,
+    body: dict,
+    extra_params: dict,
+    user: UserModel,
+    models,
+    tools,
+    tool_calls: Optional[list[dict]] = None,
 ) -> tuple[dict, dict]:
     async def get_content_from_response(response) -> Optional[str]:
         content = None
@@ -151,6 +169,7 @@ async def chat_completion_tools_handler(
 
     skip_files = False
     sources = []
+    user_messages = []
 
     specs = [tool["spec"] for tool in tools.values()]
     print("specsspecs", specs)
@@ -169,128 +188,123 @@ async def chat_completion_tools_handler(
     )
 
 
-    try:
-        response = await generate_chat_completion(request, form_data=payload, user=user)
-        log.debug(f"{response=}")
-        content = await get_content_from_response(response)
-        log.debug(f"{content=}")
+    def get_tool_function_params(tool, tool_call):
+        spec = tool.get("spec", {})
+        allowed_params = spec.get("parameters", {}).get("properties", {}).keys()
+        return {
+            k: v
+            for k, v in tool_call.get("parameters", {}).items()
+            if k in allowed_params
+        }
 
-        if not content:
-            return body, {}
+    async def execute_tool_call(tool_call):
+        log.debug(f"{tool_call=}")
 
-        try:
-            content = content[content.find("{") : content.rfind("}") + 1]
-            if not content:
-                raise Exception("No JSON object found in the response")
+        tool_function_name = tool_call.get("name", None)
+        if tool_function_name not in tools:
+            return None
 
-            result = json.loads(content)
+        tool = tools[tool_function_name]
+        tool_function_params = get_tool_function_params(tool, tool_call)
+        print("tooltool", tool)
+        if tool.get("direct", False):
+            return await event_caller(
+                {
+                    "type": "execute:tool",
+                    "data": {
+                        "id": str(uuid4()),
+                        "name": tool_function_name,
+                        "params": tool_function_params,
+                        "server": tool.get("server", {}),
+                        "session_id": metadata.get("session_id", None),
+                    },
+                }
+            )
+        else:
+            tool_function = tool["callable"]
+            return await tool_function(**tool_function_params)
 
-            async def tool_call_handler(tool_call):
-                nonlocal skip_files
+    def tool_result_handler(tool_call, tool_result):
+        nonlocal skip_files
 
-                log.debug(f"{tool_call=}")
+        tool_function_name = tool_call.get("name", None)
+        if tool_function_name not in tools:
+            return
 
-                tool_function_name = tool_call.get("name", None)
-                if tool_function_name not in tools:
-                    return body, {}
+        tool = tools[tool_function_name]
+        tool_function_params = get_tool_function_params(tool, tool_call)
 
-                tool_function_params = tool_call.get("parameters", {})
+        tool_result_files = []
+        if isinstance(tool_result, list):
+            for item in tool_result:
+                # check if string
+                if isinstance(item, str) and item.startswith("data:"):
+                    tool_result_files.append(item)
+                    tool_result.remove(item)
 
-                try:
-                    tool = tools[tool_function_name]
+        if isinstance(tool_result, dict) or isinstance(tool_result, list):
+            tool_result = json.dumps(tool_result, indent=2)
 
-                    spec = tool.get("spec", {})
-                    allowed_params = (
-                        spec.get("parameters", {}).get("properties", {}).keys()
-                    )
-                    tool_function_params = {
-                        k: v
-                        for k, v in tool_function_params.items()
-                        if k in allowed_params
-                    }
-                    print("tooltool", tool)
-                    if tool.get("direct", False):
-                        tool_result = await event_caller(
-                            {
-                                "type": "execute:tool",
-                                "data": {
-                                    "id": str(uuid4()),
-                                    "name": tool_function_name,
-                                    "params": tool_function_params,
-                                    "server": tool.get("server", {}),
-                                    "session_id": metadata.get("session_id", None),
-                                },
-                            }
-                        )
-                    else:
-                        tool_function = tool["callable"]
-                        tool_result = await tool_function(**tool_function_params)
-
-                except Exception as e:
-                    tool_result = str(e)
-
-                tool_result_files = []
-                if isinstance(tool_result, list):
-                    for item in tool_result:
-                        # check if string
-                        if isinstance(item, str) and item.startswith("data:"):
-                            tool_result_files.append(item)
-                            tool_result.remove(item)
-
-                if isinstance(tool_result, dict) or isinstance(tool_result, list):
-                    tool_result = json.dumps(tool_result, indent=2)
-
-                if isinstance(tool_result, str):
-                    tool = tools[tool_function_name]
-                    tool_id = tool.get("tool_id", "")
-
-                    tool_name = (
-                        f"{tool_id}/{tool_function_name}"
-                        if tool_id
-                        else f"{tool_function_name}"
-                    )
-                    if tool.get("metadata", {}).get("citation", False) or tool.get(
-                        "direct", False
-                    ):
-                        # Citation is enabled for this tool
-                        sources.append(
+        if isinstance(tool_result, str):
+            tool_id = tool.get("tool_id", "")
+
+            tool_name = (
+                f"{tool_id}/{tool_function_name}"
+                if tool_id
+                else f"{tool_function_name}"
+            )
+            if tool.get("metadata", {}).get("citation", False) or tool.get(
+                "direct", False
+            ):
+                # Citation is enabled for this tool
+                sources.append(
+                    {
+                        "source": {
+                            "name": (f"TOOL:{tool_name}"),
+                        },
+                        "document": [tool_result],
+                        "metadata": [
                             {
-                                "source": {
-                                    "name": (f"TOOL:{tool_name}"),
-                                },
-                                "document": [tool_result],
-                                "metadata": [
-                                    {
-                                        "source": (f"TOOL:{tool_name}"),
-                                        "parameters": tool_function_params,
-                                    }
-                                ],
+                                "source": (f"TOOL:{tool_name}"),
+                                "parameters": tool_function_params,
                             }
-                        )
-                    else:
-                        # Citation is not enabled for this tool
-                        body["messages"] = add_or_update_user_message(
-                            f"\nTool `{tool_name}` Output: {tool_result}",
-                            body["messages"],
-                        )
+                        ],
+                    }
+                )
+            else:
+                # Citation is not enabled for this tool
+                user_messages.append(
+                    f"\nTool `{tool_name}` Output: {tool_result}"
+                )
 
-                    if (
-                        tools[tool_function_name]
-                        .get("metadata", {})
-                        .get("file_handler", False)
-                    ):
-                        skip_files = True
+            if tool.get("metadata", {}).get("file_handler", False):
+                skip_files = True
+
+    try:
+        # Tool calls may come from the plan of the chat turn already
+        if tool_calls is None:
+            response = await generate_chat_completion(
+                request, form_data=payload, user=user
+            )
+            log.debug(f"{response=}")
+            content = await get_content_from_response(response)
+            log.debug(f"{content=}")
+
+            if not content:
+                return body, {}
 
+            content = content[content.find("{") : content.rfind("}") + 1]
+            if not content:
+                raise Exception("No JSON object found in the response")
+
+            result = json.loads(content)
             # check if "tool_calls" in result
-            if result.get("tool_calls"):
-                for tool_call in result.get("tool_calls"):
-                    await tool_call_handler(tool_call)
-            else:
-                await tool_call_handler(result)
+            tool_calls = result.get("tool_calls") or [result]
 
-        except Exception as e:
-            log.debug(f"Error: {e}")
-            content = None
+        # Executed concurrently, their results are added in the order of the calls
+        tool_results = await run_tool_calls(tool_calls, execute_tool_call)
+        for tool_call, tool_result in zip(tool_calls, tool_results):
+            tool_result_handler(tool_call, tool_result)
     except Exception as e:
         log.debug(f"Error: {e}")
         content = None
@@ -300,7 +314,7 @@ async def chat_completion_tools_handler(
     if skip_files and "files" in body.get("metadata", {}):
         del body["metadata"]["files"]
 
-    return body, {"sources": sources}
+    return body, {"sources": sources, "user_messages": user_messages}
 
 
 async def chat_memory_handler(
@@ -335,15 +349,15 @@ async def chat_memory_handler(
 
                 user_context += f"{doc_idx + 1}. [{created_at_date}] {doc}\n"
 
-    form_data["messages"] = add_or_update_system_message(
-        f"User Context:\n{user_context}\n", form_data["messages"], append=True
-    )
-
-    return form_data
+    return form_data, {"system_message": f"User Context:\n{user_context}\n"}
 
 # upstream/main 무시. minjoon 버전으로
 async def chat_web_search_handler(
-    request: Request, form_data: dict, extra_params: dict, user
+    request: Request,
+    form_data: dict,
+    extra_params: dict,
+    user,
+    queries: Optional[list[str]] = None,
 ):
     event_emitter = extra_params["__event_emitter__"]
     await event_emitter(
@@ -360,39 +374,41 @@ async def chat_web_search_handler(
     messages = form_data["messages"]
     user_message = get_last_user_message(messages)
 
-    queries = []
-    try:
-        start_time = time.time()
+    start_time = time.time()
 
-        res = await generate_queries(
-            request,
-            {
-                "model": form_data["model"],
-                "messages": messages,
-                "prompt": user_message,
-                "type": "web_search",
-            },
-            user,
-        )
+    # Queries may come from the plan of the chat turn already
+    if queries is None:
+        queries = []
+        try:
+            res = await generate_queries(
+                request,
+                {
+                    "model": form_data["model"],
+                    "messages": messages,
+                    "prompt": user_message,
+                    "type": "web_search",
+                },
+                user,
+            )
 
-        response = res["choices"][0]["message"]["content"]
+            response = res["choices"][0]["message"]["content"]
 
-        try:
-            bracket_start = response.find("{")
-            bracket_end = response.rfind("}") + 1
+            try:
+                bracket_start = response.find("{")
+                bracket_end = response.rfind("}") + 1
 
-            if bracket_start == -1 or bracket_end == -1:
-                raise Exception("No JSON object found in the response")
+                if bracket_start == -1 or bracket_end == -1:
+                    raise Exception("No JSON object found in the response")
 
-            response = response[bracket_start:bracket_end]
-            queries = json.loads(response)
-            queries = queries.get("queries", [])
-        except Exception as e:
-            queries = [response]
+                response = response[bracket_start:bracket_end]
+                queries = json.loads(response)
+                queries = queries.get("queries", [])
+            except Exception as e:
+                queries = [response]
 
-    except Exception as e:
-        log.exception(e)
-        queries = [user_message]
+        except Exception as e:
+            log.exception(e)
+            queries = [user_message]
 
     if len(queries) == 0:
         await event_emitter(
@@ -405,9 +421,10 @@ async def chat_web_search_handler(
                 },
             }
         )
-        return form_data
+        return form_data, {}
 
     all_results = []
+    files = []
 
     for searchQuery in queries:
         await event_emitter(
@@ -431,7 +448,6 @@ async def chat_web_search_handler(
 
             if results:
                 all_results.append(results)
-                files = form_data.get("files", [])
 
                 if results.get("collection_names"):
                     for col_idx, collection_name in enumerate(
@@ -471,8 +487,6 @@ async def chat_web_search_handler(
                                 "urls": results["filenames"],
                             }
                         )
-
-                form_data["files"] = files
         except Exception as e:
             log.exception(e)
             await event_emitter(
@@ -518,7 +532,7 @@ async def chat_web_search_handler(
             }
         )
 
-    return form_data
+    return form_data, {"files": files}
 
 
 async def chat_image_generation_handler(
@@ -614,54 +628,111 @@ async def chat_image_generation_handler(
 
         system_message_content = "<context>Unable to generate an image, tell the user that an error occurred</context>"
 
-    if system_message_content:
-        form_data["messages"] = add_or_update_system_message(
-            system_message_content, form_data["messages"]
-        )
+    return form_data, {"system_message": system_message_content}
 
-    return form_data
+async def get_retrieval_queries(
+    request: Request,
+    body: dict,
+    user: UserModel,
+    queries: Optional[list[str]] = None,
+) -> list[str]:
+    # Queries may come from the plan of the chat turn already
+    if queries is None:
+        queries = await generate_retrieval_queries(request, body, user)
 
-async def chat_completion_files_handler(
+    if len(queries) == 0:
+        user_message = get_last_user_message(body["messages"])
+        # Prevent empty string or None
+        if not user_message or user_message.strip() == "":
+            user_message = "Please find relevant information from the documents"
+        queries = [user_message]
+
+    return queries
+
+
+async def generate_retrieval_queries(
     request: Request, body: dict, user: UserModel
-) -> tuple[dict, dict[str, list]]:
-    sources = []
+) -> list[str]:
+    queries = []
+    try:
+        queries_response = await generate_queries(
+            request,
+            {
+                "model": body["model"],
+                "messages": body["messages"],
+                "type": "retrieval",
+            },
+            user,
+        )
+        queries_response = queries_response["choices"][0]["message"]["content"]
 
-    if files := body.get("metadata", {}).get("files", None):
-        queries = []
         try:
-            queries_response = await generate_queries(
-                request,
-                {
-                    "model": body["model"],
-                    "messages": body["messages"],
-                    "type": "retrieval",
-                },
-                user,
-            )
-            queries_response = queries_response["choices"][0]["message"]["content"]
+            bracket_start = queries_response.find("{")
+            bracket_end = queries_response.rfind("}") + 1
 
-            try:
-                bracket_start = queries_response.find("{")
-                bracket_end = queries_response.rfind("}") + 1
+            if bracket_start == -1 or bracket_end == -1:
+                raise Exception("No JSON object found in the response")
 
-                if bracket_start == -1 or bracket_end == -1:
-                    raise Exception("No JSON object found in the response")
+            queries_response = queries_response[bracket_start:bracket_end]
+            queries_response = json.loads(queries_response)
+        except Exception as e:
+            queries_response = {"queries": [queries_response]}
+
+        queries = queries_response.get("queries", [])
+    except:
+        pass
+
+    return queries
+
+
+async def chat_plan_handler(
+    request: Request,
+    form_data: dict,
+    user,
+    web_search: bool = False,
+    retrieval: bool = False,
+    tools: Optional[dict] = None,
+) -> dict:
+    """
+    Web search queries, retrieval queries and tool calls of the chat turn,
+    generated in a single task completion. Fields the plan lacks are None.
+    """
+    try:
+        res = await generate_plan(
+            request,
+            {
+                "model": form_data["model"],
+                "messages": form_data["messages"],
+                "web_search": web_search,
+                "retrieval": retrieval,
+                "tools": (
+                    [tool.get("spec", {}) for tool in tools.values()] if tools else None
+                ),
+                "chat_id": form_data.get("metadata", {}).get("chat_id", None),
+            },
+            user,
+        )
+        return get_plan_from_response(res["choices"][0]["message"]["content"])
+    except Exception as e:
+        log.exception(e)
+        return {}
 
-                queries_response = queries_response[bracket_start:bracket_end]
-                queries_response = json.loads(queries_response)
-            except Exception as e:
-                queries_response = {"queries": [queries_response]}
 
-            queries = queries_response.get("queries", [])
-        except:
-            pass
+async def chat_completion_files_handler(
+    request: Request,
+    body: dict,
+    user: UserModel,
+    files: Optional[list] = None,
+    queries: Optional[list[str]] = None,
+) -> tuple[dict, dict[str, list]]:
+    sources = []
 
-        if len(queries) == 0:
-            user_message = get_last_user_message(body["messages"])
-            # Prevent empty string or None
-            if not user_message or user_message.strip() == "":
-                user_message = "Please find relevant information from the documents"
-            queries = [user_message]
+    if files is None:
+        files = body.get("metadata", {}).get("files", None)
+
+    if files:
+        if queries is None:
+            queries = await get_retrieval_queries(request, body, user)
 
         try:
             # Offload get_sources_from_files to a separate thread
@@ -693,6 +764,155 @@ async def chat_completion_files_handler(
     return body, {"sources": sources}
 
 
+async def chat_image_ocr_handler(request: Request, form_data: dict, extra_params: dict):
+    event_emitter = extra_params["__event_emitter__"]
+    metadata = extra_params["__metadata__"]
+
+    try:
+        messages_table = await Chats.get_messages_by_chat_id_async(metadata["chat_id"])
+        log.info(f"length of messages_table: {len(messages_table)}")
+        log.info(f"messages_table: {messages_table}")
+        log.info(f"length of form_data['messages']: {len(form_data['messages'])}")
+        log.info(f"form_data['messages']: {form_data['messages']}")
+        
+        # parent node부터 순서대로 처리하기 위해 정렬
+        sorted_messages = []
+        current_id = None
+        
+        # currentId 찾기
+        for msg in messages_table.values():
+            if msg.get('parentId') is None:
+                current_id = msg['id']
+                break
+        
+        # parent node부터 순서대로 메시지 정렬
+        while current_id is not None:
+            msg = messages_table[current_id]
+            sorted_messages.append(msg)
+            if msg.get('childrenIds'):
+                current_id = msg['childrenIds'][0]  # 첫 번째 자식 노드로 이동
+            else:
+                current_id = None
+        
+        # form_data의 messages 길이만큼만 사용
+        sorted_messages = sorted_messages[:len(form_data["messages"])]
+        
+        for message, message_table in zip(form_data["messages"], sorted_messages):
+            if not isinstance(message["content"], str):
+                processed_content = []
+                images = []
+                for msg in message["content"]:
+                    if msg.get("type") == "image_url":
+                        try:
+                            # OCR 결과가 이미 포함되어 있는지 확인
+                            if msg.get("image_url", {}).get("text", "") and msg.get("image_url", {}).get("confidence", 0):
+                                processed_message = {
+                                    "type": "text",
+                                    "text": msg.get("image_url", {}).get("text", ""),
+                                    "confidence": msg.get("image_url", {}).get("confidence", 0)
+                                }
+                                # OCR 성공
+                                log.info(f"ocr_result (pre-processed): {processed_message}")
+
+                            else:
+                                idx = 0
+                                key = request.app.state.config.UPSTAGE_API_KEYS[idx]
+                                await event_emitter({
+                                        "type": "status",
+                                        "data": {
+                                            "action": "image_ocr",
+                                            "description": "Waiting for image ocr results",
+                                            "done": False,
+                                        }
+                                    })
+                                processed_message = await process_message_with_ocr(msg, key, message["content"])
+                                if processed_message.get("type") == "image_ocr_error":
+                                    # OCR 실패 emit
+                                    if event_emitter:
+                                        await event_emitter({
+                                            "type": "ocr_result",
+                                            "data": {
+                                                "text": "No OCR result",
+                                                "confidence": 0.01,
+                                                "error": processed_message.get("text"),
+                                                "message_id": message_table.get("id", None)
+                                            }
+                                        })
+                                    images.append({
+                                        "type": "image",
+                                        "url": msg.get("image_url", {}).get("url", ""),
+                                        "text": "No OCR result",
+                                        "confidence": 0.01,
+                                    })
+                                else:
+                                    # OCR 성공 emit
+                                    if event_emitter:
+                                        log.info(f"ocr_result: {processed_message}")
+                                        await event_emitter({
+                                            "type": "ocr_result",
+                                            "data": {
+                                                "text": processed_message.get("text"),
+                                                "confidence": processed_message.get("confidence", 0.01),
+                                                "message_id": message_table.get("id", None)
+                                            }
+                                        })
+                                    images.append({
+                                        "type": "image",
+                                        "url": msg.get("image_url", {}).get("url", ""),
+                                        "text": processed_message.get("text", "No OCR result"),
+                                        "confidence": processed_message.get("confidence", 0.01),
+                                    })
+                                await event_emitter({
+                                        "type": "status",
+                                        "data": {
+                                            "action": "image_ocr",
+                                            "description": "Image ocr results",
+                                            "done": True,
+                                        }
+                                    })
+                            
+                                
+                            processed_content.append(processed_message)
+                            
+                            
+                        except Exception as e:
+                            # OCR 실패 emit
+                            if event_emitter:
+                                await event_emitter({
+                                    "type": "ocr_result",
+                                    "data": {
+                                        "text": "No OCR result",
+                                        "confidence": 0.01,
+                                        "error": str(e),
+                                        "message_id": message.get("id", None)
+                                    }
+                                })
+                            processed_content.append({
+                                "type": "image_ocr_error",
+                                "text": str(e)
+                            })
+                    else:
+                        processed_content.append(msg)
+                message["content"] = processed_content
+
+                log.info(f"message: {message}")
+                log.info(f"message_table: {message_table}")
+                log.info(f"images: {images}")
+                await Chats.upsert_message_to_chat_by_id_and_message_id_async(
+                    metadata["chat_id"],
+                    message_table["id"],
+                    {
+                        "files": images,
+                    },
+                )
+
+    except Exception as e:
+        log.info(e)
+        # 여기서는 전체 에러를 emit하거나, 필요시만 처리
+
+    return form_data
+
+
 def apply_params_to_form_data(form_data, model):
     params = form_data.pop("params", {})
     custom_params = params.pop("custom_params", {})
@@ -796,156 +1016,33 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     events = []
     sources = []
 
+    # Image OCR only rewrites the messages and file parsing only the files,
+    # so both run at once
+    stages = []
     # Only for upstage models
     if model.get("owned_by") == "upstage":
-        try:
-            messages_table = Chats.get_messages_by_chat_id(metadata["chat_id"])
-            log.info(f"length of messages_table: {len(messages_table)}")
-            log.info(f"messages_table: {messages_table}")
-            log.info(f"length of form_data['messages']: {len(form_data['messages'])}")
-            log.info(f"form_data['messages']: {form_data['messages']}")
-            
-            # parent node부터 순서대로 처리하기 위해 정렬
-            sorted_messages = []
-            current_id = None
-            
-            # currentId 찾기
-            for msg in messages_table.values():
-                if msg.get('parentId') is None:
-                    current_id = msg['id']
-                    break
-            
-            # parent node부터 순서대로 메시지 정렬
-            while current_id is not None:
-                msg = messages_table[current_id]
-                sorted_messages.append(msg)
-                if msg.get('childrenIds'):
-                    current_id = msg['childrenIds'][0]  # 첫 번째 자식 노드로 이동
-                else:
-                    current_id = None
-            
-            # form_data의 messages 길이만큼만 사용
-            sorted_messages = sorted_messages[:len(form_data["messages"])]
-            
-            for message, message_table in zip(form_data["messages"], sorted_messages):
-                if not isinstance(message["content"], str):
-                    processed_content = []
-                    images = []
-                    for msg in message["content"]:
-                        if msg.get("type") == "image_url":
-                            try:
-                                # OCR 결과가 이미 포함되어 있는지 확인
-                                if msg.get("image_url", {}).get("text", "") and msg.get("image_url", {}).get("confidence", 0):
-                                    processed_message = {
-                                        "type": "text",
-                                        "text": msg.get("image_url", {}).get("text", ""),
-                                        "confidence": msg.get("image_url", {}).get("confidence", 0)
-                                    }
-                                    # OCR 성공
-                                    log.info(f"ocr_result (pre-processed): {processed_message}")
-
-                                else:
-                                    idx = 0
-                                    key = request.app.state.config.UPSTAGE_API_KEYS[idx]
-                                    await event_emitter({
-                                            "type": "status",
-                                            "data": {
-                                                "action": "image_ocr",
-                                                "description": "Waiting for image ocr results",
-                                                "done": False,
-                                            }
-                                        })
-                                    processed_message = await process_message_with_ocr(msg, key, message["content"])
-                                    if processed_message.get("type") == "image_ocr_error":
-                                        # OCR 실패 emit
-                                        if event_emitter:
-                                            await event_emitter({
-                                                "type": "ocr_result",
-                                                "data": {
-                                                    "text": "No OCR result",
-                                                    "confidence": 0.01,
-                                                    "error": processed_message.get("text"),
-                                                    "message_id": message_table.get("id", None)
-                                                }
-                                            })
-                                        images.append({
-                                            "type": "image",
-                                            "url": msg.get("image_url", {}).get("url", ""),
-                                            "text": "No OCR result",
-                                            "confidence": 0.01,
-                                        })
-                                    else:
-                                        # OCR 성공 emit
-                                        if event_emitter:
-                                            log.info(f"ocr_result: {processed_message}")
-                                            await event_emitter({
-                                                "type": "ocr_result",
-                                                "data": {
-                                                    "text": processed_message.get("text"),
-                                                    "confidence": processed_message.get("confidence", 0.01),
-                                                    "message_id": message_table.get("id", None)
-                                                }
-                                            })
-                                        images.append({
-                                            "type": "image",
-                                            "url": msg.get("image_url", {}).get("url", ""),
-                                            "text": processed_message.get("text", "No OCR result"),
-                                            "confidence": processed_message.get("confidence", 0.01),
-                                        })
-                                    await event_emitter({
-                                            "type": "status",
-                                            "data": {
-                                                "action": "image_ocr",
-                                                "description": "Image ocr results",
-                                                "done": True,
-                                            }
-                                        })
-                                
-                                    
-                                processed_content.append(processed_message)
-                                
-                                
-                            except Exception as e:
-                                # OCR 실패 emit
-                                if event_emitter:
-                                    await event_emitter({
-                                        "type": "ocr_result",
-                                        "data": {
-                                            "text": "No OCR result",
-                                            "confidence": 0.01,
-                                            "error": str(e),
-                                            "message_id": message.get("id", None)
-                                        }
-                                    })
-                                processed_content.append({
-                                    "type": "image_ocr_error",
-                                    "text": str(e)
-                                })
-                        else:
-                            processed_content.append(msg)
-                    message["content"] = processed_content
+        stages.append(
+            Stage(
+                "image_ocr",
+                lambda results: chat_image_ocr_handler(
+                    request, form_data, extra_params
+                ),
+            )
+        )
 
-                    log.info(f"message: {message}")
-                    log.info(f"message_table: {message_table}")
-                    log.info(f"images: {images}")
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        metadata["chat_id"],
-                        message_table["id"],
-                        {
-                            "files": images,
-                        },
-                    )
+    # Parse files if any
+    if form_data.get("files", []):
+        stages.append(
+            Stage(
+                "file_parsing",
+                lambda results: chat_file_parsing_handler(
+                    request, form_data, extra_params, user
+                ),
+            )
+        )
 
-        except Exception as e:
-            log.info(e)
-            # 여기서는 전체 에러를 emit하거나, 필요시만 처리
+    _, timings = await run_stages(stages)
 
-    # Parse files if any
-    files = form_data.get("files", [])
-    if files:
-        form_data = await chat_file_parsing_handler(request, form_data, extra_params, user)
-    # print("EWOFJIOEWFJIOEJFOI@@@@2")
-    # print(form_data)
     user_message = get_last_user_message(form_data["messages"])
     model_knowledge = model.get("info", {}).get("meta", {}).get("knowledge", False)
 
@@ -1016,32 +1113,7 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     except Exception as e:
         raise Exception(f"Error: {e}")
 
-    features = form_data.pop("features", None)
-    if features:
-        if "memory" in features and features["memory"]:
-            form_data = await chat_memory_handler(
-                request, form_data, extra_params, user
-            )
-
-        if "web_search" in features and features["web_search"]:
-            form_data = await chat_web_search_handler(
-                request, form_data, extra_params, user
-            )
-
-        if "image_generation" in features and features["image_generation"]:
-            form_data = await chat_image_generation_handler(
-                request, form_data, extra_params, user
-            )
-
-        if "code_interpreter" in features and features["code_interpreter"]:
-            form_data["messages"] = add_or_update_user_message(
-                (
-                    request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE
-                    if request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE != ""
-                    else DEFAULT_CODE_INTERPRETER_PROMPT
-                ),
-                form_data["messages"],
-            )
+    features = form_data.pop("features", None) or {}
 
     tool_ids = form_data.pop("tool_ids", None)
     files = form_data.pop("files", None)
@@ -1067,18 +1139,16 @@ async def process_chat_payload(request, form_data, user, metadata, model):
 
     tools_dict = {}
     arcade_tools = []
-    arcade_tool_mapper = {}
-    for idx, tool in enumerate(request.app.state.ARCADE_TOOLS):
-        arcade_tool_mapper[tool.qualified_name] = tool
     try:
         if tool_ids:
             for tool_id in tool_ids:
                 if tool_id.startswith("arcade:"):
                     arcade_toolkit_idx = int(tool_id.split(":")[1])
-                    if request.app.state.config.ARCADE_TOOLS_CONFIG[arcade_toolkit_idx].get('enabled'):
-                        for tool in request.app.state.config.ARCADE_TOOLS_CONFIG[arcade_toolkit_idx].get('tools'):
-                            if tool.get('enabled'):
-                                arcade_tools.append(arcade_tool_mapper[tool.get('name')])
+                    arcade_tools.extend(
+                        ARCADE_TOOL_CATALOG.get_enabled_tools(
+                            request.app.state.config.ARCADE_TOOLS_CONFIG[arcade_toolkit_idx]
+                        )
+                    )
 
         
             tools_dict = get_tools(
@@ -1107,41 +1177,220 @@ async def process_chat_payload(request, form_data, user, metadata, model):
         log.exception(e)
 
     print("tools_dict", tools_dict)
-    if tools_dict:
-        if metadata.get("function_calling") == "native":
-            # If the function calling is native, then call the tools function calling handler
-            metadata["tools"] = tools_dict
-            form_data["tools"] = [
-                {"type": "function", "function": tool.get("spec", {})}
-                for tool in tools_dict.values()
-            ]
-        else:
-            # If the function calling is not native, then call the tools function calling handler
-            try:
-                form_data, flags = await chat_completion_tools_handler(
-                    request, form_data, extra_params, user, models, tools_dict
-                )
-                sources.extend(flags.get("sources", []))
+    if tools_dict and metadata.get("function_calling") == "native":
+        # If the function calling is native, then call the tools function calling handler
+        metadata["tools"] = tools_dict
+        form_data["tools"] = [
+            {"type": "function", "function": tool.get("spec", {})}
+            for tool in tools_dict.values()
+        ]
+
+    async def run_tools(results):
+        # If the function calling is not native, then call the tools function calling handler
+        try:
+            return await chat_completion_tools_handler(
+                request,
+                form_data,
+                extra_params,
+                user,
+                models,
+                tools_dict,
+                tool_calls=results.get("plan", {}).get("tool_calls"),
+            )
+        except Exception as e:
+            log.exception(e)
 
-            except Exception as e:
-                log.exception(e)
-    
     # arcade tools using part
-    try:
-        if arcade_tools:
-            form_data, flags = await chat_completion_arcade_tools_handler(
+    async def run_arcade_tools(results):
+        try:
+            return await chat_completion_arcade_tools_handler(
                 request, form_data, extra_params, user, models, arcade_tools
             )
-            sources.extend(flags.get("sources", []))
+        except Exception as e:
+            log.exception(e)
 
-    except Exception as e:
-        log.exception(e)
+    async def run_files(results):
+        try:
+            return await chat_completion_files_handler(
+                request, form_data, user, queries=results["retrieval_queries"]
+            )
+        except Exception as e:
+            log.exception(e)
 
-    try:
-        form_data, flags = await chat_completion_files_handler(request, form_data, user)
-        sources.extend(flags.get("sources", []))
-    except Exception as e:
-        log.exception(e)
+    async def run_web_search_files(results):
+        web_search_files = results["web_search"][1].get("files", [])
+        # Tools handling files themselves remove them from the metadata
+        if not web_search_files or "files" not in metadata:
+            return None
+
+        try:
+            return await chat_completion_files_handler(
+                request,
+                form_data,
+                user,
+                files=web_search_files,
+                queries=results["retrieval_queries"],
+            )
+        except Exception as e:
+            log.exception(e)
+
+    # The features, tools and retrievals below run concurrently, as a graph of
+    # stages that only wait for the stages whose output they need. They don't
+    # modify the payload, their contributions are applied below in a fixed order.
+    stages = []
+
+    # Web search queries, retrieval queries and tool calls are planned in a
+    # single task completion when more than one of them is needed. Each falls
+    # back to its own completion if the plan lacks it.
+    plan_web_search = bool(
+        features.get("web_search")
+        and request.app.state.config.ENABLE_SEARCH_QUERY_GENERATION
+    )
+    plan_retrieval = bool(
+        (files or features.get("web_search"))
+        and request.app.state.config.ENABLE_RETRIEVAL_QUERY_GENERATION
+    )
+    plan_tools = (
+        tools_dict
+        if tools_dict and metadata.get("function_calling") != "native"
+        else None
+    )
+
+    plan_stages = []
+    if (
+        request.app.state.config.ENABLE_PLAN_GENERATION
+        and sum([plan_web_search, plan_retrieval, bool(plan_tools)]) > 1
+    ):
+        plan_stages.append("plan")
+        stages.append(
+            Stage(
+                "plan",
+                lambda results: chat_plan_handler(
+                    request,
+                    form_data,
+                    user,
+                    web_search=plan_web_search,
+                    retrieval=plan_retrieval,
+                    tools=plan_tools,
+                ),
+            )
+        )
+
+    if features.get("memory"):
+        stages.append(
+            Stage(
+                "memory",
+                lambda results: chat_memory_handler(
+                    request, form_data, extra_params, user
+                ),
+            )
+        )
+
+    if features.get("web_search"):
+        stages.append(
+            Stage(
+                "web_search",
+                lambda results: chat_web_search_handler(
+                    request,
+                    form_data,
+                    extra_params,
+                    user,
+                    queries=results.get("plan", {}).get("web_search_queries"),
+                ),
+                depends_on=plan_stages,
+            )
+        )
+
+    if features.get("image_generation"):
+        stages.append(
+            Stage(
+                "image_generation",
+                lambda results: chat_image_generation_handler(
+                    request, form_data, extra_params, user
+                ),
+            )
+        )
+
+    # Tools may remove the files from the metadata, so retrieval waits for them
+    tool_stages = []
+    if tools_dict and metadata.get("function_calling") != "native":
+        tool_stages.append("tools")
+        stages.append(Stage("tools", run_tools, depends_on=plan_stages))
+
+    if arcade_tools:
+        tool_stages.append("arcade_tools")
+        stages.append(Stage("arcade_tools", run_arcade_tools))
+
+    if files or features.get("web_search"):
+        stages.append(
+            Stage(
+                "retrieval_queries",
+                lambda results: get_retrieval_queries(
+                    request,
+                    form_data,
+                    user,
+                    queries=results.get("plan", {}).get("retrieval_queries"),
+                ),
+                depends_on=plan_stages,
+            )
+        )
+
+    if files:
+        stages.append(
+            Stage(
+                "files",
+                run_files,
+                depends_on=["retrieval_queries", *tool_stages],
+            )
+        )
+
+    if features.get("web_search"):
+        stages.append(
+            Stage(
+                "web_search_files",
+                run_web_search_files,
+                depends_on=["web_search", "retrieval_queries", *tool_stages],
+            )
+        )
+
+    results, stage_timings = await run_stages(stages)
+    timings.update(stage_timings)
+
+    if "memory" in results:
+        _, flags = results["memory"]
+        form_data["messages"] = add_or_update_system_message(
+            flags["system_message"], form_data["messages"], append=True
+        )
+
+    if results.get("web_search") and "files" in metadata:
+        _, flags = results["web_search"]
+        metadata["files"] = [*(metadata["files"] or []), *flags.get("files", [])]
+
+    if "image_generation" in results:
+        _, flags = results["image_generation"]
+        if flags.get("system_message"):
+            form_data["messages"] = add_or_update_system_message(
+                flags["system_message"], form_data["messages"]
+            )
+
+    if features.get("code_interpreter"):
+        form_data["messages"] = add_or_update_user_message(
+            (
+                request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE
+                if request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE != ""
+                else DEFAULT_CODE_INTERPRETER_PROMPT
+            ),
+            form_data["messages"],
+        )
+
+    for name in ["tools", "arcade_tools", "files", "web_search_files"]:
+        if results.get(name):
+            _, flags = results[name]
+            for content in flags.get("user_messages", []):
+                form_data["messages"] = add_or_update_user_message(
+                    content, form_data["messages"]
+                )
+            sources.extend(flags.get("sources", []))
 
     # If context is not empty, insert it into the messages
     if len(sources) > 0:
@@ -1196,6 +1445,23 @@ async def process_chat_payload(request, form_data, user, metadata, model):
                 form_data["messages"],
             )
 
+    # Drop the oldest turns that don't fit in the model's context window
+    budget = get_context_token_budget(model, form_data)
+    if budget:
+        start = time.perf_counter()
+        form_data["messages"], trimmed = fit_messages_to_context(
+            form_data["messages"],
+            budget,
+            request.app.state.config.TIKTOKEN_ENCODING_NAME,
+        )
+        timings["context"] = round(time.perf_counter() - start, 3)
+        if trimmed:
+            log.info(
+                f"Trimmed {trimmed} messages to fit {budget} tokens of {model['id']}"
+            )
+
+    log.info(f"process_chat_payload stage timings: {timings}")
+
     # If there are citations, add them to the data_items
     sources = [
         source
@@ -1207,6 +1473,8 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     if len(sources) > 0:
         events.append({"sources": sources})
 
+    events.append({"payload_timings": timings})
+
     if model_knowledge:
         await event_emitter(
             {
@@ -1227,7 +1495,7 @@ async def process_chat_response(
     request, response, form_data, user, metadata, model, events, tasks
 ):
     async def background_tasks_handler():
-        message_map = Chats.get_messages_by_chat_id(metadata["chat_id"])
+        message_map = await Chats.get_messages_by_chat_id_async(metadata["chat_id"])
         message = message_map.get(metadata["message_id"]) if message_map else None
 
         if message:
@@ -1379,7 +1647,7 @@ async def process_chat_response(
         if event_emitter:
             if "error" in response:
                 error = response["error"].get("detail", response["error"])
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                     metadata["chat_id"],
                     metadata["message_id"],
                     {
@@ -1388,7 +1656,7 @@ async def process_chat_response(
                 )
 
             if "selected_model_id" in response:
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                     metadata["chat_id"],
                     metadata["message_id"],
                     {
@@ -1423,7 +1691,7 @@ async def process_chat_response(
                     )
 
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1434,7 +1702,7 @@ async def process_chat_response(
 
                     # Send a webhook notification if the user is not active
                     if not get_active_status_by_user_id(user.id):
-                        webhook_url = Users.get_user_webhook_url_by_id(user.id)
+                        webhook_url = await Users.get_user_webhook_url_by_id_async(user.id)
                         if webhook_url:
                             post_webhook(
                                 request.app.state.WEBUI_NAME,
@@ -1507,12 +1775,23 @@ async def process_chat_response(
         )
     ]
 
+    # Only filters with a stream handler need each event of the stream decoded.
+    # Outlet filters run on the finished message, through /api/chat/completed
+    stream_filter_functions = [
+        function
+        for function in filter_functions
+        if function
+        and hasattr(
+            get_function_module(request, function.id, load_from_db=False), "stream"
+        )
+    ]
+
     # Streaming response
     if event_emitter and event_caller:
         task_id = str(uuid4())  # Create a unique task ID.
         model_id = form_data.get("model", "")
 
-        Chats.upsert_message_to_chat_by_id_and_message_id(
+        await Chats.upsert_message_to_chat_by_id_and_message_id_async(
             metadata["chat_id"],
             metadata["message_id"],
             {
@@ -1839,7 +2118,7 @@ async def process_chat_response(
 
                 return content, content_blocks, end_flag
 
-            message = Chats.get_message_by_id_and_message_id(
+            message = await Chats.get_message_by_id_and_message_id_async(
                 metadata["chat_id"], metadata["message_id"]
             )
 
@@ -1888,6 +2167,18 @@ async def process_chat_response(
 
             solution_tags = [("|begin_of_solution|", "|end_of_solution|")]
 
+            # Until a stage needs to inspect the stream, content deltas are
+            # forwarded to the client as they arrive, without re-serializing
+            # the message for each of them
+            passthrough = not (
+                stream_filter_functions
+                or metadata.get("tools")
+                or form_data.get("tools")
+                or DETECT_CODE_INTERPRETER
+                or ENABLE_REALTIME_CHAT_SAVE
+                or "<" in content
+            )
+
             try:
                 for event in events:
                     await event_emitter(
@@ -1898,7 +2189,7 @@ async def process_chat_response(
                     )
 
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -1909,6 +2200,7 @@ async def process_chat_response(
                 async def stream_body_handler(response):
                     nonlocal content
                     nonlocal content_blocks
+                    nonlocal passthrough
 
                     response_tool_calls = []
 
@@ -1930,13 +2222,14 @@ async def process_chat_response(
                         try:
                             data = json.loads(data)
 
-                            data, _ = await process_filter_functions(
-                                request=request,
-                                filter_functions=filter_functions,
-                                filter_type="stream",
-                                form_data=data,
-                                extra_params=extra_params,
-                            )
+                            if stream_filter_functions:
+                                data, _ = await process_filter_functions(
+                                    request=request,
+                                    filter_functions=stream_filter_functions,
+                                    filter_type="stream",
+                                    form_data=data,
+                                    extra_params=extra_params,
+                                )
 
                             if data:
                                 if "event" in data:
@@ -1944,7 +2237,7 @@ async def process_chat_response(
 
                                 if "selected_model_id" in data:
                                     model_id = data["selected_model_id"]
-                                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                                         metadata["chat_id"],
                                         metadata["message_id"],
                                         {
@@ -1977,6 +2270,32 @@ async def process_chat_response(
                                         continue
 
                                     delta = choices[0].get("delta", {})
+
+                                    if passthrough:
+                                        value = delta.get("content")
+                                        if (
+                                            delta.get("tool_calls")
+                                            or delta.get("reasoning_content")
+                                            or delta.get("reasoning")
+                                            or (value and "<" in value)
+                                        ):
+                                            # e.g. a tag to detect, the stream
+                                            # is decoded from here on
+                                            passthrough = False
+                                        elif value:
+                                            content = f"{content}{value}"
+                                            content_blocks[-1]["content"] += value
+
+                                            # The client appends the delta of
+                                            # the upstream event
+                                            await event_emitter(
+                                                {
+                                                    "type": "chat:completion",
+                                                    "data": data,
+                                                }
+                                            )
+                                            continue
+
                                     delta_tool_calls = delta.get("tool_calls", None)
 
                                     if delta_tool_calls:
@@ -2141,7 +2460,7 @@ async def process_chat_response(
 
                                         if ENABLE_REALTIME_CHAT_SAVE:
                                             # Save message in the database
-                                            result = Chats.upsert_message_to_chat_by_id_and_message_id(
+                                            result = await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
                                                 {
@@ -2226,9 +2545,7 @@ async def process_chat_response(
 
                     tools = metadata.get("tools", {})
 
-                    results = []
-                    for tool_call in response_tool_calls:
-                        tool_call_id = tool_call.get("id", "")
+                    async def execute_tool_call(tool_call):
                         tool_name = tool_call.get("function", {}).get("name", "")
 
                         tool_function_params = {}
@@ -2249,49 +2566,45 @@ async def process_chat_response(
                                     f"Error parsing tool call arguments: {tool_call.get('function', {}).get('arguments', '{}')}"
                                 )
 
-                        tool_result = None
+                        if tool_name not in tools:
+                            return None
 
-                        if tool_name in tools:
-                            tool = tools[tool_name]
-                            spec = tool.get("spec", {})
+                        tool = tools[tool_name]
+                        spec = tool.get("spec", {})
 
-                            try:
-                                allowed_params = (
-                                    spec.get("parameters", {})
-                                    .get("properties", {})
-                                    .keys()
-                                )
+                        allowed_params = (
+                            spec.get("parameters", {}).get("properties", {}).keys()
+                        )
 
-                                tool_function_params = {
-                                    k: v
-                                    for k, v in tool_function_params.items()
-                                    if k in allowed_params
-                                }
+                        tool_function_params = {
+                            k: v
+                            for k, v in tool_function_params.items()
+                            if k in allowed_params
+                        }
 
-                                if tool.get("direct", False):
-                                    tool_result = await event_caller(
-                                        {
-                                            "type": "execute:tool",
-                                            "data": {
-                                                "id": str(uuid4()),
-                                                "name": tool_name,
-                                                "params": tool_function_params,
-                                                "server": tool.get("server", {}),
-                                                "session_id": metadata.get(
-                                                    "session_id", None
-                                                ),
-                                            },
-                                        }
-                                    )
+                        if tool.get("direct", False):
+                            return await event_caller(
+                                {
+                                    "type": "execute:tool",
+                                    "data": {
+                                        "id": str(uuid4()),
+                                        "name": tool_name,
+                                        "params": tool_function_params,
+                                        "server": tool.get("server", {}),
+                                        "session_id": metadata.get(
+                                            "session_id", None
+                                        ),
+                                    },
+                                }
+                            )
+                        else:
+                            tool_function = tool["callable"]
+                            return await tool_function(**tool_function_params)
 
-                                else:
-                                    tool_function = tool["callable"]
-                                    tool_result = await tool_function(
-                                        **tool_function_params
-                                    )
+                    results = [None] * len(response_tool_calls)
 
-                            except Exception as e:
-                                tool_result = str(e)
+                    async def tool_call_done_handler(index, tool_result):
+                        tool_call_id = response_tool_calls[index].get("id", "")
 
                         tool_result_files = []
                         if isinstance(tool_result, list):
@@ -2306,18 +2619,33 @@ async def process_chat_response(
                         ):
                             tool_result = json.dumps(tool_result, indent=2)
 
-                        results.append(
+                        results[index] = {
+                            "tool_call_id": tool_call_id,
+                            "content": tool_result,
+                            **({"files": tool_result_files} if tool_result_files else {}),
+                        }
+
+                        # Show each tool as done as soon as it is, while the
+                        # others are still executing
+                        content_blocks[-1]["results"] = [
+                            result for result in results if result is not None
+                        ]
+                        await event_emitter(
                             {
-                                "tool_call_id": tool_call_id,
-                                "content": tool_result,
-                                **(
-                                    {"files": tool_result_files}
-                                    if tool_result_files
-                                    else {}
-                                ),
+                                "type": "chat:completion",
+                                "data": {
+                                    "content": serialize_content_blocks(
+                                        content_blocks
+                                    ),
+                                },
                             }
                         )
 
+                    # Executed concurrently, results are kept in the order of the calls
+                    await run_tool_calls(
+                        response_tool_calls, execute_tool_call, tool_call_done_handler
+                    )
+
                     content_blocks[-1]["results"] = results
 
                     content_blocks.append(
@@ -2549,7 +2877,7 @@ async def process_chat_response(
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -2559,7 +2887,7 @@ async def process_chat_response(
 
                 # Send a webhook notification if the user is not active
                 if not get_active_status_by_user_id(user.id):
-                    webhook_url = Users.get_user_webhook_url_by_id(user.id)
+                    webhook_url = await Users.get_user_webhook_url_by_id_async(user.id)
                     if webhook_url:
                         post_webhook(
                             request.app.state.WEBUI_NAME,
@@ -2587,7 +2915,7 @@ async def process_chat_response(
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -2605,6 +2933,36 @@ async def process_chat_response(
         return {"status": True, "task_id": task_id}
 
     else:
+        if not stream_filter_functions:
+            # Nothing inspects the stream: the upstream bytes are forwarded as
+            # they are, and only read on the side to save the message
+            async def passthrough_stream_wrapper(original_generator, events):
+                for event in events:
+                    yield f"data: {json.dumps(event)}\n\n"
+
+                collector = StreamContentCollector()
+                async for data in original_generator:
+                    collector.feed(data)
+                    yield data
+                collector.close()
+
+                if metadata.get("chat_id") and metadata.get("message_id"):
+                    message = {"content": collector.content.strip()}
+                    if collector.error:
+                        message["error"] = {"content": collector.error}
+                    if collector.usage:
+                        message["usage"] = collector.usage
+
+                    await Chats.upsert_message_to_chat_by_id_and_message_id_async(
+                        metadata["chat_id"], metadata["message_id"], message
+                    )
+
+            return StreamingResponse(
+                passthrough_stream_wrapper(response.body_iterator, events),
+                headers=dict(response.headers),
+                background=response.background,
+            )
+
         # Fallback to the original response
         async def stream_wrapper(original_generator, events):
             def wrap_item(item):
@@ -2613,7 +2971,7 @@ async def process_chat_response(
             for event in events:
                 event, _ = await process_filter_functions(
                     request=request,
-                    filter_functions=filter_functions,
+                    filter_functions=stream_filter_functions,
                     filter_type="stream",
                     form_data=event,
                     extra_params=extra_params,
@@ -2625,7 +2983,7 @@ async def process_chat_response(
             async for data in original_generator:
                 data, _ = await process_filter_functions(
                     request=request,
-                    filter_functions=filter_functions,
+                    filter_functions=stream_filter_functions,
                     filter_type="stream",
                     form_data=data,
                     extra_params=extra_params,
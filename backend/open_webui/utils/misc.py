@@ -48,12 +48,11 @@ def get_message_list(messages, message_id):
     message_list = []
 
     while current_message:
-        message_list.insert(
-            0, current_message
-        )  # Insert the message at the beginning of the list
+        message_list.append(current_message)  # Collected from the leaf to the root
         parent_id = current_message.get("parentId")  # Use .get() for safety
         current_message = messages.get(parent_id) if parent_id else None
 
+    message_list.reverse()
     return message_list
 
 
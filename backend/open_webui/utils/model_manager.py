@@ -0,0 +1,271 @@
+import asyncio
+import gc
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import psutil
+
+from open_webui.env import LOCAL_MODELS_IDLE_TIMEOUT, SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+def get_model_memory_bytes(model: Any) -> Optional[int]:
+    """Size of the parameters and buffers of a torch model, if it is one."""
+    for module in [model, getattr(model, "model", None)]:
+        if module is None or not callable(getattr(module, "parameters", None)):
+            continue
+        try:
+            tensors = list(module.parameters()) + list(module.buffers())
+            return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+        except Exception:
+            continue
+    return None
+
+
+class ManagedModel:
+    """
+    Handle of a local model loaded by the LocalModelManager. It stands in for
+    the model itself: attribute access and calls are forwarded to the loaded
+    model, waiting for it to finish loading (or loading it on first use, or
+    reloading it after an eviction).
+    """
+
+    def __init__(
+        self,
+        manager: "LocalModelManager",
+        name: str,
+        key: Any,
+        loader: Callable[[], Any],
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        # Underscored so they don't shadow attributes of the wrapped model
+        self._manager = manager
+        self._name = name
+        self._key = key
+        self._loader = loader
+        self._on_error = on_error
+
+        self._status = "loading"
+        self._model = None
+        self._future: Optional[Future] = None
+        self._error: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._load_seconds: Optional[float] = None
+        self._memory_bytes: Optional[int] = None
+        self._last_used_at = time.time()
+
+    def get(self, timeout: Optional[float] = None):
+        """The loaded model, waiting for it to load if needed."""
+        self._last_used_at = time.time()
+        return self._manager._get_model(self, timeout)
+
+    def is_ready(self) -> bool:
+        return self._status == "ready"
+
+    def get_status(self) -> dict:
+        return {
+            "key": str(self._key),
+            "status": self._status,
+            "error": self._error,
+            "loaded_at": self._loaded_at,
+            "load_seconds": self._load_seconds,
+            "memory_bytes": self._memory_bytes,
+            "last_used_at": self._last_used_at,
+        }
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self.get()(*args, **kwargs)
+
+
+class LocalModelManager:
+    """
+    Loads local models (embedding, reranking, Whisper, TTS) in background
+    threads. Loading a model under a name returns its ManagedModel handle right
+    away; loading the same key again reuses the handle, so concurrent requests
+    and repeated config updates share one load, while a new key replaces the
+    model. Models can also be registered to load on their first use, and
+    models unused for `idle_timeout` seconds are unloaded and reloaded on their
+    next use.
+    """
+
+    def __init__(self, idle_timeout: int = 0, max_workers: int = 2):
+        self.idle_timeout = idle_timeout
+
+        self._models: Dict[str, ManagedModel] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="model-loader"
+        )
+
+    def load(
+        self,
+        name: str,
+        key: Any,
+        loader: Callable[[], Any],
+        on_error: Optional[Callable[[Exception], None]] = None,
+        lazy: bool = False,
+    ) -> ManagedModel:
+        """
+        Starts loading `loader()` as the `name` model unless the model for
+        `key` is already loaded or loading. With `lazy`, the model is only
+        loaded on its first use. `on_error` is called from the loader thread
+        if loading fails.
+        """
+        with self._lock:
+            current = self._models.get(name)
+            if current and current._key == key and current._status != "failed":
+                if current._status == "idle" and not lazy:
+                    current._status = "loading"
+                    current._future = self._executor.submit(self._load, current)
+                return current
+
+            handle = ManagedModel(self, name, key, loader, on_error)
+            if lazy:
+                handle._status = "idle"
+            else:
+                handle._future = self._executor.submit(self._load, handle)
+            self._models[name] = handle
+
+            if current:
+                self._release(current, "unloaded")
+
+        if not lazy:
+            log.info(f"Loading local model {name} ({key}) in the background")
+        return handle
+
+    def unload(self, name: str):
+        with self._lock:
+            handle = self._models.pop(name, None)
+            if handle:
+                self._release(handle, "unloaded")
+        if handle:
+            self._collect()
+
+    def get(self, name: str) -> Optional[ManagedModel]:
+        return self._models.get(name)
+
+    def is_ready(self) -> bool:
+        """Whether no model is still loading."""
+        return all(handle._status != "loading" for handle in self._models.values())
+
+    def get_status(self) -> dict:
+        return {name: handle.get_status() for name, handle in self._models.items()}
+
+    def evict_idle_models(self) -> list[str]:
+        if self.idle_timeout <= 0:
+            return []
+
+        evicted = []
+        now = time.time()
+        with self._lock:
+            for name, handle in self._models.items():
+                if (
+                    handle._status == "ready"
+                    and now - handle._last_used_at > self.idle_timeout
+                ):
+                    self._release(handle, "evicted")
+                    evicted.append(name)
+
+        if evicted:
+            log.info(f"Unloaded idle local models: {evicted}")
+            self._collect()
+        return evicted
+
+    async def periodic_idle_eviction(self):
+        if self.idle_timeout <= 0:
+            return
+
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 60))
+            try:
+                self.evict_idle_models()
+            except Exception as e:
+                log.warning(f"Error evicting idle local models: {e}")
+
+    def _get_model(self, handle: ManagedModel, timeout: Optional[float]):
+        with self._lock:
+            if handle._status == "ready":
+                return handle._model
+
+            if handle._status == "unloaded":
+                # Replaced while in use, e.g. by a config update
+                current = self._models.get(handle._name)
+                if current is None:
+                    raise RuntimeError(f"Local model {handle._name} is not loaded")
+                future = None
+            else:
+                if handle._status in ("idle", "evicted"):
+                    handle._status = "loading"
+                    handle._future = self._executor.submit(self._load, handle)
+                future = handle._future
+
+        if future is None:
+            return current.get(timeout)
+        return future.result(timeout)
+
+    def _load(self, handle: ManagedModel):
+        start = time.time()
+        rss = psutil.Process().memory_info().rss
+
+        try:
+            model = handle._loader()
+            if model is None:
+                raise RuntimeError(f"Local model {handle._name} could not be loaded")
+        except Exception as e:
+            log.error(f"Error loading local model {handle._name}: {e}")
+            with self._lock:
+                current = handle._status == "loading"
+                if current:
+                    handle._status = "failed"
+                handle._error = str(e)
+            # Not for replaced handles, which must not undo the newer model
+            if current and handle._on_error:
+                handle._on_error(e)
+            raise
+
+        with self._lock:
+            if handle._status == "loading":
+                handle._model = model
+                handle._status = "ready"
+                handle._error = None
+                handle._loaded_at = time.time()
+                handle._load_seconds = handle._loaded_at - start
+                handle._memory_bytes = get_model_memory_bytes(model)
+                if handle._memory_bytes is None:
+                    # Rough estimate, other allocations may have happened meanwhile
+                    handle._memory_bytes = max(
+                        psutil.Process().memory_info().rss - rss, 0
+                    )
+
+        log.info(f"Loaded local model {handle._name} in {time.time() - start:.1f}s")
+        return model
+
+    @staticmethod
+    def _release(handle: ManagedModel, status: str):
+        handle._status = status
+        handle._model = None
+        handle._future = None
+
+    @staticmethod
+    def _collect():
+        gc.collect()
+        try:
+            import torch
+
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+
+
+MODEL_MANAGER = LocalModelManager(LOCAL_MODELS_IDLE_TIMEOUT)
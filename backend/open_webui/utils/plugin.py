@@ -6,14 +6,25 @@ from importlib import util
 import types
 import tempfile
 import logging
-
-from open_webui.env import SRC_LOG_LEVELS, PIP_OPTIONS, PIP_PACKAGE_INDEX_OPTIONS
+import hashlib
+import time
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    PIP_OPTIONS,
+    PIP_PACKAGE_INDEX_OPTIONS,
+    PLUGIN_VERSION_CHECK_INTERVAL,
+)
 from open_webui.models.functions import Functions
 from open_webui.models.tools import Tools
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+# Compiled code of each tool and function module, with the hash of the content
+# it was compiled from
+COMPILED_MODULES: dict[str, tuple[str, types.CodeType]] = {}
+
 
 def extract_frontmatter(content):
     """
@@ -68,6 +79,25 @@ def replace_imports(content):
     return content
 
 
+def get_content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def compile_module_content(module_name: str, content: str) -> types.CodeType:
+    """
+    Compile the content of a tool or function module, reusing the code object
+    compiled before if the content is the same.
+    """
+    content_hash = get_content_hash(content)
+    compiled = COMPILED_MODULES.get(module_name)
+    if compiled and compiled[0] == content_hash:
+        return compiled[1]
+
+    code = compile(content, f"<{module_name}>", "exec")
+    COMPILED_MODULES[module_name] = (content_hash, code)
+    return code
+
+
 def load_tool_module_by_id(tool_id, content=None):
 
     if content is None:
@@ -77,8 +107,10 @@ def load_tool_module_by_id(tool_id, content=None):
 
         content = tool.content
 
-        content = replace_imports(content)
-        Tools.update_tool_by_id(tool_id, {"content": content})
+        new_content = replace_imports(content)
+        if new_content != content:
+            content = new_content
+            Tools.update_tool_by_id(tool_id, {"content": content})
     else:
         frontmatter = extract_frontmatter(content)
         # Install required packages found within the frontmatter
@@ -98,7 +130,7 @@ def load_tool_module_by_id(tool_id, content=None):
         module.__dict__["__file__"] = temp_file.name
 
         # Executing the modified content in the created module's namespace
-        exec(content, module.__dict__)
+        exec(compile_module_content(module_name, content), module.__dict__)
         frontmatter = extract_frontmatter(content)
         log.info(f"Loaded module: {module.__name__}")
 
@@ -122,8 +154,10 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
             raise Exception(f"Function not found: {function_id}")
         content = function.content
 
-        content = replace_imports(content)
-        Functions.update_function_by_id(function_id, {"content": content})
+        new_content = replace_imports(content)
+        if new_content != content:
+            content = new_content
+            Functions.update_function_by_id(function_id, {"content": content})
     else:
         frontmatter = extract_frontmatter(content)
         install_frontmatter_requirements(frontmatter.get("requirements", ""))
@@ -142,7 +176,7 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
         module.__dict__["__file__"] = temp_file.name
 
         # Execute the modified content in the created module's namespace
-        exec(content, module.__dict__)
+        exec(compile_module_content(module_name, content), module.__dict__)
         frontmatter = extract_frontmatter(content)
         log.info(f"Loaded module: {module.__name__}")
 
@@ -166,60 +200,144 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
         os.unlink(temp_file.name)
 
 
+def get_plugin_cache(request, name):
+    if not hasattr(request.app.state, name):
+        setattr(request.app.state, name, {})
+    return getattr(request.app.state, name)
+
+
+def set_function_module(request, function_id, function_module, content):
+    """
+    Cache a function module loaded from `content`, e.g. right before the
+    content is saved to the database.
+    """
+    get_plugin_cache(request, "FUNCTIONS")[function_id] = function_module
+    get_plugin_cache(request, "FUNCTION_VERSIONS")[function_id] = {
+        "hash": get_content_hash(content),
+        # Unknown until saved, the next check reads the content and finds it
+        # is the same
+        "updated_at": None,
+        "checked_at": time.monotonic(),
+    }
+
+
+def remove_function_module(request, function_id):
+    get_plugin_cache(request, "FUNCTIONS").pop(function_id, None)
+    get_plugin_cache(request, "FUNCTION_VERSIONS").pop(function_id, None)
+
+
 def get_function_module_from_cache(request, function_id, load_from_db=True):
-    if load_from_db:
-        # Always load from the database by default
-        # This is useful for hooks like "inlet" or "outlet" where the content might change
-        # and we want to ensure the latest content is used.
+    """
+    Get the loaded module of a function, loading it if it isn't loaded yet.
 
-        function = Functions.get_function_by_id(function_id)
-        if not function:
-            raise Exception(f"Function not found: {function_id}")
-        content = function.content
+    With `load_from_db`, e.g. for hooks like "inlet" or "outlet" where the
+    content might change, the function's `updated_at` is checked at most every
+    PLUGIN_VERSION_CHECK_INTERVAL seconds. Its content is only read when that
+    changed, and the module is only reloaded when the content hash did. Without
+    it (e.g. the "stream" hook), a loaded module is always used as is.
+    """
+    FUNCTIONS = get_plugin_cache(request, "FUNCTIONS")
+    FUNCTION_VERSIONS = get_plugin_cache(request, "FUNCTION_VERSIONS")
 
-        new_content = replace_imports(content)
-        if new_content != content:
-            content = new_content
-            # Update the function content in the database
-            Functions.update_function_by_id(function_id, {"content": content})
+    version = FUNCTION_VERSIONS.get(function_id)
+    if function_id in FUNCTIONS:
+        if not load_from_db:
+            return FUNCTIONS[function_id], None, None
 
-        if (
-            hasattr(request.app.state, "FUNCTION_CONTENTS")
-            and function_id in request.app.state.FUNCTION_CONTENTS
-        ) and (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
+        if version and (
+            time.monotonic() - version["checked_at"] < PLUGIN_VERSION_CHECK_INTERVAL
         ):
-            if request.app.state.FUNCTION_CONTENTS[function_id] == content:
-                return request.app.state.FUNCTIONS[function_id], None, None
+            return FUNCTIONS[function_id], None, None
+
+        updated_at = Functions.get_function_updated_at_by_id(function_id)
+        if version and updated_at is not None and version["updated_at"] == updated_at:
+            version["checked_at"] = time.monotonic()
+            return FUNCTIONS[function_id], None, None
+
+    function = Functions.get_function_by_id(function_id)
+    if not function:
+        raise Exception(f"Function not found: {function_id}")
+    content = function.content
+
+    new_content = replace_imports(content)
+    if new_content != content:
+        content = new_content
+        # Update the function content in the database
+        function = (
+            Functions.update_function_by_id(function_id, {"content": content})
+            or function
+        )
 
+    content_hash = get_content_hash(content)
+    if function_id in FUNCTIONS and version and version["hash"] == content_hash:
+        # e.g. only its valves or active state changed
+        function_module, function_type, frontmatter = (
+            FUNCTIONS[function_id],
+            None,
+            None,
+        )
+    else:
         function_module, function_type, frontmatter = load_function_module_by_id(
             function_id, content
         )
-    else:
-        # Load from cache (e.g. "stream" hook)
-        # This is useful for performance reasons
 
-        if (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            return request.app.state.FUNCTIONS[function_id], None, None
+    FUNCTIONS[function_id] = function_module
+    FUNCTION_VERSIONS[function_id] = {
+        "hash": content_hash,
+        "updated_at": function.updated_at,
+        "checked_at": time.monotonic(),
+    }
+
+    return function_module, function_type, frontmatter
 
-        function_module, function_type, frontmatter = load_function_module_by_id(
-            function_id
-        )
 
-    if not hasattr(request.app.state, "FUNCTIONS"):
-        request.app.state.FUNCTIONS = {}
+def set_tool_module(request, tool_id, tool_module, content):
+    """
+    Cache a tool module loaded from `content`, e.g. right before the content
+    is saved to the database.
+    """
+    get_plugin_cache(request, "TOOLS")[tool_id] = tool_module
+    get_plugin_cache(request, "TOOL_VERSIONS")[tool_id] = {
+        "hash": get_content_hash(content),
+        "updated_at": None,
+    }
 
-    if not hasattr(request.app.state, "FUNCTION_CONTENTS"):
-        request.app.state.FUNCTION_CONTENTS = {}
 
-    request.app.state.FUNCTIONS[function_id] = function_module
-    request.app.state.FUNCTION_CONTENTS[function_id] = content
+def remove_tool_module(request, tool_id):
+    get_plugin_cache(request, "TOOLS").pop(tool_id, None)
+    get_plugin_cache(request, "TOOL_VERSIONS").pop(tool_id, None)
 
-    return function_module, function_type, frontmatter
+
+def get_tool_module_from_cache(request, tool_id, tool=None):
+    """
+    Get the loaded module of a tool, reloading it only if the content of its
+    database row `tool` (read if not given) changed since it was loaded.
+    """
+    TOOLS = get_plugin_cache(request, "TOOLS")
+    TOOL_VERSIONS = get_plugin_cache(request, "TOOL_VERSIONS")
+
+    if tool is None:
+        tool = Tools.get_tool_by_id(tool_id)
+        if not tool:
+            raise Exception(f"Toolkit not found: {tool_id}")
+
+    version = TOOL_VERSIONS.get(tool_id)
+    if tool_id in TOOLS and version and version["updated_at"] == tool.updated_at:
+        return TOOLS[tool_id]
+
+    content = tool.content
+    new_content = replace_imports(content)
+    if new_content != content:
+        content = new_content
+        tool = Tools.update_tool_by_id(tool_id, {"content": content}) or tool
+
+    content_hash = get_content_hash(content)
+    if not (tool_id in TOOLS and version and version["hash"] == content_hash):
+        # Loaded from the database, so no requirements are installed mid-chat
+        TOOLS[tool_id], _ = load_tool_module_by_id(tool_id)
+
+    TOOL_VERSIONS[tool_id] = {"hash": content_hash, "updated_at": tool.updated_at}
+    return TOOLS[tool_id]
 
 
 def install_frontmatter_requirements(requirements: str):
@@ -0,0 +1,395 @@
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from open_webui.env import (
+    RATE_LIMIT_MAX_WAIT,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.groups import Groups
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Budgets are requests and tokens per minute
+RATE_LIMIT_WINDOW = 60
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(payload: dict) -> int:
+    """
+    Rough token count of a chat completion, ahead of the request: about four
+    characters per prompt token, plus the completion tokens it may use.
+    """
+    chars = 0
+    messages = payload.get("messages", [])
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(
+                item.get("text", "") for item in content if item.get("type") == "text"
+            )
+        chars += len(content)
+
+    completion_tokens = (
+        payload.get("max_completion_tokens") or payload.get("max_tokens") or 0
+    )
+    return chars // 4 + 4 * len(messages) + int(completion_tokens)
+
+
+def get_rate_limit(key: str, config: Optional[dict]) -> Optional[dict]:
+    """Budget of `config` ({"rpm", "tpm"}) for bucket `key`, None if it has none."""
+    try:
+        rpm = int((config or {}).get("rpm") or 0)
+        tpm = int((config or {}).get("tpm") or 0)
+    except (TypeError, ValueError):
+        return None
+    if rpm <= 0 and tpm <= 0:
+        return None
+    return {"key": key, "rpm": rpm, "tpm": tpm}
+
+
+def get_connection_rate_limit(
+    url: str, key: Optional[str], api_config: dict
+) -> Optional[dict]:
+    """Budget set by "rpm"/"tpm" in the config of a connection, shared by its users."""
+    key_hash = hashlib.sha256((key or "").encode()).hexdigest()[:16]
+    return get_rate_limit(f"connection:{url}:{key_hash}", api_config)
+
+
+async def get_user_group_rate_limit(user) -> Optional[dict]:
+    """
+    Budget set by "rate_limit" in the data of the user's groups, shared by
+    their members. Of several groups, the most generous budget applies.
+    """
+    limits = [
+        limit
+        for group in await Groups.get_groups_by_member_id_async(user.id)
+        if (
+            limit := get_rate_limit(
+                f"group:{group.id}", (group.data or {}).get("rate_limit")
+            )
+        )
+    ]
+    if not limits:
+        return None
+    return max(
+        limits,
+        key=lambda limit: (limit["tpm"] or float("inf"), limit["rpm"] or float("inf")),
+    )
+
+
+def get_wait(entries: list, limit: dict, tokens: int, now: float) -> float:
+    """
+    Seconds until a request of `tokens` fits in `limit`, given the requests
+    of the window as (timestamp, tokens), oldest first. A request larger than
+    the token budget fits once the window is empty.
+    """
+    wait = 0.0
+    if limit["rpm"] and len(entries) >= limit["rpm"]:
+        wait = entries[len(entries) - limit["rpm"]][0] + RATE_LIMIT_WINDOW - now
+
+    if limit["tpm"]:
+        used = sum(entry_tokens for _, entry_tokens in entries)
+        if used and used + tokens > limit["tpm"]:
+            for timestamp, entry_tokens in entries:
+                used -= entry_tokens
+                if not used or used + tokens <= limit["tpm"]:
+                    wait = max(wait, timestamp + RATE_LIMIT_WINDOW - now)
+                    break
+    return max(wait, 0.0)
+
+
+class MemoryRateLimitWindow:
+    """Requests of the last minute in each bucket, kept by this worker."""
+
+    def __init__(self):
+        self._entries: Dict[str, deque] = {}
+
+    def _get_entries(self, key: str, now: float) -> deque:
+        entries = self._entries.setdefault(key, deque())
+        while entries and entries[0][0] <= now - RATE_LIMIT_WINDOW:
+            entries.popleft()
+        return entries
+
+    def try_acquire(self, limits: list[dict], tokens: int) -> float:
+        """Records the request in all buckets and returns 0, or the seconds to wait."""
+        now = time.time()
+        wait = max(
+            get_wait(list(self._get_entries(limit["key"], now)), limit, tokens, now)
+            for limit in limits
+        )
+        if wait > 0:
+            return wait
+
+        for limit in limits:
+            self._entries[limit["key"]].append((now, tokens))
+        return 0.0
+
+    async def try_acquire_async(self, limits: list[dict], tokens: int) -> float:
+        return self.try_acquire(limits, tokens)
+
+    def get_usage(self, key: str) -> dict:
+        entries = self._get_entries(key, time.time())
+        return {
+            "requests": len(entries),
+            "tokens": sum(tokens for _, tokens in entries),
+        }
+
+
+class RedisRateLimitWindow:
+    """
+    Requests of the last minute in each bucket, shared by all workers. Every
+    bucket is a sorted set of "id:tokens" members scored by time, checked and
+    updated for all the buckets of a request in one script.
+    """
+
+    ACQUIRE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local window = tonumber(ARGV[2])
+    local tokens = tonumber(ARGV[3])
+    local wait = 0
+
+    for i, key in ipairs(KEYS) do
+        local rpm = tonumber(ARGV[3 + i * 2])
+        local tpm = tonumber(ARGV[4 + i * 2])
+
+        redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+        local entries = redis.call('ZRANGE', key, 0, -1, 'WITHSCORES')
+        local count = #entries / 2
+
+        if rpm > 0 and count >= rpm then
+            local timestamp = tonumber(entries[(count - rpm) * 2 + 2])
+            wait = math.max(wait, timestamp + window - now)
+        end
+
+        if tpm > 0 then
+            local used = 0
+            for j = 1, #entries, 2 do
+                used = used + tonumber(string.match(entries[j], ':(%d+)$'))
+            end
+            if used > 0 and used + tokens > tpm then
+                for j = 1, #entries, 2 do
+                    used = used - tonumber(string.match(entries[j], ':(%d+)$'))
+                    if used == 0 or used + tokens <= tpm then
+                        wait = math.max(wait, tonumber(entries[j + 1]) + window - now)
+                        break
+                    end
+                end
+            end
+        end
+    end
+
+    if wait > 0 then
+        return tostring(wait)
+    end
+
+    for _, key in ipairs(KEYS) do
+        redis.call('ZADD', key, now, ARGV[4])
+        redis.call('EXPIRE', key, window + 1)
+    end
+    return '0'
+    """
+
+    def __init__(self, name: str, redis_url: str, redis_sentinels=[]):
+        self.name = name
+        self.redis = get_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+        self._acquire = self.redis.register_script(self.ACQUIRE_SCRIPT)
+
+    def _get_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def try_acquire(self, limits: list[dict], tokens: int) -> float:
+        """Records the request in all buckets and returns 0, or the seconds to wait."""
+        args = [time.time(), RATE_LIMIT_WINDOW, tokens, f"{uuid.uuid4()}:{tokens}"]
+        for limit in limits:
+            args.extend([limit["rpm"], limit["tpm"]])
+
+        return float(
+            self._acquire(
+                keys=[self._get_key(limit["key"]) for limit in limits], args=args
+            )
+        )
+
+    async def try_acquire_async(self, limits: list[dict], tokens: int) -> float:
+        # The script runs on a blocking connection, kept off the event loop
+        return await run_in_threadpool(self.try_acquire, limits, tokens)
+
+    def get_usage(self, key: str) -> dict:
+        members = self.redis.zrangebyscore(
+            self._get_key(key), time.time() - RATE_LIMIT_WINDOW, "+inf"
+        )
+        return {
+            "requests": len(members),
+            "tokens": sum(int(member.rsplit(":", 1)[1]) for member in members),
+        }
+
+
+class FairQueue:
+    """
+    Requests waiting for the same budgets. Users take turns at the head of
+    the queue, and each user's requests keep their order.
+    """
+
+    def __init__(self):
+        self._tickets: OrderedDict[str, deque] = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(len(tickets) for tickets in self._tickets.values())
+
+    def head(self) -> Optional[asyncio.Event]:
+        for tickets in self._tickets.values():
+            return tickets[0]
+        return None
+
+    def push(self, user_id: str) -> asyncio.Event:
+        ticket = asyncio.Event()
+        self._tickets.setdefault(user_id, deque()).append(ticket)
+        if self.head() is ticket:
+            ticket.set()
+        return ticket
+
+    def pop(self, user_id: str, ticket: asyncio.Event):
+        was_head = self.head() is ticket
+        tickets = self._tickets[user_id]
+        tickets.remove(ticket)
+
+        if not tickets:
+            del self._tickets[user_id]
+        elif was_head:
+            # The user's next request waits for the other users' turns
+            self._tickets.move_to_end(user_id)
+
+        if head := self.head():
+            head.set()
+
+
+class RateLimiter:
+    """
+    Holds chat completions to the requests/tokens per minute budgets of their
+    connection and user group. Requests over budget wait in a fair queue, at
+    most `max_wait` seconds, before RateLimitExceeded is raised.
+    """
+
+    def __init__(self, window, max_wait: float):
+        self.window = window
+        self.max_wait = max_wait
+
+        self._queues: Dict[str, FairQueue] = {}
+        self._keys = set()
+        self._stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected": 0,
+            "wait_time": 0.0,
+        }
+
+    async def acquire(
+        self, limits: list[dict], tokens: int, user_id: str, wait: bool = True
+    ) -> bool:
+        """
+        Takes a request of `tokens` out of all the `limits`. Without `wait`,
+        returns False instead of queueing when they're out of budget.
+        """
+        if not limits:
+            return True
+
+        self._keys.update(limit["key"] for limit in limits)
+        queue_key = "|".join(sorted(limit["key"] for limit in limits))
+        queue = self._queues.get(queue_key)
+
+        if queue is None:
+            retry_after = await self.window.try_acquire_async(limits, tokens)
+            if not retry_after:
+                self._stats["admitted"] += 1
+                return True
+            if wait and retry_after > self.max_wait:
+                self._stats["rejected"] += 1
+                raise RateLimitExceeded(
+                    f"Rate limit exceeded, retry in {retry_after:.0f} seconds.",
+                    retry_after,
+                )
+        if not wait:
+            return False
+
+        queue = self._queues.setdefault(queue_key, FairQueue())
+        self._stats["queued"] += 1
+        started_at = time.time()
+        deadline = started_at + self.max_wait
+        ticket = queue.push(user_id)
+        try:
+            while True:
+                timeout = deadline - time.time()
+                if not ticket.is_set():
+                    await asyncio.wait_for(ticket.wait(), max(timeout, 0))
+                    continue
+
+                retry_after = await self.window.try_acquire_async(limits, tokens)
+                if not retry_after:
+                    self._stats["admitted"] += 1
+                    return True
+
+                if retry_after > timeout:
+                    raise RateLimitExceeded(
+                        f"Rate limit exceeded, retry in {retry_after:.0f} seconds.",
+                        retry_after,
+                    )
+                await asyncio.sleep(retry_after)
+        except asyncio.TimeoutError:
+            self._stats["rejected"] += 1
+            raise RateLimitExceeded(
+                "Rate limit exceeded, too many requests waiting.", self.max_wait
+            )
+        except RateLimitExceeded:
+            self._stats["rejected"] += 1
+            raise
+        finally:
+            self._stats["wait_time"] += time.time() - started_at
+            queue.pop(user_id, ticket)
+            if not len(queue):
+                self._queues.pop(queue_key, None)
+
+    def get_stats(self) -> dict:
+        return {
+            "backend": type(self.window).__name__,
+            **{key: value for key, value in self._stats.items() if key != "wait_time"},
+            "average_wait": (
+                round(self._stats["wait_time"] / self._stats["queued"], 3)
+                if self._stats["queued"]
+                else 0.0
+            ),
+            "queue_depth": {
+                queue_key: len(queue) for queue_key, queue in self._queues.items()
+            },
+            "usage": {key: self.window.get_usage(key) for key in sorted(self._keys)},
+        }
+
+
+if REDIS_URL:
+    RATE_LIMITER = RateLimiter(
+        RedisRateLimitWindow(
+            "open-webui:rate_limit",
+            REDIS_URL,
+            get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+        ),
+        RATE_LIMIT_MAX_WAIT,
+    )
+else:
+    RATE_LIMITER = RateLimiter(MemoryRateLimitWindow(), RATE_LIMIT_MAX_WAIT)
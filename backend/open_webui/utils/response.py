@@ -125,3 +125,64 @@ async def convert_streaming_response_ollama_to_openai(ollama_streaming_response)
         yield line
 
     yield "data: [DONE]\n\n"
+
+
+class StreamContentCollector:
+    """
+    Reads an OpenAI-compatible SSE stream on the side while its bytes are
+    forwarded unchanged: only the `data:` lines are parsed, to collect the
+    message content, usage and error of the completion.
+    """
+
+    def __init__(self):
+        self.content_parts = []
+        self.usage = None
+        self.error = None
+        self._buffer = b""
+
+    @property
+    def content(self) -> str:
+        return "".join(self.content_parts)
+
+    def feed(self, chunk):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+
+        # Events may be split across chunks, the last partial line is kept
+        lines = (self._buffer + chunk).split(b"\n")
+        self._buffer = lines.pop()
+        for line in lines:
+            self._parse_line(line)
+
+    def close(self):
+        if self._buffer:
+            self._parse_line(self._buffer)
+            self._buffer = b""
+
+    def _parse_line(self, line: bytes):
+        line = line.strip()
+        if not line.startswith(b"data:"):
+            return
+
+        line = line[len(b"data:") :].strip()
+        if not line or line == b"[DONE]":
+            return
+
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return
+        if not isinstance(data, dict):
+            return
+
+        if data.get("error"):
+            self.error = data["error"]
+        if data.get("usage"):
+            self.usage = data["usage"]
+
+        for choice in data.get("choices") or []:
+            if choice.get("index", 0) != 0:
+                continue
+            value = (choice.get("delta") or choice.get("message") or {}).get("content")
+            if value:
+                self.content_parts.append(value)
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Optional
+
+import aiofiles
+import aiohttp
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+
+from open_webui.config import AUDIO_TTS_CACHE_MAX_SIZE_MB, CACHE_DIR
+from open_webui.env import (
+    AIOHTTP_CLIENT_SESSION_SSL,
+    AIOHTTP_CLIENT_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["AUDIO"])
+
+SPEECH_CHUNK_SIZE = 64 * 1024  # 64KB
+
+
+class SpeechCacheEntry:
+    """Audio chunks of a synthesis in progress, shared by every waiting request."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.condition = asyncio.Condition()
+
+    async def append(self, chunk: bytes):
+        async with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    async def finish(self, error: Optional[Exception] = None):
+        async with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    async def wait_started(self):
+        """Waits for the first chunk, raising the synthesis error if it failed."""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.chunks or self.done)
+            if not self.chunks and self.error:
+                raise self.error
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        idx = 0
+        while True:
+            async with self.condition:
+                await self.condition.wait_for(
+                    lambda: idx < len(self.chunks) or self.done
+                )
+                chunks = self.chunks[idx:]
+                done = self.done
+                error = self.error
+
+            for chunk in chunks:
+                yield chunk
+            idx += len(chunks)
+
+            if done and idx >= len(self.chunks):
+                if error:
+                    # Headers are already sent, so the response is cut short
+                    log.error(f"Speech synthesis failed while streaming: {error}")
+                return
+
+
+class SpeechCache:
+    """
+    Synthesized speech stored as `{name}.mp3` files, with the request payload
+    next to each as `{name}.json`.
+
+    Concurrent requests for the same audio share a single synthesis, and the
+    audio is streamed to all of them while it is written to the cache. Least
+    recently served files are evicted once the cache exceeds `max_size` bytes.
+    """
+
+    def __init__(self, cache_dir: Path, max_size: int):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        self._entries: Dict[str, SpeechCacheEntry] = {}
+        self._tasks = set()
+        self._stats = {"hits": 0, "coalesced": 0, "misses": 0, "evictions": 0}
+
+    def get_file_path(self, name: str) -> Path:
+        return self.cache_dir.joinpath(f"{name}.mp3")
+
+    async def get_response(
+        self,
+        name: str,
+        synthesize: Callable[[], AsyncIterator[bytes]],
+        payload: Optional[dict] = None,
+    ):
+        """
+        Serves the cached audio for `name`, or streams it from `synthesize`
+        while caching it. Errors raised by `synthesize` before its first chunk
+        are raised here.
+        """
+        file_path = self.get_file_path(name)
+        if file_path.is_file():
+            self._stats["hits"] += 1
+            try:
+                # Marks the file as recently used for eviction
+                os.utime(file_path)
+            except OSError:
+                pass
+            return FileResponse(file_path)
+
+        entry = self._entries.get(name)
+        if entry:
+            self._stats["coalesced"] += 1
+        else:
+            self._stats["misses"] += 1
+            entry = SpeechCacheEntry()
+            self._entries[name] = entry
+
+            task = asyncio.create_task(self._fill(name, entry, synthesize, payload))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        await entry.wait_started()
+        return StreamingResponse(entry.iter_chunks(), media_type="audio/mpeg")
+
+    async def _fill(
+        self,
+        name: str,
+        entry: SpeechCacheEntry,
+        synthesize: Callable[[], AsyncIterator[bytes]],
+        payload: Optional[dict],
+    ):
+        # Runs apart from the request, so the synthesis completes and is cached
+        # even if the client that started it disconnects
+        file_path = self.get_file_path(name)
+        part_path = self.cache_dir.joinpath(f"{name}.{uuid.uuid4().hex}.part")
+
+        error = None
+        try:
+            async with aiofiles.open(part_path, "wb") as f:
+                async for chunk in synthesize():
+                    if chunk:
+                        await f.write(chunk)
+                        await entry.append(chunk)
+
+            os.replace(part_path, file_path)
+            if payload is not None:
+                async with aiofiles.open(
+                    self.cache_dir.joinpath(f"{name}.json"), "w"
+                ) as f:
+                    await f.write(json.dumps(payload))
+        except Exception as e:
+            error = e
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+        finally:
+            self._entries.pop(name, None)
+            await entry.finish(error)
+
+        if error is None:
+            try:
+                await asyncio.to_thread(self.evict)
+            except Exception as e:
+                log.warning(f"Error evicting speech cache files: {e}")
+
+    def evict(self):
+        """Removes the least recently used files until the cache fits `max_size`."""
+        if self.max_size <= 0:
+            return
+
+        files = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as it:
+            for dir_entry in it:
+                if dir_entry.is_file() and dir_entry.name.endswith(".mp3"):
+                    stat = dir_entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, dir_entry.path))
+                    total_size += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+                self._stats["evictions"] += 1
+            except OSError:
+                continue
+
+            try:
+                os.remove(os.path.splitext(path)[0] + ".json")
+            except OSError:
+                pass
+
+    def get_stats(self) -> dict:
+        requests = (
+            self._stats["hits"] + self._stats["coalesced"] + self._stats["misses"]
+        )
+        return {
+            **self._stats,
+            "requests": requests,
+            "hit_rate": (
+                (self._stats["hits"] + self._stats["coalesced"]) / requests
+                if requests
+                else 0.0
+            ),
+            "in_progress": len(self._entries),
+        }
+
+
+async def stream_speech_request(url: str, **kwargs):
+    """
+    Streams the audio returned by a speech synthesis API, raising an
+    HTTPException with the upstream error if the request fails.
+    """
+    try:
+        timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
+            async with session.post(url, ssl=AIOHTTP_CLIENT_SESSION_SSL, **kwargs) as r:
+                if r.status >= 400:
+                    detail = None
+                    try:
+                        res = await r.json(content_type=None)
+                        if "error" in res:
+                            error = res["error"]
+                            detail = f"External: {error.get('message', '') if isinstance(error, dict) else error}"
+                    except Exception:
+                        pass
+
+                    raise HTTPException(
+                        status_code=r.status,
+                        detail=(
+                            detail if detail else "Open WebUI: Server Connection Error"
+                        ),
+                    )
+
+                async for chunk in r.content.iter_chunked(SPEECH_CHUNK_SIZE):
+                    yield chunk
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception(e)
+        raise HTTPException(status_code=500, detail=f"External: {e}")
+
+
+SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
+SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+SPEECH_CACHE = SpeechCache(SPEECH_CACHE_DIR, AUDIO_TTS_CACHE_MAX_SIZE_MB * 1024 * 1024)
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class Stage:
+    """
+    An async step of a pipeline. `run` is called with the results of the
+    stages finished so far, once every stage in `depends_on` is done.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[dict], Awaitable[Any]],
+        depends_on: Optional[list[str]] = None,
+    ):
+        self.name = name
+        self.run = run
+        self.depends_on = depends_on or []
+
+
+async def run_stages(stages: list[Stage]) -> tuple[dict[str, Any], dict[str, float]]:
+    """
+    Runs stages concurrently, each as soon as the stages it depends on are
+    done, and returns their results and durations in seconds by name. Stages
+    can only depend on stages listed before them. If a stage raises, the
+    others are cancelled and its error is raised.
+    """
+    names = set()
+    for stage in stages:
+        for name in stage.depends_on:
+            if name not in names:
+                raise ValueError(
+                    f"Stage {stage.name} depends on {name}, which is not listed before it"
+                )
+        names.add(stage.name)
+
+    results = {}
+    timings = {}
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run_stage(stage: Stage):
+        for name in stage.depends_on:
+            await tasks[name]
+
+        start = time.perf_counter()
+        try:
+            results[stage.name] = await stage.run(results)
+        finally:
+            timings[stage.name] = round(time.perf_counter() - start, 3)
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for stage in stages:
+                tasks[stage.name] = tg.create_task(run_stage(stage))
+    except BaseExceptionGroup as e:
+        raise e.exceptions[0]
+
+    log.debug(f"stage timings: {timings}")
+    return results, timings
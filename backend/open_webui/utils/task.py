@@ -1,3 +1,4 @@
+import json
 import logging
 import math
 import re
@@ -299,6 +300,91 @@ def query_generation_template(
     return template
 
 
+PLAN_FIELDS = {
+    "web_search_queries": (
+        "1-3 broad and relevant web search queries. Err on the side of searching "
+        "if there is any chance it provides useful or updated information."
+    ),
+    "retrieval_queries": (
+        "1-3 queries to search the documents and knowledge attached to the chat "
+        "for the information relevant to the latest message."
+    ),
+    "tool_calls": (
+        "The tools to call, from the available tools below, with the required "
+        'parameters for each: [{"name": "toolName", "parameters": {"key": "value"}}].'
+        "\n\nAvailable Tools: {{TOOLS}}"
+    ),
+}
+
+
+def plan_generation_template(
+    template: str,
+    messages: list[dict],
+    web_search: bool = False,
+    retrieval: bool = False,
+    tools_specs: Optional[list[dict]] = None,
+    user: Optional[dict] = None,
+) -> str:
+    fields = []
+    if web_search:
+        fields.append("web_search_queries")
+    if retrieval:
+        fields.append("retrieval_queries")
+    if tools_specs:
+        fields.append("tool_calls")
+
+    template = template.replace(
+        "{{FIELDS}}",
+        "\n".join(f"- {field}: {PLAN_FIELDS[field]}" for field in fields),
+    )
+    template = template.replace(
+        "{{OUTPUT}}",
+        "{\n" + ",\n".join(f'  "{field}": [...]' for field in fields) + "\n}",
+    )
+    template = template.replace("{{TOOLS}}", json.dumps(tools_specs or []))
+
+    return query_generation_template(template, messages, user)
+
+
+def get_plan_from_response(content: str) -> dict:
+    """
+    The fields of a plan generation response. Each field is parsed on its own,
+    so a malformed field doesn't lose the others. Fields missing or invalid in
+    the response are None, for the caller to fall back to the dedicated task.
+    """
+    try:
+        data = json.loads(content[content.find("{") : content.rfind("}") + 1])
+        if not isinstance(data, dict):
+            data = {}
+    except Exception:
+        data = {}
+
+    plan = {}
+    for field in PLAN_FIELDS:
+        value = data.get(field)
+        if value is None:
+            # The response isn't valid JSON, decode the field's list by itself
+            match = re.search(rf'"{field}"\s*:\s*\[', content)
+            if match:
+                try:
+                    value, _ = json.JSONDecoder().raw_decode(
+                        content, match.end() - 1
+                    )
+                except ValueError:
+                    value = None
+
+        if not isinstance(value, list):
+            plan[field] = None
+        elif field == "tool_calls":
+            plan[field] = [
+                call for call in value if isinstance(call, dict) and call.get("name")
+            ]
+        else:
+            plan[field] = [query for query in value if isinstance(query, str)]
+
+    return plan
+
+
 def moa_response_generation_template(
     template: str, prompt: str, responses: list[str]
 ) -> str:
@@ -4,6 +4,8 @@ import re
 import inspect
 import aiohttp
 import asyncio
+import hashlib
+import time
 import yaml
 
 from pydantic import BaseModel
@@ -35,11 +37,15 @@ from langchain_core.utils.function_calling import (
 
 from open_webui.models.tools import Tools
 from open_webui.models.users import UserModel
-from open_webui.utils.plugin import load_tool_module_by_id
+from open_webui.utils.plugin import get_tool_module_from_cache
 from open_webui.env import (
     SRC_LOG_LEVELS,
     AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA,
     AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+    TOOL_SERVER_CONNECTION_LIMIT,
+    TOOL_SERVER_SPEC_CACHE_TTL,
+    TOOL_CALL_TIMEOUT,
+    TOOL_CALLS_MAX_CONCURRENCY,
 )
 
 import copy
@@ -59,14 +65,51 @@ def get_async_tool_function_and_apply_extra_params(
         update_wrapper(partial_func, function)
         return partial_func
     else:
-        # Make it a coroutine function
+        # Make it a coroutine function, run in a thread so a blocking tool
+        # neither stalls the event loop nor escapes the tool call timeout
         async def new_function(*args, **kwargs):
-            return partial_func(*args, **kwargs)
+            return await asyncio.to_thread(partial_func, *args, **kwargs)
 
         update_wrapper(new_function, function)
         return new_function
 
 
+async def run_tool_calls(
+    tool_calls: list,
+    execute: Callable[[Any], Awaitable[Any]],
+    on_done: Optional[Callable[[int, Any], Awaitable[None]]] = None,
+) -> list:
+    """
+    Execute tool calls concurrently, at most TOOL_CALLS_MAX_CONCURRENCY at once
+    and each for at most TOOL_CALL_TIMEOUT seconds, and return their results in
+    the order of the calls. A call that fails or times out has its error message
+    as its result. `on_done(index, result)` is awaited as each call finishes.
+    Plugin tools written as plain functions run in worker threads (see
+    get_async_tool_function_and_apply_extra_params), so they overlap as well;
+    a timed out thread is abandoned rather than interrupted.
+    """
+    semaphore = asyncio.Semaphore(TOOL_CALLS_MAX_CONCURRENCY)
+
+    async def run_tool_call(index, tool_call):
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(
+                    execute(tool_call), timeout=TOOL_CALL_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                result = f"Tool call timed out after {TOOL_CALL_TIMEOUT} seconds"
+            except Exception as e:
+                result = str(e)
+
+        if on_done:
+            await on_done(index, result)
+        return result
+
+    return await asyncio.gather(
+        *[run_tool_call(index, tool_call) for index, tool_call in enumerate(tool_calls)]
+    )
+
+
 def get_tools(
     request: Request, tool_ids: list[str], user: UserModel, extra_params: dict
 ) -> dict[str, dict]:
@@ -140,10 +183,7 @@ def get_tools(
             else:
                 continue
         else:
-            module = request.app.state.TOOLS.get(tool_id, None)
-            if module is None:
-                module, _ = load_tool_module_by_id(tool_id)
-                request.app.state.TOOLS[tool_id] = module
+            module = get_tool_module_from_cache(request, tool_id, tool)
 
             extra_params["__id__"] = tool_id
 
@@ -334,32 +374,47 @@ def get_tool_specs(tool_module: object) -> list[dict]:
     return specs
 
 
-def resolve_schema(schema, components):
+def resolve_schema(schema, components, resolved_refs=None):
     """
     Recursively resolves a JSON schema using OpenAPI components.
+
+    Each `$ref` is resolved once per `resolved_refs`, which can be shared by
+    the schemas of a spec. A `$ref` used within its own schema resolves to an
+    empty schema there.
     """
     if not schema:
         return {}
 
+    if resolved_refs is None:
+        resolved_refs = {}
+
     if "$ref" in schema:
         ref_path = schema["$ref"]
-        ref_parts = ref_path.strip("#/").split("/")
-        resolved = components
-        for part in ref_parts[1:]:  # Skip the initial 'components'
-            resolved = resolved.get(part, {})
-        return resolve_schema(resolved, components)
-
-    resolved_schema = copy.deepcopy(schema)
-
-    # Recursively resolve inner schemas
-    if "properties" in resolved_schema:
-        for prop, prop_schema in resolved_schema["properties"].items():
-            resolved_schema["properties"][prop] = resolve_schema(
-                prop_schema, components
+        if ref_path not in resolved_refs:
+            # Placeholder for refs to itself while it's being resolved
+            resolved_refs[ref_path] = {}
+
+            ref_parts = ref_path.strip("#/").split("/")
+            resolved = components
+            for part in ref_parts[1:]:  # Skip the initial 'components'
+                resolved = resolved.get(part, {})
+            resolved_refs[ref_path] = resolve_schema(
+                resolved, components, resolved_refs
             )
-
-    if "items" in resolved_schema:
-        resolved_schema["items"] = resolve_schema(resolved_schema["items"], components)
+        return copy.deepcopy(resolved_refs[ref_path])
+
+    resolved_schema = {}
+    for key, value in schema.items():
+        # Recursively resolve inner schemas
+        if key == "properties":
+            resolved_schema[key] = {
+                prop: resolve_schema(prop_schema, components, resolved_refs)
+                for prop, prop_schema in value.items()
+            }
+        elif key == "items":
+            resolved_schema[key] = resolve_schema(value, components, resolved_refs)
+        else:
+            resolved_schema[key] = copy.deepcopy(value)
 
     return resolved_schema
 
@@ -375,6 +430,7 @@ def convert_openapi_to_tool_payload(openapi_spec):
         list: A list of tool payloads.
     """
     tool_payload = []
+    resolved_refs = {}
 
     for path, methods in openapi_spec.get("paths", {}).items():
         for method, operation in methods.items():
@@ -416,7 +472,9 @@ def convert_openapi_to_tool_payload(openapi_spec):
                     json_schema = content.get("application/json", {}).get("schema")
                     if json_schema:
                         resolved_schema = resolve_schema(
-                            json_schema, openapi_spec.get("components", {})
+                            json_schema,
+                            openapi_spec.get("components", {}),
+                            resolved_refs,
                         )
 
                         if resolved_schema.get("properties"):
@@ -440,31 +498,82 @@ def convert_openapi_to_tool_payload(openapi_spec):
     return tool_payload
 
 
-async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
+class ToolServerSessions:
+    """
+    aiohttp sessions shared by requests to tool servers, one per event loop, so
+    connections to a server are kept alive across spec fetches and tool calls.
+    They open at most TOOL_SERVER_CONNECTION_LIMIT connections at once.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+    def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        for other_loop in [other for other in self._sessions if other.is_closed()]:
+            self._sessions.pop(other_loop)
+
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=max(TOOL_SERVER_CONNECTION_LIMIT, 0)
+                ),
+                trust_env=True,
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def close(self):
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+TOOL_SERVER_SESSIONS = ToolServerSessions()
+
+
+async def get_tool_server_data(
+    token: str, url: str, etag: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Fetch the OpenAPI spec of a tool server and convert it to tool specs. With
+    the `etag` of a spec fetched before, returns None if it's not modified.
+    """
     headers = {
         "Accept": "application/json",
         "Content-Type": "application/json",
     }
     if token:
         headers["Authorization"] = f"Bearer {token}"
+    if etag:
+        headers["If-None-Match"] = etag
 
     error = None
     try:
         timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA)
-        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
-            async with session.get(
-                url, headers=headers, ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL
-            ) as response:
-                if response.status != 200:
-                    error_body = await response.json()
-                    raise Exception(error_body)
-
-                # Check if URL ends with .yaml or .yml to determine format
-                if url.lower().endswith((".yaml", ".yml")):
-                    text_content = await response.text()
-                    res = yaml.safe_load(text_content)
-                else:
-                    res = await response.json()
+        session = TOOL_SERVER_SESSIONS.get_session()
+        async with session.get(
+            url,
+            headers=headers,
+            timeout=timeout,
+            ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+        ) as response:
+            if response.status == 304 and etag:
+                return None
+
+            if response.status != 200:
+                error_body = await response.json()
+                raise Exception(error_body)
+
+            # Check if URL ends with .yaml or .yml to determine format
+            if url.lower().endswith((".yaml", ".yml")):
+                text_content = await response.text()
+                res = yaml.safe_load(text_content)
+            else:
+                res = await response.json()
+
+            etag = response.headers.get("ETag")
     except Exception as err:
         log.exception(f"Could not fetch tool server spec from {url}")
         if isinstance(err, dict) and "detail" in err:
@@ -477,30 +586,152 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
         "openapi": res,
         "info": res.get("info", {}),
         "specs": convert_openapi_to_tool_payload(res),
+        "etag": etag,
     }
 
-    log.info("Fetched data:", data)
+    log.info(f"Fetched tool server spec from {url}")
     return data
 
 
+class ToolServerSpecCache:
+    """
+    Fetched tool server specs, keyed by spec URL and token. A spec older than
+    `ttl` seconds is still used, while it's revalidated in the background with
+    its ETag. A server that can't be reached keeps its last spec, and its
+    health records the failure.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+        self._entries: Dict[tuple, dict] = {}
+        self._refreshing: Dict[tuple, asyncio.Task] = {}
+        self._health: Dict[str, dict] = {}
+
+    def get_key(self, token: Optional[str], url: str) -> tuple:
+        return (url, hashlib.sha256((token or "").encode()).hexdigest())
+
+    def get_cached(self, token: Optional[str], url: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(self.get_key(token, url))
+        return entry["data"] if entry else None
+
+    async def get(self, token: Optional[str], url: str) -> Dict[str, Any]:
+        entry = self._entries.get(self.get_key(token, url))
+        if entry is None:
+            return await self.refresh(token, url)
+
+        if time.time() - entry["fetched_at"] >= self.ttl:
+            self._refresh_in_background(token, url)
+        return entry["data"]
+
+    async def refresh(self, token: Optional[str], url: str) -> Dict[str, Any]:
+        """Revalidate a spec now, sharing a refresh already in progress."""
+        key = self.get_key(token, url)
+        task = self._refreshing.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._refresh(token, url))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda task: self._on_refreshed(key, task))
+        return await asyncio.shield(task)
+
+    def _refresh_in_background(self, token: Optional[str], url: str):
+        if self.get_key(token, url) not in self._refreshing:
+            asyncio.ensure_future(self.refresh(token, url)).add_done_callback(
+                lambda future: future.cancelled() or future.exception()
+            )
+
+    def _on_refreshed(self, key: tuple, task: asyncio.Task):
+        if self._refreshing.get(key) is task:
+            self._refreshing.pop(key)
+
+    async def _refresh(self, token: Optional[str], url: str) -> Dict[str, Any]:
+        key = self.get_key(token, url)
+        entry = self._entries.get(key)
+
+        try:
+            data = await get_tool_server_data(
+                token, url, etag=entry["etag"] if entry else None
+            )
+        except Exception as e:
+            health = self._health.setdefault(url, {"consecutive_failures": 0})
+            health.update(
+                {
+                    "status": "error",
+                    "error": str(e),
+                    "checked_at": int(time.time()),
+                    "consecutive_failures": health["consecutive_failures"] + 1,
+                }
+            )
+            raise
+
+        if data is None:
+            # Not modified
+            entry["fetched_at"] = time.time()
+        else:
+            entry = {"data": data, "etag": data.get("etag"), "fetched_at": time.time()}
+            self._entries[key] = entry
+
+        self._health[url] = {
+            "status": "ok",
+            "error": None,
+            "checked_at": int(time.time()),
+            "consecutive_failures": 0,
+        }
+        return entry["data"]
+
+    def get_health(self, url: str) -> Optional[dict]:
+        """Outcome of the last fetch of the spec at `url`, if it was fetched."""
+        return self._health.get(url)
+
+    def retain(self, keys: list[tuple], session_urls: list[str] = []):
+        """
+        Drop the specs of servers no longer configured. The specs fetched with
+        the users' session tokens are kept for the servers at `session_urls`.
+        """
+        keys = set(keys)
+        session_urls = set(session_urls)
+        for key in [
+            key
+            for key in self._entries
+            if key not in keys and key[0] not in session_urls
+        ]:
+            self._entries.pop(key)
+        urls = {url for url, _ in keys} | session_urls
+        for url in [url for url in self._health if url not in urls]:
+            self._health.pop(url)
+
+
+TOOL_SERVER_SPEC_CACHE = ToolServerSpecCache(TOOL_SERVER_SPEC_CACHE_TTL)
+
+
+def get_tool_server_url(server: Dict[str, Any]) -> str:
+    # Path (to OpenAPI spec URL) can be either a full URL or a path to append to the base URL
+    openapi_path = server.get("path", "openapi.json")
+    if "://" in openapi_path:
+        # If it contains "://", it's a full URL
+        return openapi_path
+
+    if not openapi_path.startswith("/"):
+        # Ensure the path starts with a slash
+        openapi_path = f"/{openapi_path}"
+
+    return f"{server.get('url')}{openapi_path}"
+
+
 async def get_tool_servers_data(
-    servers: List[Dict[str, Any]], session_token: Optional[str] = None
+    servers: List[Dict[str, Any]],
+    session_token: Optional[str] = None,
+    refresh: bool = False,
 ) -> List[Dict[str, Any]]:
+    """
+    Specs of the enabled tool servers, from TOOL_SERVER_SPEC_CACHE. With
+    `refresh`, each spec is revalidated before it's returned.
+    """
     # Prepare list of enabled servers along with their original index
     server_entries = []
     for idx, server in enumerate(servers):
         if server.get("config", {}).get("enable"):
-            # Path (to OpenAPI spec URL) can be either a full URL or a path to append to the base URL
-            openapi_path = server.get("path", "openapi.json")
-            if "://" in openapi_path:
-                # If it contains "://", it's a full URL
-                full_url = openapi_path
-            else:
-                if not openapi_path.startswith("/"):
-                    # Ensure the path starts with a slash
-                    openapi_path = f"/{openapi_path}"
-
-                full_url = f"{server.get('url')}{openapi_path}"
+            full_url = get_tool_server_url(server)
 
             info = server.get("info", {})
 
@@ -513,9 +744,27 @@ async def get_tool_servers_data(
                 token = session_token
             server_entries.append((idx, server, full_url, info, token))
 
+    if session_token is None:
+        TOOL_SERVER_SPEC_CACHE.retain(
+            [
+                TOOL_SERVER_SPEC_CACHE.get_key(token, url)
+                for (_, _, url, _, token) in server_entries
+            ],
+            session_urls=[
+                url
+                for (_, server, url, _, _) in server_entries
+                if server.get("auth_type", "bearer") == "session"
+            ],
+        )
+
     # Create async tasks to fetch data
     tasks = [
-        get_tool_server_data(token, url) for (_, _, url, _, token) in server_entries
+        (
+            TOOL_SERVER_SPEC_CACHE.refresh(token, url)
+            if refresh
+            else TOOL_SERVER_SPEC_CACHE.get(token, url)
+        )
+        for (_, _, url, _, token) in server_entries
     ]
 
     # Execute tasks concurrently
@@ -523,14 +772,21 @@ async def get_tool_servers_data(
 
     # Build final results with index and server metadata
     results = []
-    for (idx, server, url, info, _), response in zip(server_entries, responses):
+    for (idx, server, url, info, token), response in zip(server_entries, responses):
         if isinstance(response, Exception):
-            log.error(f"Failed to connect to {url} OpenAPI tool server")
-            continue
+            # Keep the last spec fetched, if any
+            response = TOOL_SERVER_SPEC_CACHE.get_cached(token, url)
+            if response is None:
+                log.error(f"Failed to connect to {url} OpenAPI tool server")
+                continue
+            log.warning(f"Using the last fetched spec of {url} OpenAPI tool server")
 
         openapi_data = response.get("openapi", {})
 
         if info and isinstance(openapi_data, dict):
+            # Copied, so the cached spec is left as fetched
+            openapi_data = {**openapi_data, "info": {**openapi_data.get("info", {})}}
+
             if "name" in info:
                 openapi_data["info"]["title"] = info.get("name", "Tool Server")
 
@@ -550,6 +806,22 @@ async def get_tool_servers_data(
     return results
 
 
+async def periodic_tool_servers_refresh(app):
+    """Keep app.state.TOOL_SERVERS revalidated every TOOL_SERVER_SPEC_CACHE_TTL."""
+    if TOOL_SERVER_SPEC_CACHE.ttl <= 0:
+        return
+
+    while True:
+        await asyncio.sleep(TOOL_SERVER_SPEC_CACHE.ttl)
+        try:
+            if app.state.config.TOOL_SERVER_CONNECTIONS:
+                app.state.TOOL_SERVERS = await get_tool_servers_data(
+                    app.state.config.TOOL_SERVER_CONNECTIONS, refresh=True
+                )
+        except Exception as e:
+            log.warning(f"Error refreshing tool servers: {e}")
+
+
 async def execute_tool_server(
     token: str, url: str, name: str, params: Dict[str, Any], server_data: Dict[str, Any]
 ) -> Any:
@@ -617,30 +889,30 @@ async def execute_tool_server(
         if token:
             headers["Authorization"] = f"Bearer {token}"
 
-        async with aiohttp.ClientSession(trust_env=True) as session:
-            request_method = getattr(session, http_method.lower())
-
-            if http_method in ["post", "put", "patch"]:
-                async with request_method(
-                    final_url,
-                    json=body_params,
-                    headers=headers,
-                    ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-                    return await response.json()
-            else:
-                async with request_method(
-                    final_url,
-                    headers=headers,
-                    ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-                    return await response.json()
+        session = TOOL_SERVER_SESSIONS.get_session()
+        request_method = getattr(session, http_method.lower())
+
+        if http_method in ["post", "put", "patch"]:
+            async with request_method(
+                final_url,
+                json=body_params,
+                headers=headers,
+                ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    raise Exception(f"HTTP error {response.status}: {text}")
+                return await response.json()
+        else:
+            async with request_method(
+                final_url,
+                headers=headers,
+                ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    raise Exception(f"HTTP error {response.status}: {text}")
+                return await response.json()
 
     except Exception as err:
         error = str(err)
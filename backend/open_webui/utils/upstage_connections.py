@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import itertools
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+import aiohttp
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
+    SRC_LOG_LEVELS,
+    UPSTAGE_CONNECTION_COOLDOWN,
+    UPSTAGE_CONNECTION_FAILURE_THRESHOLD,
+    UPSTAGE_CONNECTION_LIMIT,
+    UPSTAGE_CONNECTION_MAX_COOLDOWN,
+    UPSTAGE_HEALTH_CHECK_INTERVAL,
+    UPSTAGE_LOAD_BALANCING_STRATEGY,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["UPSTAGE"])
+
+
+def is_retryable_status(status: int) -> bool:
+    """Responses another connection may not fail with: rate limits and server errors."""
+    return status == 429 or status >= 500
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(float(value), 0) if value else None
+    except ValueError:
+        return None
+
+
+class ConnectionLease:
+    """A request in flight on a connection, released once it's done."""
+
+    def __init__(self, state: dict):
+        self._state = state
+        self.released = False
+
+    def release(self):
+        # The response cleanup may run more than once
+        if not self.released:
+            self.released = True
+            self._state["in_flight"] -= 1
+
+
+class UpstageConnectionPool:
+    """
+    Spreads the requests for a model served by several Upstage connections
+    (base URL and API key pairs) over them, with `strategy` "least_in_flight"
+    or "round_robin". A connection that is rate limited, or fails
+    `failure_threshold` times in a row, is put on cool-down and skipped while
+    other connections are available. The cool-down doubles, up to
+    `max_cooldown`, each time it fails again right after.
+    """
+
+    def __init__(
+        self,
+        strategy: str,
+        cooldown: int,
+        max_cooldown: int,
+        failure_threshold: int,
+    ):
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.failure_threshold = failure_threshold
+
+        self._states: Dict[tuple, dict] = {}
+        self._counter = itertools.count()
+        # Sessions are bound to the event loop they were created in
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+    def get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        for other_loop in [other for other in self._sessions if other.is_closed()]:
+            self._sessions.pop(other_loop)
+
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            # Without a limit, aiohttp caps the streams of the worker at 100
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=max(UPSTAGE_CONNECTION_LIMIT, 0)),
+                trust_env=True,
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def close(self):
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    def get_key(self, url: str, key: Optional[str]) -> tuple:
+        return (url, hashlib.sha256((key or "").encode()).hexdigest())
+
+    def _get_state(self, url: str, key: Optional[str]) -> dict:
+        return self._states.setdefault(
+            self.get_key(url, key),
+            {
+                "in_flight": 0,
+                "failures": 0,
+                "trips": 0,
+                "cooldown_until": 0.0,
+                "status": None,
+                "error": None,
+            },
+        )
+
+    def select(
+        self, connections: Dict[int, tuple], exclude: Optional[list] = None
+    ) -> Optional[int]:
+        """
+        Index of the connection the next request goes to, out of `connections`
+        ({idx: (url, key)}) but not `exclude`. If all of them are on cool-down,
+        the one whose cool-down ends first is tried anyway.
+        """
+        candidates = [idx for idx in connections if idx not in (exclude or [])]
+        if not candidates:
+            return None
+
+        states = {idx: self._get_state(*connections[idx]) for idx in candidates}
+        now = time.time()
+        available = [idx for idx in candidates if states[idx]["cooldown_until"] <= now]
+        if not available:
+            return min(candidates, key=lambda idx: states[idx]["cooldown_until"])
+
+        # Rotated, so ties are broken round-robin
+        offset = next(self._counter) % len(available)
+        available = available[offset:] + available[:offset]
+        if self.strategy == "round_robin":
+            return available[0]
+        return min(available, key=lambda idx: states[idx]["in_flight"])
+
+    def acquire(self, url: str, key: Optional[str]) -> ConnectionLease:
+        state = self._get_state(url, key)
+        state["in_flight"] += 1
+        return ConnectionLease(state)
+
+    def report_success(self, url: str, key: Optional[str]):
+        state = self._get_state(url, key)
+        state.update(failures=0, trips=0, cooldown_until=0.0, status="ok", error=None)
+
+    def report_failure(
+        self,
+        url: str,
+        key: Optional[str],
+        status: Optional[int] = None,
+        error: Optional[str] = None,
+        retry_after: Optional[float] = None,
+    ):
+        state = self._get_state(url, key)
+        state["failures"] += 1
+        state["status"] = "rate_limited" if status == 429 else "error"
+        state["error"] = error or (f"HTTP {status}" if status else None)
+
+        # Rate limits put the connection on cool-down right away
+        if status != 429 and state["failures"] < self.failure_threshold:
+            return
+
+        if retry_after is None:
+            retry_after = min(
+                self.cooldown * 2 ** state["trips"], max(self.max_cooldown, 0)
+            )
+        state["trips"] += 1
+        state["failures"] = 0
+        state["cooldown_until"] = time.time() + retry_after
+        log.warning(
+            f"Upstage connection {url} on cool-down for {retry_after:.0f}s: {state['error']}"
+        )
+
+    def get_health(self, url: str, key: Optional[str]) -> Optional[dict]:
+        state = self._states.get(self.get_key(url, key))
+        if state is None:
+            return None
+        return {
+            "status": state["status"],
+            "error": state["error"],
+            "in_flight": state["in_flight"],
+            "cooldown": max(round(state["cooldown_until"] - time.time()), 0),
+        }
+
+    async def check_health(self, url: str, key: Optional[str]) -> bool:
+        try:
+            async with self.get_session().get(
+                f"{url}/models",
+                headers={"Authorization": f"Bearer {key}"} if key else {},
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST),
+            ) as response:
+                return response.status < 400
+        except Exception as e:
+            log.debug(f"Upstage connection {url} health check failed: {e}")
+            return False
+
+    async def periodic_health_check(self, get_connections: Callable[[], list]):
+        """
+        Check the connections ([(url, key)]) on cool-down after server errors
+        every UPSTAGE_HEALTH_CHECK_INTERVAL seconds, and end the cool-down of
+        the ones that respond again. Rate limited connections wait it out.
+        """
+        if UPSTAGE_HEALTH_CHECK_INTERVAL <= 0:
+            return
+
+        while True:
+            await asyncio.sleep(UPSTAGE_HEALTH_CHECK_INTERVAL)
+            try:
+                now = time.time()
+                for url, key in dict.fromkeys(get_connections()):
+                    state = self._states.get(self.get_key(url, key))
+                    if (
+                        state
+                        and state["status"] == "error"
+                        and state["cooldown_until"] > now
+                        and await self.check_health(url, key)
+                    ):
+                        log.info(f"Upstage connection {url} is healthy again")
+                        self.report_success(url, key)
+            except Exception as e:
+                log.warning(f"Error checking Upstage connections: {e}")
+
+
+UPSTAGE_CONNECTION_POOL = UpstageConnectionPool(
+    UPSTAGE_LOAD_BALANCING_STRATEGY,
+    UPSTAGE_CONNECTION_COOLDOWN,
+    UPSTAGE_CONNECTION_MAX_COOLDOWN,
+    UPSTAGE_CONNECTION_FAILURE_THRESHOLD,
+)
@@ -43,6 +43,8 @@ async def chat_file_parsing_handler(
         # DB에서 file fetch
         file_record = Files.get_file_by_id(file_id)
         parsed_data = file_record.data
+        # Files processed in the background get their request id after upload
+        request_id = request_id or (file_record.meta or {}).get("request_id")
 
         collection_name = form_data.get("collection_name", None)
 
@@ -104,7 +106,9 @@ async def chat_file_parsing_handler(
                 Files.update_file_hash_by_id(file_id, content_hash)
 
                 if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
-                    result = save_docs_to_vector_db(
+                    # Off the event loop, so other payload stages keep running
+                    result = await asyncio.to_thread(
+                        save_docs_to_vector_db,
                         request,
                         docs=docs,
                         collection_name=collection_name,